@@ -1,18 +1,41 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Request, Response, abort, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-import io
+from werkzeug.exceptions import HTTPException
+import json
 import os
+import tempfile
 import traceback
 
-# Reuso do core existente
-from src.email_sender import enviar_em_lote
-from src.excel_reader import ler_contatos
+# O motor de envio (smtplib, email.mime, requests...) só é importado nas rotas
+# que enviam: o cold start serverless não paga por ele em /api/health e estáticos.
 from src.config import (
     SEND_INTERVAL,
-    DAILY_LIMIT as CONF_DAILY_LIMIT,
+    SEND_WORKERS,
+    SEND_LIMIT,
+    MAX_UPLOAD_MB,
+    UPLOAD_MEMORY_KB,
 )
 
-app = Flask(__name__, static_folder="web", static_url_path="/")
+# Teto de conexões SMTP simultâneas por requisição
+MAX_WORKERS = 10
+
+
+class _Requisicao(Request):
+    """Uploads em arquivo temporário "spooled": até ``UPLOAD_MEMORY_KB`` ficam
+    em memória, acima disso vão para o disco (uploads grandes e simultâneos
+    não ocupam a memória do worker)."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_MEMORY_KB * 1024, mode="rb+")
+
+
+# Estáticos de web/ servidos da memória, com impressão digital e compressão
+# (src/estaticos.py); a rota padrão do Flask para estáticos fica desligada.
+_WEB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web")
+app = Flask(__name__, static_folder=None)
+app.request_class = _Requisicao
+# Corpo maior que isso é recusado com 413 antes de ser lido (pelo Content-Length)
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_MB * 1024 * 1024 if MAX_UPLOAD_MB > 0 else None
 
 # Security headers
 @app.after_request
@@ -36,22 +59,52 @@ def options_handler(path):
     response.headers['Access-Control-Allow-Headers'] = 'Content-Type, X-Requested-With, Accept'
     return response
 
+def _servir_estatico(nome: str):
+    """Resposta para um arquivo de web/ (None se não existe): variante pelo
+    Accept-Encoding, ETag e 304 sem tocar o disco."""
+    from src import estaticos
+
+    ativo = estaticos.registro(_WEB).obter(nome)
+    if ativo is None:
+        return None
+    if ativo.conteudo is None:
+        return send_file(ativo.caminho, conditional=True)
+    codificacao, dados = ativo.escolher(request.accept_encodings)
+    etag = f"{ativo.etag}-{codificacao}" if codificacao else ativo.etag
+    headers = {"Cache-Control": ativo.cache, "ETag": f'"{etag}"', "Vary": "Accept-Encoding"}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    if codificacao:
+        headers["Content-Encoding"] = codificacao
+    return Response(dados, content_type=ativo.tipo, headers=headers)
+
+
 @app.route("/")
 def index():
-    return send_from_directory(app.static_folder, "index.html")
+    return _servir_estatico("index.html")
 
 @app.route("/help")
 def help_page():
-    return send_from_directory(app.static_folder, "help.html")
+    return _servir_estatico("help.html")
 
 
-# Favicon (evita 404/500 em ambientes de produção)
+# Favicon (evita 404/500 em ambientes de produção; sem arquivo, 204 em cache)
 @app.route("/favicon.ico")
 def favicon():
-    try:
-        return send_from_directory(app.static_folder, "favicon.ico")
-    except Exception:
-        return ("", 204)
+    return _servir_estatico("favicon.ico") or ("", 204, {"Cache-Control": "public, max-age=86400"})
+
+
+@app.route("/<path:nome>")
+def estatico(nome):
+    resposta = _servir_estatico(nome)
+    if resposta is None:
+        abort(404)
+    return resposta
+
+
+@app.errorhandler(413)
+def upload_grande(_erro):
+    return jsonify({"error": f"Arquivo muito grande: o limite é de {MAX_UPLOAD_MB} MB."}), 413
 
 
 # Healthcheck simples para plataformas de deploy
@@ -60,6 +113,112 @@ def health():
     return jsonify({"status": "ok"}), 200
 
 
+@app.route("/api/metrics")
+def metrics():
+    """Métricas do processo no formato de texto do Prometheus."""
+    from src import metricas
+
+    return Response(metricas.exportar(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _parametros_envio(form, *, limite_maximo: int | None = 100, limite_padrao: int = SEND_LIMIT) -> dict:
+    """Lê e valida os campos comuns de /api/send e /api/jobs.
+
+    ``limite_padrao`` vale quando o formulário não traz "daily_limit" (0 = sem
+    limite). Levanta ValueError com a mensagem para o usuário.
+    """
+    # Campos texto
+    subject = form.get("subject", "").strip()
+    text_template = form.get("text_template", "").strip()
+    html_template = form.get("html_template")
+    html_template = html_template if html_template and html_template.strip() else None
+
+    # SMTP: obrigatoriamente vindas do formulário (multiusuário).
+    smtp_user = (form.get("smtp_user") or "").strip()
+    smtp_pass = (form.get("smtp_pass") or "").strip()
+    smtp_server = (form.get("smtp_server") or "").strip()
+    smtp_port = (form.get("smtp_port") or "").strip() or "587"
+    from_name = (form.get("from_name") or "").strip()
+    reply_to = (form.get("reply_to") or "").strip()
+    from_email = (form.get("from_email") or smtp_user).strip()
+
+    # Máximo de contatos desta chamada (campo "daily_limit" do formulário; 0 = sem limite).
+    # Não é a cota de 24h da conta (DAILY_LIMIT), que o agendador aplica em todos os envios.
+    try:
+        limite = int(form.get("daily_limit", str(limite_padrao)))
+    except Exception:
+        limite = limite_padrao
+    limite = max(0, limite) or None
+    if limite_maximo is not None:
+        limite = min(limite_maximo, limite or limite_maximo)
+
+    # Envios em paralelo (cada worker com a sua conexão SMTP)
+    try:
+        workers = int(form.get("workers", str(SEND_WORKERS)))
+    except Exception:
+        workers = SEND_WORKERS
+    workers = max(1, min(MAX_WORKERS, workers))
+
+    # Validacoes básicas
+    if not subject:
+        raise ValueError("'subject' é obrigatório")
+    if not text_template:
+        raise ValueError("'text_template' é obrigatório")
+    if not smtp_user or not smtp_pass or not smtp_server or not smtp_port:
+        raise ValueError("Credenciais SMTP ausentes. Informe Gmail, Senha de App, servidor e porta.")
+
+    return {
+        "subject": subject,
+        "text_template": text_template,
+        "html_template": html_template,
+        "smtp_user": smtp_user,
+        "smtp_pass": smtp_pass,
+        "smtp_server": smtp_server,
+        "smtp_port": int(smtp_port),
+        "from_email": from_email,
+        "from_name": from_name,
+        "reply_to": reply_to,
+        "limite": limite,
+        "workers": workers,
+    }
+
+
+def _ler_upload():
+    """Arquivo enviado em 'file' como (stream binário, nome). Levanta ValueError se ausente/vazio.
+
+    O stream é o próprio arquivo temporário do upload (ver ``_Requisicao``),
+    lido sob demanda pelo parser, sem cópia em memória.
+    """
+    if "file" not in request.files:
+        raise ValueError("Arquivo 'file' (.xlsx, .csv ou .tsv) é obrigatório")
+    arquivo = request.files["file"]
+    stream = arquivo.stream
+    stream.seek(0, os.SEEK_END)
+    if not stream.tell():
+        raise ValueError("Arquivo vazio")
+    stream.seek(0)
+    return stream, arquivo.filename or ""
+
+
+# Máximo de linhas rejeitadas devolvidas no relatório da resposta
+MAX_REJEITADOS_RELATORIO = 1000
+
+
+def _contatos_upload(arquivo, nome: str, limite: int | None, contagem: dict, rejeitados: list | None = None):
+    """Gerador de contatos pendentes e válidos do upload (ver ``src.contatos`` e
+    ``src.validacao``); o limite conta só os válidos. Levanta ValueError."""
+    from itertools import islice
+    from src.contatos import formato_arquivo, iterar_contatos
+    from src import validacao
+
+    contatos = iterar_contatos(arquivo, formato=formato_arquivo(nome), contagem=contagem)
+    return islice(validacao.padrao().filtrar(contatos, rejeitados), limite)
+
+
+def _relatorio_rejeitados(rejeitados: list) -> dict:
+    return {"rejected": len(rejeitados), "rejected_rows": rejeitados[:MAX_REJEITADOS_RELATORIO]}
+
+
 @app.route("/api/send", methods=["POST", "OPTIONS"])
 def api_send():
     # Lidar com requisições OPTIONS para CORS
@@ -70,161 +229,274 @@ def api_send():
         response.headers['Access-Control-Allow-Headers'] = 'Content-Type, X-Requested-With, Accept'
         return response
     try:
-        # Arquivo Excel
-        if "file" not in request.files:
-            return jsonify({"error": "Arquivo 'file' (Excel) é obrigatório"}), 400
-        up = request.files["file"]
-        data = up.read()
-        if not data:
-            return jsonify({"error": "Arquivo vazio"}), 400
-
-        # Campos texto
-        subject = request.form.get("subject", "").strip()
-        text_template = request.form.get("text_template", "").strip()
-        html_template = request.form.get("html_template")
-        html_template = html_template if html_template and html_template.strip() else None
-
-        # SMTP: obrigatoriamente vindas do formulário (multiusuário).
-        smtp_user = (request.form.get("smtp_user") or "").strip()
-        smtp_pass = (request.form.get("smtp_pass") or "").strip()
-        smtp_server = (request.form.get("smtp_server") or "").strip()
-        smtp_port = (request.form.get("smtp_port") or "").strip() or "587"
-        from_name = (request.form.get("from_name") or "").strip()
-        reply_to = (request.form.get("reply_to") or "").strip()
-        from_email = (request.form.get("from_email") or smtp_user).strip()
-
-        # Limite diário
         try:
-            daily_limit = int(request.form.get("daily_limit", str(CONF_DAILY_LIMIT)))
-        except Exception:
-            daily_limit = CONF_DAILY_LIMIT
-        daily_limit = max(0, min(100, daily_limit))
+            arquivo, nome = _ler_upload()
+            params = _parametros_envio(request.form)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        limite = params["limite"]
 
         # Em ambientes serverless (Vercel), evite timeouts: cap ajustável e sem espera
         is_prod = os.getenv('VERCEL_ENV') == 'production'
         if is_prod:
             # Permitimos até 5 emails por requisição na Vercel, mas com aviso ao usuário
             vercel_limit = int(os.getenv('VERCEL_EMAIL_LIMIT', '5'))
-            daily_limit = min(daily_limit, vercel_limit)
+            limite = min(limite, vercel_limit)
 
-        # Validacoes básicas
-        if not subject:
-            return jsonify({"error": "'subject' é obrigatório"}), 400
-        if not text_template:
-            return jsonify({"error": "'text_template' é obrigatório"}), 400
-        if not smtp_user or not smtp_pass or not smtp_server or not smtp_port:
-            return jsonify({"error": "Credenciais SMTP ausentes. Informe Gmail, Senha de App, servidor e porta."}), 400
+        from src.tabela_contatos import TabelaContatos
 
-        # Ler Excel em memória com openpyxl (sem pandas)
         try:
-            from openpyxl import load_workbook
-            wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
-            ws = wb.active
-            if ws is None:
-                return jsonify({"error": "Não foi possível acessar a primeira planilha"}), 400
-            row_iter = ws.iter_rows(values_only=True)
-            try:
-                first = next(row_iter)
-            except StopIteration:
-                return jsonify({"error": "Planilha vazia"}), 400
-            headers = [str(h).strip() if h is not None else "" for h in first]
-            # Normalização de nomes de colunas
-            def _norm(s: str) -> str:
-                return (
-                    str(s)
-                    .strip()
-                    .lower()
-                    .replace("-", "")
-                    .replace("_", "")
-                    .replace(" ", "")
-                )
-            colmap = {idx: _norm(name) for idx, name in enumerate(headers)}
-            # Descobrir índices de colunas
-            idx_email = None
-            idx_nome = None
-            idx_status = None
-            for idx, normed in colmap.items():
-                if idx_email is None and "mail" in normed:
-                    idx_email = idx
-                if normed in {"nome", "name"}:
-                    idx_nome = idx
-                if normed == "status":
-                    idx_status = idx
-            if idx_email is None:
-                return jsonify({"error": "Planilha inválida: coluna de e-mail ausente. Use 'E-mail' ou 'Email'."}), 400
-            # Construir lista de contatos (com Status default)
-            contatos_raw = []
-            total = 0
-            pendentes = 0
-            for r in row_iter:
-                total += 1
-                nome_val = (r[idx_nome] if idx_nome is not None and idx_nome < len(r) else "") if r else ""
-                email_val = (r[idx_email] if idx_email is not None and idx_email < len(r) else "") if r else ""
-                status_val = (r[idx_status] if idx_status is not None and idx_status < len(r) else "Aguardando") if r else "Aguardando"
-                email_str = str(email_val or "").strip()
-                status_str = str(status_val or "Aguardando").strip()
-                nome_str = str(nome_val or "").strip()
-                if status_str != "Contatado" and email_str:
-                    pendentes += 1
-                    contatos_raw.append({
-                        "Nome": nome_str,
-                        "E-mail": email_str,
-                        "Status": status_str or "Aguardando",
-                    })
-                    if len(contatos_raw) >= daily_limit:
-                        # já coletamos o necessário para envio
-                        break
-            contatos_envio = contatos_raw[:daily_limit]
-            try:
-                print(f"[api/send] total={total} pendentes={pendentes} a_enviar={len(contatos_envio)} limite={daily_limit}")
-            except Exception:
-                pass
+            contagem, rejeitados = {}, []
+            # colunas compactas em vez de um dict por linha (ver src.tabela_contatos)
+            contatos_envio = TabelaContatos(_contatos_upload(arquivo, nome, limite, contagem, rejeitados))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            print(f"[api/send] total={contagem['total']} pendentes={contagem['pendentes']} rejeitados={len(rejeitados)} a_enviar={len(contatos_envio)} limite={limite}")
         except Exception:
-            traceback.print_exc()
-            return jsonify({"error": "Falha ao ler o Excel (openpyxl). Verifique o formato (.xlsx) e as colunas."}), 400
+            pass
 
-        results = []
         # Escolher intervalo adequado ao ambiente
         intervalo_envio = 0 if is_prod else SEND_INTERVAL
 
-        for i, sucesso, email_dest in enviar_em_lote(
+        from src.email_sender import enviar_em_lote
+
+        interrompido: list[str] = []
+        lote = enviar_em_lote(
             contatos_envio,
-            subject,
-            text_template,
+            params["subject"],
+            params["text_template"],
             intervalo=intervalo_envio,
             anexos=None,
-            html_template=html_template,
-            smtp_user=smtp_user,
-            smtp_pass=smtp_pass,
-            smtp_server=smtp_server,
-            smtp_port=int(smtp_port),
-            from_email=from_email,
-            from_name=from_name,
-            reply_to=reply_to,
+            html_template=params["html_template"],
+            smtp_user=params["smtp_user"],
+            smtp_pass=params["smtp_pass"],
+            smtp_server=params["smtp_server"],
+            smtp_port=params["smtp_port"],
+            from_email=params["from_email"],
+            from_name=params["from_name"],
+            reply_to=params["reply_to"],
             is_serverless=is_prod,
-        ):
-            # Captura e-mail retornado pelo gerador (compatível com iteráveis não-DataFrame)
-            email = email_dest
-            status = "Contatado" if sucesso else "Erro"
-            results.append({"index": int(i) if isinstance(i, (int, float)) else str(i), "email": email, "success": bool(sucesso), "status": status})
-
-        summary = {
-            "requested": len(contatos_envio),
-            "sent_ok": sum(1 for r in results if r["success"]),
-            "failed": sum(1 for r in results if not r["success"]),
-            "limit": daily_limit,
-            "is_vercel": is_prod,
-            "vercel_limit": vercel_limit if is_prod else None,
-            "message": "Na Vercel, o envio é limitado a {} emails por requisição. Para enviar mais emails, faça múltiplas requisições.".format(vercel_limit) if is_prod else None
-        }
+            workers=params["workers"],
+            preservar_ordem=True,
+            interrompido=interrompido,
+        )
+        # Captura e-mail retornado pelo gerador (compatível com iteráveis não-DataFrame)
+        registros = (
+            {"index": int(i) if isinstance(i, (int, float)) else str(i), "email": email_dest, "success": bool(sucesso), "status": "Contatado" if sucesso else "Erro"}
+            for i, sucesso, email_dest in lote
+        )
+
+        def resumo(sent_ok: int, failed: int) -> dict:
+            return {
+                "requested": len(contatos_envio),
+                "sent_ok": sent_ok,
+                "failed": failed,
+                "limit": limite,
+                "is_vercel": is_prod,
+                "vercel_limit": vercel_limit if is_prod else None,
+                "message": "Na Vercel, o envio é limitado a {} emails por requisição. Para enviar mais emails, faça múltiplas requisições.".format(vercel_limit) if is_prod else None,
+                # cota da conta esgotada no meio do lote: os contatos restantes não foram enviados
+                "stopped": bool(interrompido),
+                "stop_reason": interrompido[0] if interrompido else None,
+                **_relatorio_rejeitados(rejeitados),
+            }
+
+        # Modo streaming: cada resultado sai assim que o envio termina
+        modo = _modo_stream()
+        if modo:
+            return _responder_stream(modo, registros, resumo)
 
+        results = list(registros)
+        summary = resumo(
+            sum(1 for r in results if r["success"]),
+            sum(1 for r in results if not r["success"]),
+        )
         return jsonify({"summary": summary, "results": results})
 
+    except HTTPException:
+        raise  # ex.: 413 do upload acima de MAX_UPLOAD_MB
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+def _modo_stream() -> str | None:
+    """'ndjson' ou 'sse' se o cliente pediu streaming (?stream=, campo 'stream' ou Accept)."""
+    modo = (request.args.get("stream") or request.form.get("stream") or "").strip().lower()
+    if modo in {"ndjson", "sse"}:
+        return modo
+    accept = request.headers.get("Accept", "")
+    if "application/x-ndjson" in accept:
+        return "ndjson"
+    if "text/event-stream" in accept:
+        return "sse"
+    return None
+
+
+def _evento(modo: str, tipo: str, dados: dict) -> str:
+    if modo == "sse":
+        return f"event: {tipo}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+    return json.dumps({"type": tipo, **dados}, ensure_ascii=False) + "\n"
+
+
+def _responder_stream(modo: str, registros, resumo) -> Response:
+    """Envia um registro por resultado e, no fim, o resumo (NDJSON ou Server-Sent Events)."""
+    def gerar():
+        sent_ok = failed = 0
+        try:
+            for r in registros:
+                if r["success"]:
+                    sent_ok += 1
+                else:
+                    failed += 1
+                yield _evento(modo, "result", r)
+            yield _evento(modo, "summary", {"summary": resumo(sent_ok, failed)})
+        except Exception as e:
+            traceback.print_exc()
+            yield _evento(modo, "error", {"error": str(e)})
+
+    mimetype = "text/event-stream" if modo == "sse" else "application/x-ndjson"
+    return Response(
+        stream_with_context(gerar()),
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Campanhas em segundo plano: cria o job e responde na hora (sem teto de timeout)
+@app.route("/api/jobs", methods=["POST"])
+def api_jobs_criar():
+    from src import jobs
+
+    try:
+        try:
+            arquivo, nome = _ler_upload()
+            # Sem o teto de 100 por requisição nem SEND_LIMIT como padrão: a cota de 24h
+            # (DAILY_LIMIT) é aplicada pelo agendador
+            params = _parametros_envio(request.form, limite_maximo=None, limite_padrao=0)
+            limite = params.pop("limite")
+            contagem, rejeitados = {}, []
+            contatos = _contatos_upload(arquivo, nome, limite, contagem, rejeitados)
+            senha = params.pop("smtp_pass")
+            params["interval"] = SEND_INTERVAL
+            # Os contatos vão da planilha para a fila linha a linha, sem lista intermediária
+            job_id = jobs.fila().criar(params, contatos, senha=senha)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        jobs.iniciar_worker()
+        job = jobs.fila().obter(job_id)
+        print(f"[api/jobs] job={job_id} total={contagem['total']} pendentes={contagem['pendentes']} rejeitados={len(rejeitados)}")
+        return jsonify({
+            "job_id": job_id,
+            "status": jobs.NA_FILA,
+            "requested": job["total"],
+            **_relatorio_rejeitados(rejeitados),
+        }), 202
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/jobs/<job_id>")
+def api_jobs_status(job_id):
+    from src import jobs
+
+    job = jobs.fila().obter(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado"}), 404
+    return jsonify(job)
+
+
+@app.route("/api/jobs/<job_id>/results")
+def api_jobs_resultados(job_id):
+    from src import jobs
+
+    if jobs.fila().obter(job_id) is None:
+        return jsonify({"error": "Job não encontrado"}), 404
+    desde = request.args.get("offset", 0, type=int)
+    limite = max(1, min(1000, request.args.get("limit", 500, type=int)))
+    results = jobs.fila().resultados(job_id, desde=desde, limite=limite)
+    proximo = results[-1]["index"] + 1 if len(results) == limite else None
+    return jsonify({"results": results, "next_offset": proximo})
+
+
+@app.route("/api/jobs/<job_id>/cancel", methods=["POST"])
+def api_jobs_cancelar(job_id):
+    from src import jobs
+
+    if not jobs.fila().cancelar(job_id):
+        return jsonify({"error": "Job não encontrado ou já finalizado"}), 409
+    return jsonify(jobs.fila().obter(job_id))
+
+
+@app.route("/api/jobs/<job_id>/resume", methods=["POST"])
+def api_jobs_retomar(job_id):
+    from src import jobs
+
+    senha = (request.form.get("smtp_pass") or "").strip() or None
+    if not jobs.fila().retomar(job_id, senha=senha):
+        return jsonify({"error": "Job não encontrado ou não pode ser retomado"}), 409
+    jobs.iniciar_worker()
+    return jsonify(jobs.fila().obter(job_id)), 202
+
+
+# Descadastro (link do header List-Unsubscribe). O GET só confirma: leitores de
+# e-mail e antivírus abrem links sozinhos, então a supressão exige POST (RFC 8058).
+@app.route("/api/unsubscribe", methods=["GET", "POST"])
+def api_unsubscribe():
+    from markupsafe import escape
+    from src import supressao
+
+    email = supressao.normalizar_email(request.values.get("email", ""))
+    token = request.values.get("token", "")
+    if "@" not in email:
+        return jsonify({"error": "Parâmetro 'email' inválido"}), 400
+    # o link do e-mail traz um HMAC do endereço; sem ele qualquer um descadastraria qualquer endereço
+    if not supressao.verificar_descadastro(email, token):
+        return jsonify({"error": "Link de descadastro inválido"}), 403
+
+    if request.method == "GET":
+        return (
+            "<!doctype html><meta charset='utf-8'><title>Descadastro</title>"
+            f"<form method='post'><p>Parar de enviar e-mails para <b>{escape(email)}</b>?</p>"
+            f"<input type='hidden' name='email' value='{escape(email)}'>"
+            f"<input type='hidden' name='token' value='{escape(token)}'>"
+            "<button type='submit'>Descadastrar</button></form>"
+        )
+
+    indice = supressao.indice()
+    if indice is None:
+        return jsonify({"error": "Lista de supressão indisponível"}), 503
+    indice.suprimir(email, supressao.DESCADASTRO)
+    print(f"[api/unsubscribe] {email}")
+    if "text/html" in request.headers.get("Accept", ""):
+        return "<!doctype html><meta charset='utf-8'><title>Descadastro</title><p>Pronto, você não receberá mais e-mails.</p>"
+    return jsonify({"email": email, "unsubscribed": True})
+
+
+# Webhook de eventos do Mailjet (bounce, spam, unsub...). Configure no Mailjet a
+# URL https://eventos:<EVENTS_TOKEN>@seu-app/api/events (ou ?token=<EVENTS_TOKEN>).
+@app.route("/api/events", methods=["POST"])
+def api_events():
+    from src import eventos
+
+    auth = request.authorization
+    if not eventos.autorizado(auth.password if auth else None, request.args.get("token")):
+        return jsonify({"error": "Não autorizado"}), 401
+    dados = request.get_json(force=True, silent=True)
+    if not isinstance(dados, (dict, list)):
+        return jsonify({"error": "Corpo JSON inválido"}), 400
+    validos, ignorados = eventos.validar(dados)
+    if not eventos.gravador().registrar(validos):
+        # 5xx: o Mailjet tenta de novo mais tarde
+        return jsonify({"error": "Eventos não gravados"}), 503
+    return jsonify({"accepted": len(validos), "ignored": ignorados})
+
+
 if __name__ == "__main__":
     # Local development
     app.run(host="0.0.0.0", port=8000, debug=False)
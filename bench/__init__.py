@@ -0,0 +1 @@
+"""Benchmarks do núcleo de envio contra servidores locais (ver ``bench.run``)."""
@@ -0,0 +1,98 @@
+"""Tempo de cold start do ponto de entrada serverless (``api.index``).
+
+Cada rodada é um interpretador novo que importa ``api.index`` e responde a um
+``GET /api/health``, como numa instância recém-criada da Vercel. Mede o tempo
+de importação e o da primeira resposta, lista os módulos mais pesados
+(``python -X importtime``) e falha se algum módulo do motor de envio
+(pandas, openpyxl, requests, smtplib, email.mime) for carregado nesse
+caminho, ou se a mediana passar de ``--limite-ms``::
+
+    python -m bench.importacao
+    python -m bench.importacao -r 20 --limite-ms 400
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from bench.run import _RAIZ, _ambiente
+
+ENTRADA = "api.index"
+# Só podem carregar nas rotas que enviam/leem planilhas
+PROIBIDOS = ("pandas", "openpyxl", "requests", "smtplib", "email.mime", "dns")
+
+_FILHO = f"""
+import json, sys, time
+inicio = time.perf_counter()
+import {ENTRADA} as entrada
+importado = time.perf_counter()
+resposta = entrada.app.test_client().get("/api/health")
+fim = time.perf_counter()
+print(json.dumps({{
+    "importacao_ms": (importado - inicio) * 1000,
+    "primeira_resposta_ms": (fim - inicio) * 1000,
+    "status": resposta.status_code,
+    "modulos": sorted(sys.modules),
+}}))
+"""
+
+
+def rodada(env: dict, *, importtime: bool = False) -> tuple[dict, str]:
+    comando = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", _FILHO]
+    proc = subprocess.run(comando, cwd=_RAIZ, env=env, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def mais_pesados(importtime: str, quantidade: int = 10) -> list[tuple[str, float]]:
+    """Módulos com maior tempo próprio (``self``) na saída de ``-X importtime``."""
+    tempos = []
+    for linha in importtime.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        proprio, _cumulativo, modulo = (parte.strip() for parte in linha[len("import time:"):].split("|"))
+        if proprio.isdigit():
+            tempos.append((modulo, int(proprio) / 1000))
+    return sorted(tempos, key=lambda t: t[1], reverse=True)[:quantidade]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=f"Cold start de {ENTRADA} (importação + /api/health)")
+    parser.add_argument("-r", "--rodadas", type=int, default=10)
+    parser.add_argument("--limite-ms", type=float, help="falha se a mediana da primeira resposta passar disso")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        env = _ambiente(tmp)
+        rodada(env)  # aquece o cache de bytecode (.pyc), como no deploy
+        resultados = [rodada(env)[0] for _ in range(args.rodadas)]
+        detalhe, importtime = rodada(env, importtime=True)
+
+    importacao = statistics.median(r["importacao_ms"] for r in resultados)
+    primeira = statistics.median(r["primeira_resposta_ms"] for r in resultados)
+    print(f"{ENTRADA}: importação p50={importacao:.1f}ms  primeira resposta p50={primeira:.1f}ms "
+          f"(mín. {min(r['primeira_resposta_ms'] for r in resultados):.1f}ms, {args.rodadas} rodadas)")
+    print(f"módulos carregados: {len(detalhe['modulos'])}")
+    print("mais pesados (tempo próprio):")
+    for modulo, ms in mais_pesados(importtime):
+        print(f"  {ms:>7.1f}ms  {modulo}")
+
+    falhou = False
+    if any(r["status"] != 200 for r in resultados):
+        print("ERRO: /api/health não respondeu 200")
+        falhou = True
+    carregados = [
+        p for p in PROIBIDOS if any(m == p or m.startswith(p + ".") for m in detalhe["modulos"])
+    ]
+    if carregados:
+        print(f"ERRO: módulos pesados carregados no cold start: {', '.join(carregados)}")
+        falhou = True
+    if args.limite_ms is not None and primeira > args.limite_ms:
+        print(f"ERRO: primeira resposta {primeira:.1f}ms acima do limite de {args.limite_ms:.0f}ms")
+        falhou = True
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+"""Benchmarks do núcleo de envio, sem rede externa.
+
+Cada cenário roda num subprocesso próprio (configuração do ``.env`` isolada e
+caches frios), contra o ``SumidouroSMTP`` e o ``FakeMailjet`` locais, e mede
+mensagens/s e latência p50/p95/p99. Os resultados vão para
+``bench/resultados/<data>.json`` e podem ser comparados entre execuções::
+
+    python -m bench.run                          # todos os cenários, 1k/10k/100k
+    python -m bench.run -c templates lote_smtp -n 1000
+    python -m bench.run --latencia 0.005 --erro 0.01
+    python -m bench.run --comparar bench/resultados/antes.json bench/resultados/depois.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+_RAIZ = Path(__file__).resolve().parents[1]
+_RESULTADOS = _RAIZ / "bench" / "resultados"
+
+TAMANHOS = [1_000, 10_000, 100_000]
+
+
+def percentil(valores: list[float], p: float) -> float:
+    """Percentil por posição (nearest-rank) de uma lista já ordenada."""
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[k]
+
+
+def resumir(latencias: list[float]) -> dict | None:
+    if not latencias:
+        return None
+    ordenadas = sorted(latencias)
+    return {
+        "p50": round(percentil(ordenadas, 50) * 1000, 4),
+        "p95": round(percentil(ordenadas, 95) * 1000, 4),
+        "p99": round(percentil(ordenadas, 99) * 1000, 4),
+        "max": round(ordenadas[-1] * 1000, 4),
+    }
+
+
+# --- dados sintéticos -------------------------------------------------------
+
+_DOMINIOS = ["gmail.com", "outlook.com", "yahoo.com.br", "empresa.com.br", "uol.com.br"]
+_TEXTO = "Olá {nome},\n\nVi que a {empresa} está contratando e gostaria de me apresentar.\n\nAtenciosamente"
+_HTML = "<p>Olá <b>{nome}</b>,</p><p>Vi que a <i>{empresa}</i> está contratando.</p>"
+
+
+def contatos(n: int) -> list[dict]:
+    return [
+        {"Nome": f"Pessoa {i}", "E-mail": f"pessoa{i}@{_DOMINIOS[i % len(_DOMINIOS)]}", "Empresa": f"Empresa {i % 97}"}
+        for i in range(n)
+    ]
+
+
+# --- cenários (executados no subprocesso) -----------------------------------
+
+def _cronometrar(iteravel):
+    """Consome o iterável medindo o intervalo entre itens."""
+    latencias = []
+    anterior = inicio = time.perf_counter()
+    for _ in iteravel:
+        agora = time.perf_counter()
+        latencias.append(agora - anterior)
+        anterior = agora
+    return latencias, time.perf_counter() - inicio
+
+
+def cenario_templates(n, opcoes):
+    from src.templates import compilar, dados_contato
+
+    texto, html = compilar(_TEXTO), compilar(_HTML)
+
+    def renderizar():
+        for c in contatos(n):
+            dados = dados_contato(c)
+            yield texto.renderizar(dados), html.renderizar(dados)
+
+    return _cronometrar(renderizar()) + ({},)
+
+
+def cenario_anexos(n, opcoes):
+    from src.anexos import CacheAnexos
+
+    pasta = Path(opcoes["tmp"])
+    arquivo = pasta / "anexo.pdf"
+    arquivo.write_bytes(os.urandom(512 * 1024))
+    cache = CacheAnexos(64 * 1024 * 1024)
+
+    frios = []
+    for _ in range(min(n, 100)):
+        cache.limpar()
+        t = time.perf_counter()
+        cache.obter(arquivo).parte_mime().as_bytes()
+        frios.append(time.perf_counter() - t)
+
+    def quentes():
+        for _ in range(n):
+            yield cache.obter_varios([arquivo])
+
+    latencias, segundos = _cronometrar(quentes())
+    return latencias, segundos, {"codificacao_fria_512kb_ms": resumir(frios)}
+
+
+def _planilha(n, opcoes, formato):
+    from src.contatos import iterar_contatos
+
+    caminho = Path(opcoes["tmp"]) / f"contatos.{formato}"
+    linhas = [["Nome", "E-mail", "Empresa", "Status"]] + [
+        [c["Nome"], c["E-mail"], c["Empresa"], "Contatado" if i % 10 == 0 else ""]
+        for i, c in enumerate(contatos(n))
+    ]
+    if formato == "xlsx":
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        for linha in linhas:
+            ws.append(linha)
+        wb.save(caminho)
+    else:
+        import csv
+
+        with open(caminho, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(linhas)
+    return _cronometrar(iterar_contatos(caminho)) + ({"bytes_arquivo": caminho.stat().st_size},)
+
+
+def cenario_planilha_xlsx(n, opcoes):
+    return _planilha(n, opcoes, "xlsx")
+
+
+def cenario_planilha_csv(n, opcoes):
+    return _planilha(n, opcoes, "csv")
+
+
+def cenario_enviar_email(n, opcoes):
+    from src.email_sender import enviar_email
+
+    def enviar():
+        for c in contatos(n):
+            yield enviar_email(c["E-mail"], "Benchmark", _TEXTO, html=_HTML)
+
+    return _cronometrar(enviar()) + ({},)
+
+
+def _lote(n, workers):
+    from src.email_sender import enviar_em_lote
+
+    resultados = []
+
+    def lote():
+        for r in enviar_em_lote(contatos(n), "Benchmark", _TEXTO, intervalo=0, html_template=_HTML, workers=workers):
+            resultados.append(r[1])
+            yield r
+
+    latencias, segundos = _cronometrar(lote())
+    return latencias, segundos, {"workers": workers, "sucessos": sum(resultados)}
+
+
+def cenario_lote_smtp(n, opcoes):
+    return _lote(n, 1)
+
+
+def cenario_lote_smtp_4(n, opcoes):
+    return _lote(n, 4)
+
+
+def cenario_lote_mailjet(n, opcoes):
+    return _lote(n, 1)
+
+
+def cenario_lote_coletivo(n, opcoes):
+    """Texto sem ``{campo}``: transações com até 50 RCPT (``SMTP_MAX_RECIPIENTS``)."""
+    from src.email_sender import enviar_em_lote
+
+    resultados = []
+
+    def lote():
+        for r in enviar_em_lote(contatos(n), "Benchmark", "Comunicado igual para todos.", intervalo=0, por_transacao=50):
+            resultados.append(r[1])
+            yield r
+
+    latencias, segundos = _cronometrar(lote())
+    return latencias, segundos, {"por_transacao": 50, "sucessos": sum(resultados)}
+
+
+def cenario_lote_tabela(n, opcoes):
+    """``enviar_em_lote`` sobre uma ``TabelaContatos``; mede também a memória
+    da tabela e da lista de dicts equivalente (fora do tempo medido)."""
+    import tracemalloc
+    from src.email_sender import enviar_em_lote
+    from src.tabela_contatos import TabelaContatos
+
+    tracemalloc.start()
+    lista = contatos(n)
+    memoria_lista = tracemalloc.get_traced_memory()[0]
+    tabela = TabelaContatos(lista)
+    memoria_tabela = tracemalloc.get_traced_memory()[0] - memoria_lista
+    tracemalloc.stop()
+    del lista
+
+    resultados = []
+
+    def lote():
+        for r in enviar_em_lote(tabela, "Benchmark", _TEXTO, intervalo=0, html_template=_HTML):
+            resultados.append(r[1])
+            yield r
+
+    latencias, segundos = _cronometrar(lote())
+    return latencias, segundos, {
+        "sucessos": sum(resultados),
+        "memoria_tabela": memoria_tabela,
+        "memoria_lista": memoria_lista,
+    }
+
+
+def cenario_caixa_renderizar(n, opcoes):
+    """Ensaio da caixa de saída: renderiza e grava em disco, sem enviar."""
+    from src.caixa_saida import CaixaSaida
+    from src.email_sender import enviar_em_lote
+
+    caixa = CaixaSaida(Path(opcoes["tmp"]) / "outbox" / f"renderizar-{n}")
+    lote = enviar_em_lote(contatos(n), "Benchmark", _TEXTO, intervalo=0, html_template=_HTML, caixa=caixa)
+    latencias, segundos = _cronometrar(lote)
+    return latencias, segundos, {"bytes": caixa.tamanho()}
+
+
+def cenario_caixa_enviar(n, opcoes):
+    """Descarga da caixa de saída (renderizada antes, fora da medição) com 4 workers."""
+    from src.caixa_saida import CaixaSaida
+    from src.email_sender import enviar_caixa, enviar_em_lote
+
+    caixa = CaixaSaida(Path(opcoes["tmp"]) / "outbox" / f"enviar-{n}")
+    for _ in enviar_em_lote(contatos(n), "Benchmark", _TEXTO, intervalo=0, html_template=_HTML, caixa=caixa):
+        pass
+    latencias, segundos = _cronometrar(enviar_caixa(caixa, intervalo=0, workers=4))
+    return latencias, segundos, {"workers": 4, **caixa.contagem()}
+
+
+def cenario_eventos(n, opcoes):
+    """Webhook ``/api/events``: 8 clientes simultâneos postando arrays de 50 eventos
+    (metade com supressão: bounce, spam e unsub)."""
+    import threading
+
+    os.environ["EVENTS_TOKEN"] = "bench"
+    from app import app
+    from src import eventos
+
+    tipos = ["sent", "open", "click", "bounce", "spam", "unsub"]
+    lista = [
+        {"event": tipos[j % len(tipos)], "email": c["E-mail"], "time": j, "hard_bounce": True}
+        for j, c in enumerate(contatos(n))
+    ]
+    corpos = [lista[inicio:inicio + 50] for inicio in range(0, n, 50)]
+    latencias, lock = [], threading.Lock()
+
+    def cliente(parte):
+        http = app.test_client()
+        for corpo in parte:
+            antes = time.perf_counter()
+            http.post("/api/events?token=bench", json=corpo)
+            with lock:
+                latencias.append(time.perf_counter() - antes)
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=cliente, args=(corpos[k::8],)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    segundos = time.perf_counter() - inicio
+    # itens/latências por requisição (50 eventos cada)
+    return latencias, segundos, {
+        "eventos_por_segundo": round(n / segundos, 1),
+        "transacoes": eventos.gravador().transacoes,
+    }
+
+
+CENARIOS = {
+    "templates": cenario_templates,
+    "anexos": cenario_anexos,
+    "planilha_xlsx": cenario_planilha_xlsx,
+    "planilha_csv": cenario_planilha_csv,
+    "enviar_email": cenario_enviar_email,
+    "lote_smtp": cenario_lote_smtp,
+    "lote_smtp_4": cenario_lote_smtp_4,
+    "lote_mailjet": cenario_lote_mailjet,
+    "lote_coletivo": cenario_lote_coletivo,
+    "lote_tabela": cenario_lote_tabela,
+    "caixa_renderizar": cenario_caixa_renderizar,
+    "caixa_enviar": cenario_caixa_enviar,
+    "eventos": cenario_eventos,
+}
+_USA_SMTP = {"enviar_email", "lote_smtp", "lote_smtp_4", "lote_coletivo", "lote_tabela", "caixa_enviar"}
+
+
+def _ambiente(tmp: str) -> dict:
+    """Variáveis para o subprocesso: sem pausas, cotas, supressão ou DNS."""
+    env = dict(os.environ)
+    env.update(
+        DATA_DIR=tmp,
+        SEND_INTERVAL="0",
+        SEND_RATE_PER_MINUTE="0",
+        DAILY_LIMIT="0",
+        HOURLY_LIMIT="0",
+        SUPPRESSION_ENABLED="false",
+        VALIDATE_MX="false",
+        SMTP_STARTTLS="false",
+        SMTP_SERVER="127.0.0.1",
+        SMTP_USER="bench@local.test",
+        SENHA_APP="bench",
+        EMAIL="bench@local.test",
+        USE_MAILJET_API="false",
+        MAILJET_API_KEY="bench",
+        MAILJET_API_SECRET="bench",
+        PYTHONPATH=str(_RAIZ),
+    )
+    return env
+
+
+def executar_filho(cenario: str, n: int, saida: str, latencia: float, erro: float) -> None:
+    """Roda um cenário neste processo (já com o ambiente do benchmark)."""
+    from bench.servidores import FakeMailjet, SumidouroSMTP
+
+    opcoes = {"tmp": os.environ["DATA_DIR"]}
+    with contextlib.ExitStack() as pilha:
+        servidor = None
+        if cenario in _USA_SMTP:
+            servidor = pilha.enter_context(SumidouroSMTP(latencia=latencia, erro=erro, semente=1))
+            os.environ["SMTP_PORT"] = str(servidor.porta)
+        elif cenario == "lote_mailjet":
+            servidor = pilha.enter_context(FakeMailjet(latencia=latencia, erro=erro, semente=1))
+            os.environ["MAILJET_API_URL"] = servidor.url
+            os.environ["USE_MAILJET_API"] = "true"
+
+        # os logs por mensagem (print) distorcem a medição
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            latencias, segundos, extra = CENARIOS[cenario](n, opcoes)
+
+        if isinstance(servidor, SumidouroSMTP):
+            extra.update(servidor_mensagens=servidor.mensagens, servidor_destinatarios=servidor.destinatarios,
+                         servidor_bytes=servidor.bytes)
+        elif isinstance(servidor, FakeMailjet):
+            extra.update(servidor_chamadas=servidor.chamadas, servidor_mensagens=servidor.mensagens)
+
+    itens = len(latencias)
+    resultado = {
+        "cenario": cenario,
+        "tamanho": n,
+        "itens": itens,
+        "segundos": round(segundos, 4),
+        "por_segundo": round(itens / segundos, 1) if segundos else None,
+        "latencia_ms": resumir(latencias),
+        **extra,
+    }
+    Path(saida).write_text(json.dumps(resultado), encoding="utf-8")
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(cenarios: list[str], tamanhos: list[int], latencia: float, erro: float) -> dict:
+    resultados = []
+    for cenario in cenarios:
+        for n in tamanhos:
+            with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+                saida = Path(tmp) / "resultado.json"
+                print(f"  {cenario:<14} n={n:<7} ", end="", flush=True)
+                proc = subprocess.run(
+                    [sys.executable, "-m", "bench.run", "--filho", cenario, str(n), str(saida),
+                     "--latencia", str(latencia), "--erro", str(erro)],
+                    cwd=_RAIZ, env=_ambiente(tmp), capture_output=True, text=True,
+                )
+                if proc.returncode != 0 or not saida.exists():
+                    print("FALHOU")
+                    print(proc.stderr[-2000:])
+                    resultados.append({"cenario": cenario, "tamanho": n, "erro": proc.stderr[-2000:]})
+                    continue
+                r = json.loads(saida.read_text(encoding="utf-8"))
+                lat = r["latencia_ms"] or {}
+                print(f"{r['por_segundo'] or 0:>10.1f}/s  p50={lat.get('p50', 0):.3f}ms  "
+                      f"p95={lat.get('p95', 0):.3f}ms  p99={lat.get('p99', 0):.3f}ms")
+                resultados.append(r)
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "servidor": {"latencia_s": latencia, "erro": erro},
+        "resultados": resultados,
+    }
+
+
+def comparar(antes: str, depois: str) -> None:
+    """Tabela de mensagens/s e p95 entre dois arquivos de resultado."""
+    a = json.loads(Path(antes).read_text(encoding="utf-8"))
+    b = json.loads(Path(depois).read_text(encoding="utf-8"))
+    indice = {(r["cenario"], r["tamanho"]): r for r in a["resultados"] if "erro" not in r}
+    print(f"{'cenário':<14} {'n':>7} {'antes/s':>11} {'depois/s':>11} {'Δ':>8} {'p95 antes':>10} {'p95 depois':>11}")
+    for r in b["resultados"]:
+        base = indice.get((r["cenario"], r["tamanho"]))
+        if base is None or "erro" in r:
+            continue
+        ganho = (r["por_segundo"] / base["por_segundo"] - 1) * 100 if base["por_segundo"] else 0
+        p95a = (base["latencia_ms"] or {}).get("p95", 0)
+        p95b = (r["latencia_ms"] or {}).get("p95", 0)
+        print(f"{r['cenario']:<14} {r['tamanho']:>7} {base['por_segundo']:>11.1f} {r['por_segundo']:>11.1f} "
+              f"{ganho:>+7.1f}% {p95a:>9.3f}ms {p95b:>10.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do núcleo de envio (offline)")
+    parser.add_argument("-c", "--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("-n", "--tamanhos", nargs="+", type=int, default=TAMANHOS)
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência simulada do servidor, em segundos")
+    parser.add_argument("--erro", type=float, default=0.0, help="fração de falhas injetadas pelo servidor")
+    parser.add_argument("-o", "--saida", help="arquivo JSON de saída (padrão: bench/resultados/<data>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"))
+    parser.add_argument("--filho", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        cenario, n, saida = args.filho
+        executar_filho(cenario, int(n), saida, args.latencia, args.erro)
+        return
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    print(f"Benchmarks: {', '.join(args.cenarios)} | tamanhos {args.tamanhos}")
+    relatorio = executar(args.cenarios, args.tamanhos, args.latencia, args.erro)
+    saida = Path(args.saida) if args.saida else _RESULTADOS / f"{datetime.now():%Y-%m-%d_%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Resultados gravados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
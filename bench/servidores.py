@@ -0,0 +1,258 @@
+"""Servidores locais que substituem o SMTP e a API do Mailjet nos benchmarks.
+
+- ``SumidouroSMTP``: aceita qualquer AUTH e descarta as mensagens, com
+  latência configurável no DATA e injeção de erros (4xx/5xx no RCPT/DATA e
+  quedas de conexão).
+- ``FakeMailjet``: responde ``POST /v3.1/send`` como a API v3.1 (Status por
+  mensagem), também com latência e erros configuráveis.
+
+Os dois rodam em threads e podem subir sozinhos para testes manuais::
+
+    python -m bench.servidores smtp --porta 2525 --latencia 0.01 --erro 0.02
+    python -m bench.servidores mailjet --porta 8025
+"""
+import argparse
+import json
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _TratadorSMTP(socketserver.StreamRequestHandler):
+    # respostas em pipeline saem uma a uma; sem isso o Nagle + ACK atrasado somam ~40ms
+    disable_nagle_algorithm = True
+
+    def _responder(self, linha: str) -> None:
+        self.wfile.write(linha.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        srv: SumidouroSMTP = self.server.sumidouro
+        self._responder("220 sumidouro ESMTP")
+        aceitos = 0  # RCPT aceitos na transação corrente
+        while True:
+            linha = self.rfile.readline()
+            if not linha:
+                return
+            comando = linha.decode("utf-8", "replace").strip()
+            verbo = comando.split(" ", 1)[0].upper()
+            if verbo in {"EHLO", "HELO"}:
+                self.wfile.write(b"250-sumidouro\r\n250-PIPELINING\r\n250-8BITMIME\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif verbo == "AUTH":
+                partes = comando.split()
+                if len(partes) == 2 and partes[1].upper() == "LOGIN":
+                    # usuário e senha em duas linhas base64
+                    self._responder("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self._responder("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self._responder("235 2.7.0 Autenticado")
+            elif verbo == "MAIL":
+                aceitos = 0
+                self._responder("250 2.1.0 Ok")
+            elif verbo == "RCPT":
+                erro = srv.sortear_erro("rcpt")
+                aceitos += erro is None
+                self._responder(erro or "250 2.1.5 Ok")
+            elif verbo == "DATA":
+                if not aceitos:
+                    self._responder("503 5.5.1 Sem destinatarios")
+                    continue
+                self._responder("354 Fim com <CRLF>.<CRLF>")
+                tamanho = 0
+                while True:
+                    dados = self.rfile.readline()
+                    if not dados or dados == b".\r\n":
+                        break
+                    tamanho += len(dados)
+                if srv.latencia:
+                    time.sleep(srv.latencia)
+                if srv.sortear_queda():
+                    return
+                erro = srv.sortear_erro("data")
+                if erro is None:
+                    srv.contar(tamanho, aceitos)
+                aceitos = 0
+                self._responder(erro or "250 2.0.0 Ok: enfileirada")
+            elif verbo in {"RSET", "NOOP"}:
+                aceitos = 0 if verbo == "RSET" else aceitos
+                self._responder("250 2.0.0 Ok")
+            elif verbo == "QUIT":
+                self._responder("221 2.0.0 Tchau")
+                return
+            else:
+                self._responder("502 5.5.2 Comando nao suportado")
+
+
+class _ServidorTCP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SumidouroSMTP:
+    """Servidor SMTP que descarta tudo (sem TLS; use ``SMTP_STARTTLS=false``)."""
+
+    def __init__(self, porta: int = 0, *, latencia: float = 0.0, erro: float = 0.0,
+                 permanentes: float = 0.5, queda: float = 0.0, semente: int | None = None):
+        self.latencia = latencia
+        self.erro = erro  # fração de RCPT/DATA recusados
+        self.permanentes = permanentes  # fração dos erros que são 5xx (o resto é 4xx)
+        self.queda = queda  # fração de DATA seguidos de queda da conexão
+        self.mensagens = 0
+        self.destinatarios = 0  # RCPT das mensagens aceitas (> mensagens com vários RCPT)
+        self.bytes = 0
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self._servidor = _ServidorTCP(("127.0.0.1", porta), _TratadorSMTP)
+        self._servidor.sumidouro = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def porta(self) -> int:
+        return self._servidor.server_address[1]
+
+    def sortear_erro(self, fase: str) -> str | None:
+        with self._lock:
+            if not self.erro or self._aleatorio.random() >= self.erro / 2:
+                return None
+            permanente = self._aleatorio.random() < self.permanentes
+        if fase == "rcpt":
+            return "550 5.1.1 Usuario inexistente" if permanente else "450 4.2.1 Tente mais tarde"
+        return "554 5.7.1 Mensagem rejeitada" if permanente else "451 4.3.0 Erro temporario"
+
+    def sortear_queda(self) -> bool:
+        with self._lock:
+            return bool(self.queda) and self._aleatorio.random() < self.queda
+
+    def contar(self, tamanho: int, destinatarios: int = 1) -> None:
+        with self._lock:
+            self.mensagens += 1
+            self.destinatarios += destinatarios
+            self.bytes += tamanho
+
+    def iniciar(self) -> "SumidouroSMTP":
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name="sumidouro-smtp", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+class _TratadorMailjet(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como a API real
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        srv: FakeMailjet = self.server.fake
+        corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.rstrip("/") != "/v3.1/send":
+            return self._json(404, {"ErrorMessage": "Not found"})
+        try:
+            mensagens = json.loads(corpo).get("Messages") or []
+        except ValueError:
+            return self._json(400, {"ErrorMessage": "JSON inválido"})
+        if srv.latencia:
+            time.sleep(srv.latencia)
+        resultados = []
+        for msg in mensagens:
+            if srv.sortear_erro():
+                resultados.append({"Status": "error", "Errors": [{"ErrorMessage": "Falha simulada"}]})
+            else:
+                para = [{"Email": d.get("Email"), "MessageID": srv.proximo_id()} for d in msg.get("To", [])]
+                resultados.append({"Status": "success", "To": para})
+        srv.contar(len(mensagens))
+        status = 200 if all(r["Status"] == "success" for r in resultados) else 400
+        self._json(status, {"Messages": resultados})
+
+    def _json(self, status: int, dados: dict):
+        corpo = json.dumps(dados).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+class FakeMailjet:
+    """Imitação local do endpoint ``/v3.1/send`` (use ``MAILJET_API_URL=fake.url``)."""
+
+    def __init__(self, porta: int = 0, *, latencia: float = 0.0, erro: float = 0.0, semente: int | None = None):
+        self.latencia = latencia
+        self.erro = erro
+        self.chamadas = 0
+        self.mensagens = 0
+        self._id = 0
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", porta), _TratadorMailjet)
+        self._servidor.daemon_threads = True
+        self._servidor.fake = self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}/v3.1/send"
+
+    def sortear_erro(self) -> bool:
+        with self._lock:
+            return bool(self.erro) and self._aleatorio.random() < self.erro
+
+    def proximo_id(self) -> int:
+        with self._lock:
+            self._id += 1
+            return self._id
+
+    def contar(self, mensagens: int) -> None:
+        with self._lock:
+            self.chamadas += 1
+            self.mensagens += mensagens
+
+    def iniciar(self) -> "FakeMailjet":
+        threading.Thread(target=self._servidor.serve_forever, name="fake-mailjet", daemon=True).start()
+        return self
+
+    def parar(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidores locais para testes de envio")
+    parser.add_argument("tipo", choices=["smtp", "mailjet"])
+    parser.add_argument("--porta", type=int, default=0)
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos por mensagem (SMTP) ou chamada (Mailjet)")
+    parser.add_argument("--erro", type=float, default=0.0, help="fração de falhas injetadas (0 a 1)")
+    parser.add_argument("--queda", type=float, default=0.0, help="SMTP: fração de quedas de conexão após o DATA")
+    args = parser.parse_args()
+
+    if args.tipo == "smtp":
+        servidor = SumidouroSMTP(args.porta, latencia=args.latencia, erro=args.erro, queda=args.queda).iniciar()
+        print(f"Sumidouro SMTP em 127.0.0.1:{servidor.porta} (use SMTP_STARTTLS=false)")
+    else:
+        servidor = FakeMailjet(args.porta, latencia=args.latencia, erro=args.erro).iniciar()
+        print(f"Fake Mailjet em {servidor.url} (use MAILJET_API_URL={servidor.url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""Agendador de envios: ritmo (token bucket) e cotas.
+
+Em vez de dormir um intervalo fixo depois de cada envio (somando o tempo do
+próprio envio), o lote pede permissão ao agendador antes de cada mensagem:
+
+- ``BaldeTokens``: taxa sustentada (mensagens/segundo) com rajada limitada;
+  o tempo gasto no envio já conta para o intervalo.
+- ``CotaPersistente``: limite por hora e por 24h corridas, gravado em SQLite,
+  então sobrevive a reinícios e é compartilhado entre processos.
+- Sub-limites opcionais por domínio do destinatário: ritmo
+  (``DOMAIN_RATE_LIMITS``) e envios simultâneos (``DOMAIN_CONCURRENCY``).
+- ``RitmoCompartilhado``: os mesmos baldes em memória compartilhada, para
+  vários processos (``campanha``) respeitarem juntos o ritmo configurado.
+"""
+import multiprocessing
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from .config import DATA_DIR, DAILY_LIMIT, HOURLY_LIMIT, SEND_RATE_PER_MINUTE, DOMAIN_RATE_LIMITS, DOMAIN_CONCURRENCY
+
+
+class CotaEsgotada(Exception):
+    """A cota de 24h da conta acabou (ou, sem pausas, a de 1h); o lote deve parar."""
+
+
+class BaldeTokens:
+    """Token bucket thread-safe. ``reservar`` devolve quanto esperar pelo token."""
+
+    def __init__(self, taxa: float, capacidade: float = 1.0, *, jitter: float = 0.0):
+        self.taxa = taxa  # tokens por segundo
+        self.capacidade = max(1.0, capacidade)
+        self.jitter = jitter
+        self._tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self, quantidade: float = 1.0) -> float:
+        """Consome ``quantidade`` tokens (podendo ficar devendo) e retorna a espera em segundos."""
+        if self.jitter:
+            # variação de cadência para não parecer um robô de ritmo fixo
+            quantidade *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            self._tokens -= quantidade
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.taxa
+
+    def espera(self, quantidade: float = 1.0) -> float:
+        """Quanto ``reservar(quantidade)`` esperaria agora, sem consumir tokens."""
+        with self._lock:
+            tokens = min(self.capacidade, self._tokens + (time.monotonic() - self._ultimo) * self.taxa)
+        return max(0.0, (quantidade - tokens) / self.taxa)
+
+
+class BaldeCompartilhado(BaldeTokens):
+    """``BaldeTokens`` com o estado (tokens, último instante) em memória
+    compartilhada entre processos. Deve ser passado aos processos na criação
+    (argumento de ``Process``), não por filas."""
+
+    def __init__(self, taxa: float, capacidade: float = 1.0, *, jitter: float = 0.0, contexto=None):
+        self.taxa = taxa
+        self.capacidade = max(1.0, capacidade)
+        self.jitter = jitter
+        # time.monotonic é o mesmo relógio para todos os processos da máquina
+        self._estado = (contexto or multiprocessing).Array("d", [self.capacidade, time.monotonic()])
+        self._lock = self._estado.get_lock()
+
+    @property
+    def _tokens(self) -> float:
+        return self._estado[0]
+
+    @_tokens.setter
+    def _tokens(self, valor: float) -> None:
+        self._estado[0] = valor
+
+    @property
+    def _ultimo(self) -> float:
+        return self._estado[1]
+
+    @_ultimo.setter
+    def _ultimo(self, valor: float) -> None:
+        self._estado[1] = valor
+
+
+def _ritmo(intervalo: float, por_minuto: float | None, pausar: bool) -> tuple[float, float]:
+    """(mensagens por segundo, jitter) para o lote: ``por_minuto`` (padrão:
+    ``SEND_RATE_PER_MINUTE``) ou uma mensagem a cada ``intervalo`` segundos (±20%)."""
+    por_minuto = SEND_RATE_PER_MINUTE if por_minuto is None else por_minuto
+    if not pausar:
+        return 0.0, 0.0
+    if por_minuto > 0:
+        return por_minuto / 60, 0.0
+    if intervalo > 0:
+        return 1 / intervalo, 0.2
+    return 0.0, 0.0
+
+
+class RitmoCompartilhado:
+    """Ritmo global e por domínio (``DOMAIN_RATE_LIMITS``) em baldes
+    compartilhados: criado no processo principal e entregue a cada processo,
+    que monta o seu ``Agendador`` com ``compartilhado=``."""
+
+    def __init__(
+        self,
+        intervalo: float,
+        *,
+        por_minuto: float | None = None,
+        pausar: bool = True,
+        dominios: bool = True,
+        contexto=None,
+    ):
+        por_segundo, jitter = _ritmo(intervalo, por_minuto, pausar)
+        self.balde = BaldeCompartilhado(por_segundo, jitter=jitter, contexto=contexto) if por_segundo > 0 else None
+        limites = _parse_limites_dominio(DOMAIN_RATE_LIMITS) if pausar and dominios else {}
+        self.dominios = {d: BaldeCompartilhado(taxa, contexto=contexto) for d, taxa in limites.items() if taxa > 0}
+
+
+class CotaPersistente:
+    """Contagem de envios por conta em janelas corridas de 1h e 24h (SQLite)."""
+
+    def __init__(self, caminho: str | Path, conta: str, *, por_hora: int = 0, por_dia: int = 0):
+        self.caminho = str(caminho)
+        self.conta = conta or ""
+        self.por_hora = por_hora
+        self.por_dia = por_dia
+        self._lock = threading.Lock()
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS envios (conta TEXT NOT NULL, ts REAL NOT NULL)")
+            con.execute("CREATE INDEX IF NOT EXISTS envios_conta_ts ON envios (conta, ts)")
+
+    def _conectar(self) -> sqlite3.Connection:
+        # isolation_level=None: controlamos as transações com BEGIN IMMEDIATE
+        con = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    def reservar(self, quantidade: int = 1) -> tuple[int, float]:
+        """Registra até ``quantidade`` envios, quantos couberem nas cotas agora.
+
+        Retorna ``(reservados, espera)``: com ``reservados == 0``, ``espera`` são
+        os segundos até abrir vaga na janela de 1h. Um lote maior que a vaga
+        (ou que a cota horária inteira) é reservado em parte; quem chamou envia
+        essa parte e pede o resto depois. Levanta ``CotaEsgotada`` só se a cota
+        de 24h não tem mais nenhuma vaga.
+        """
+        agora = time.time()
+        with self._lock, self._conectar() as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                con.execute("DELETE FROM envios WHERE conta = ? AND ts < ?", (self.conta, agora - 86400))
+                if self.por_dia:
+                    (usados,) = con.execute(
+                        "SELECT COUNT(*) FROM envios WHERE conta = ?", (self.conta,)
+                    ).fetchone()
+                    if usados >= self.por_dia:
+                        raise CotaEsgotada(
+                            f"Cota de {self.por_dia} envios em 24h atingida para '{self.conta}'"
+                        )
+                    quantidade = min(quantidade, self.por_dia - usados)
+                if self.por_hora:
+                    linhas = con.execute(
+                        "SELECT ts FROM envios WHERE conta = ? AND ts >= ? ORDER BY ts",
+                        (self.conta, agora - 3600),
+                    ).fetchall()
+                    vagas = self.por_hora - len(linhas)
+                    if vagas <= 0:
+                        # espera até sair da janela o envio que libera a próxima vaga
+                        # (len(linhas) >= por_hora >= 1, então o índice existe)
+                        liberador = linhas[len(linhas) - self.por_hora][0]
+                        con.execute("ROLLBACK")
+                        return 0, max(0.1, liberador + 3600 - agora)
+                    quantidade = min(quantidade, vagas)
+                con.executemany(
+                    "INSERT INTO envios (conta, ts) VALUES (?, ?)",
+                    [(self.conta, agora)] * quantidade,
+                )
+                con.execute("COMMIT")
+            except BaseException:
+                if con.in_transaction:
+                    con.execute("ROLLBACK")
+                raise
+        return quantidade, 0.0
+
+    def usados(self) -> int:
+        with self._conectar() as con:
+            (n,) = con.execute(
+                "SELECT COUNT(*) FROM envios WHERE conta = ? AND ts >= ?", (self.conta, time.time() - 86400)
+            ).fetchone()
+        return n
+
+
+def _parse_limites_dominio(texto: str) -> dict[str, float]:
+    """``"gmail.com=20/min,outlook.com=300/h"`` -> {dominio: mensagens por segundo}."""
+    unidades = {"s": 1, "seg": 1, "min": 60, "m": 60, "h": 3600}
+    limites = {}
+    for item in (texto or "").split(","):
+        if "=" not in item:
+            continue
+        dominio, taxa = item.split("=", 1)
+        qtd, _, unidade = taxa.strip().partition("/")
+        try:
+            limites[dominio.strip().lower()] = float(qtd) / unidades.get(unidade.strip() or "min", 60)
+        except ValueError:
+            print(f"[Agendador] Limite por domínio inválido ignorado: {item!r}")
+    return limites
+
+
+def _parse_concorrencia_dominio(texto: str) -> dict[str, int]:
+    """``"gmail.com=2,outlook.com=4"`` -> {dominio: envios simultâneos}."""
+    limites = {}
+    for item in (texto or "").split(","):
+        if "=" not in item:
+            continue
+        dominio, qtd = item.split("=", 1)
+        try:
+            limites[dominio.strip().lower()] = int(qtd)
+        except ValueError:
+            print(f"[Agendador] Concorrência por domínio inválida ignorada: {item!r}")
+    return limites
+
+
+class Agendador:
+    """Decide quando cada envio pode acontecer (ritmo global, por domínio e cotas)."""
+
+    def __init__(
+        self,
+        *,
+        por_segundo: float = 0.0,
+        rajada: float = 1.0,
+        jitter: float = 0.0,
+        cota: CotaPersistente | None = None,
+        limites_dominio: dict[str, float] | None = None,
+        concorrencia_dominio: dict[str, int] | None = None,
+        compartilhado: RitmoCompartilhado | None = None,
+        pausar: bool = True,
+    ):
+        self.pausar = pausar  # False (serverless): a cota horária e o disjuntor interrompem em vez de esperar
+        if compartilhado is not None:
+            # baldes de outro processo: o ritmo vale para a soma dos processos
+            self._balde = compartilhado.balde
+            self._dominios = dict(compartilhado.dominios)
+        else:
+            self._balde = BaldeTokens(por_segundo, rajada, jitter=jitter) if por_segundo > 0 else None
+            self._dominios = {
+                dominio: BaldeTokens(taxa) for dominio, taxa in (limites_dominio or {}).items() if taxa > 0
+            }
+        self._cota = cota
+        self._limites_vagas = {d: qtd for d, qtd in (concorrencia_dominio or {}).items() if qtd > 0}
+        self._vagas = {dominio: threading.BoundedSemaphore(qtd) for dominio, qtd in self._limites_vagas.items()}
+        # envios em andamento por domínio limitado (para o planejador evitar filas)
+        self._ocupadas = dict.fromkeys(self._vagas, 0)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def para_lote(
+        cls,
+        intervalo: float,
+        conta: str,
+        *,
+        pausar: bool = True,
+        por_minuto: float | None = None,
+        por_hora: int | None = None,
+        por_dia: int | None = None,
+        dominios: bool = True,
+        compartilhado: RitmoCompartilhado | None = None,
+    ) -> "Agendador":
+        """Agendador padrão a partir do .env.
+
+        ``SEND_RATE_PER_MINUTE`` define o ritmo; se não estiver definido, vale
+        uma mensagem a cada ``intervalo`` segundos (±20%), contando o tempo de envio.
+        ``por_minuto``/``por_hora``/``por_dia`` substituem o ritmo e as cotas do
+        .env (contas do pool de remetentes); ``dominios=False`` deixa os
+        limites por domínio de fora (ver ``para_dominios``). Com ``compartilhado``
+        o ritmo vem dos baldes de um ``RitmoCompartilhado`` entre processos.
+        """
+        por_hora = HOURLY_LIMIT if por_hora is None else por_hora
+        por_dia = DAILY_LIMIT if por_dia is None else por_dia
+        por_segundo, jitter = _ritmo(intervalo, por_minuto, pausar)
+        cota = None
+        if por_dia > 0 or por_hora > 0:
+            try:
+                cota = CotaPersistente(
+                    Path(DATA_DIR) / "envios.sqlite3", conta, por_hora=por_hora, por_dia=por_dia
+                )
+            except (OSError, sqlite3.Error) as e:
+                print(f"[Agendador] Cota persistente indisponível ({e}); seguindo sem cota de 24h.")
+        return cls(
+            por_segundo=por_segundo,
+            jitter=jitter,
+            cota=cota,
+            limites_dominio=_parse_limites_dominio(DOMAIN_RATE_LIMITS) if pausar and dominios else None,
+            concorrencia_dominio=_parse_concorrencia_dominio(DOMAIN_CONCURRENCY) if dominios else None,
+            compartilhado=compartilhado,
+            pausar=pausar,
+        )
+
+    @classmethod
+    def para_dominios(cls, *, pausar: bool = True, compartilhado: RitmoCompartilhado | None = None) -> "Agendador":
+        """Só os limites por domínio do destinatário, sem ritmo nem cota de conta
+        (com um pool de remetentes, cada conta tem o seu agendador)."""
+        agendador = cls(
+            limites_dominio=_parse_limites_dominio(DOMAIN_RATE_LIMITS) if pausar else None,
+            concorrencia_dominio=_parse_concorrencia_dominio(DOMAIN_CONCURRENCY),
+            pausar=pausar,
+        )
+        if compartilhado is not None:
+            agendador._dominios = dict(compartilhado.dominios)
+        return agendador
+
+    @property
+    def dominios_limitados(self) -> set[str]:
+        """Domínios com limite de ritmo ou de envios simultâneos."""
+        return set(self._dominios) | set(self._vagas)
+
+    def espera_dominio(self, dominio: str) -> float:
+        """Segundos até o domínio aceitar mais um envio (0 = pronto), sem reservar nada.
+        Com todas as vagas simultâneas ocupadas, devolve um valor simbólico positivo."""
+        dominio = (dominio or "").lower()
+        balde = self._dominios.get(dominio)
+        espera = balde.espera() if balde is not None else 0.0
+        limite = self._limites_vagas.get(dominio)
+        if limite is not None and self._ocupadas[dominio] >= limite:
+            espera = max(espera, 0.05)
+        return espera
+
+    def vaga(self, dominio: str | None):
+        """Context manager que segura uma das vagas simultâneas do domínio (se limitado)."""
+        dominio = (dominio or "").lower()
+        if dominio not in self._vagas:
+            return nullcontext()
+        return self._ocupar(dominio)
+
+    @contextmanager
+    def _ocupar(self, dominio: str):
+        with self._vagas[dominio]:
+            with self._lock:
+                self._ocupadas[dominio] += 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._ocupadas[dominio] -= 1
+
+    def aguardar(self, dominio: str | None = None, quantidade: int = 1) -> int:
+        """Bloqueia até o envio ser permitido. Levanta ``CotaEsgotada`` se a cota
+        diária acabou ou, sem ``pausar``, se a horária exigiria esperar.
+
+        Retorna quantos dos ``quantidade`` envios foram liberados (pelo menos 1):
+        um lote maior que a vaga das cotas sai em partes (ver ``CotaPersistente.reservar``).
+        """
+        if self._cota is not None:
+            while True:
+                reservados, espera = self._cota.reservar(quantidade)
+                if reservados:
+                    quantidade = reservados
+                    break
+                if not self.pausar:
+                    raise CotaEsgotada(f"Cota de {self._cota.por_hora} envios por hora atingida; nova vaga em {espera:.0f}s")
+                print(f"[Agendador] Cota horária atingida; aguardando {espera:.0f}s...")
+                time.sleep(espera)
+        espera = self._balde.reservar(quantidade) if self._balde else 0.0
+        balde_dominio = self._dominios.get((dominio or "").lower())
+        if balde_dominio is not None:
+            espera = max(espera, balde_dominio.reservar(quantidade))
+        if espera > 0:
+            time.sleep(espera)
+        return quantidade
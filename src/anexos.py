@@ -0,0 +1,124 @@
+"""Cache de anexos já codificados.
+
+Ler e codificar em base64 um PDF de alguns MB para cada destinatário é puro
+desperdício: o conteúdo é o mesmo em todo o lote. O cache guarda, por arquivo
+(caminho + mtime + tamanho), o base64 usado pela API do Mailjet e o base64 em
+linhas de 76 colunas usado na parte MIME do SMTP, com despejo LRU quando o
+total passa de ``ANEXO_CACHE_MB``.
+"""
+import base64
+import mimetypes
+import threading
+from collections import OrderedDict
+from email import encoders
+from email.mime.application import MIMEApplication
+from pathlib import Path
+
+from .config import ANEXO_CACHE_MB
+
+
+class Anexo:
+    """Conteúdo de um anexo, codificado sob demanda e memorizado."""
+
+    __slots__ = ("nome", "ctype", "_dados", "_b64", "_b64_mime", "_lock")
+
+    def __init__(self, nome: str, ctype: str, dados: bytes):
+        self.nome = nome
+        self.ctype = ctype
+        self._dados = dados
+        self._b64: str | None = None
+        self._b64_mime: str | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def tamanho(self) -> int:
+        """Bytes ocupados em memória (conteúdo bruto + codificações já feitas)."""
+        return len(self._dados) + len(self._b64 or "") + len(self._b64_mime or "")
+
+    @property
+    def base64(self) -> str:
+        """Base64 contínuo (formato ``Base64Content`` da API do Mailjet)."""
+        if self._b64 is None:
+            with self._lock:
+                if self._b64 is None:
+                    self._b64 = base64.b64encode(self._dados).decode("ascii")
+        return self._b64
+
+    def parte_mime(self) -> MIMEApplication:
+        """Nova parte MIME com o base64 já pronto (sem recodificar o arquivo)."""
+        if self._b64_mime is None:
+            with self._lock:
+                if self._b64_mime is None:
+                    self._b64_mime = base64.encodebytes(self._dados).decode("ascii")
+        subtype = self.ctype.split("/", 1)[1]
+        part = MIMEApplication(b"", _subtype=subtype, _encoder=encoders.encode_noop)
+        part.set_payload(self._b64_mime)
+        part["Content-Transfer-Encoding"] = "base64"
+        part.add_header("Content-Disposition", "attachment", filename=self.nome)
+        return part
+
+
+class CacheAnexos:
+    """Cache LRU de ``Anexo`` limitado em bytes, compartilhado entre lotes e requisições."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._itens: OrderedDict[tuple, Anexo] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, path: str | Path) -> Anexo | None:
+        """Retorna o anexo do arquivo (do cache se não mudou) ou None se não existir."""
+        p = Path(path)
+        try:
+            st = p.stat()
+        except OSError:
+            st = None
+        if st is None or not p.is_file():
+            print(f"Anexo não encontrado, ignorado: {p}")
+            return None
+        chave = (str(p.resolve()), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            anexo = self._itens.get(chave)
+            if anexo is not None:
+                self._itens.move_to_end(chave)
+                return anexo
+
+        ctype, encoding = mimetypes.guess_type(str(p))
+        if ctype is None or encoding is not None:
+            ctype = 'application/octet-stream'
+        with open(p, 'rb') as f:
+            anexo = Anexo(p.name, ctype, f.read())
+
+        with self._lock:
+            # Versões antigas do mesmo arquivo não serão mais usadas
+            for antiga in [k for k in self._itens if k[0] == chave[0]]:
+                del self._itens[antiga]
+            self._itens[chave] = anexo
+        return anexo
+
+    def obter_varios(self, anexos: list[str | Path] | None) -> list[Anexo]:
+        resultado = []
+        for path in anexos or []:
+            if not path:
+                continue
+            anexo = self.obter(path)
+            if anexo is not None:
+                resultado.append(anexo)
+        self._despejar()
+        return resultado
+
+    def _despejar(self) -> None:
+        """Remove os menos usados até caber no limite (as codificações crescem sob demanda)."""
+        with self._lock:
+            total = sum(a.tamanho for a in self._itens.values())
+            while self._itens and total > self.max_bytes:
+                _, anexo = self._itens.popitem(last=False)
+                total -= anexo.tamanho
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+
+# Cache compartilhado pelo processo
+cache = CacheAnexos(ANEXO_CACHE_MB * 1024 * 1024)
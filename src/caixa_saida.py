@@ -0,0 +1,302 @@
+"""Caixa de saída em disco: a campanha é renderizada antes de ser enviada.
+
+No envio direto cada ``enviar_email`` monta a mensagem e espera o SMTP; rede
+lenta atrasa a montagem e um crash perde o que estava em voo. Em modo caixa
+de saída são duas etapas independentes:
+
+1. ``enviar_em_lote(..., caixa=CaixaSaida(...))`` valida, renderiza e grava
+   cada mensagem como um ``.eml`` pronto (nada é enviado);
+2. ``enviar_caixa(caixa)`` (em ``email_sender``) descarrega a caixa pelas
+   sessões do pool SMTP, com o mesmo agendador/retentativas do envio direto,
+   e move cada arquivo para ``enviados/`` ou ``falhas/``.
+
+Layout (à moda do Maildir, com ``os.replace`` atômico entre pastas)::
+
+    <caixa>/tmp/       mensagem sendo gravada
+    <caixa>/new/       pronta para envio
+    <caixa>/cur/       reivindicada pelo descarregador (volta para new/ se ele parar)
+    <caixa>/enviados/  aceita pelo servidor
+    <caixa>/falhas/    recusada ou sem sucesso depois das retentativas
+    <caixa>/caixa.json campanha, planilha e assunto da renderização
+
+Cada arquivo começa com os headers de envelope ``X-Outbox-From``,
+``X-Outbox-To`` e ``X-Outbox-Index``, retirados antes da transmissão; o
+restante é a mensagem exatamente como vai para o servidor. Só um
+descarregador por caixa de cada vez.
+
+A renderização também serve de ensaio (dry-run)::
+
+    python -m src.caixa_saida renderizar data/contatos.xlsx --texto mensagem.txt
+    python -m src.caixa_saida enviar data/outbox/<campanha> -w 4
+    python -m src.caixa_saida status data/outbox/<campanha>
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+
+from .config import DATA_DIR, SEND_INTERVAL, SEND_WORKERS, SUBJECT
+
+
+_TMP = "tmp"
+PENDENTES = "new"
+EM_ENVIO = "cur"
+ENVIADOS = "enviados"
+FALHAS = "falhas"
+_PASTAS = (_TMP, PENDENTES, EM_ENVIO, ENVIADOS, FALHAS)
+_ENVELOPE = b"X-Outbox-"
+_META = "caixa.json"
+
+
+def _slug(texto: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", texto).strip("-.")[:80] or "campanha"
+
+
+class CaixaSaida:
+    """Mensagens renderizadas de uma campanha, uma por arquivo."""
+
+    def __init__(self, caminho: str | Path):
+        self.caminho = Path(caminho)
+        for pasta in _PASTAS:
+            (self.caminho / pasta).mkdir(parents=True, exist_ok=True)
+        # prefixo por instância + sequência: nomes únicos e ordenados pela gravação
+        self._prefixo = f"{time.time_ns():020d}"
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def para_campanha(cls, campanha: str) -> "CaixaSaida":
+        """Caixa padrão da campanha: ``DATA_DIR/outbox/<campanha>``."""
+        return cls(Path(DATA_DIR) / "outbox" / _slug(campanha))
+
+    # --- metadados -----------------------------------------------------------
+
+    @property
+    def meta(self) -> dict:
+        try:
+            return json.loads((self.caminho / _META).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def anotar(self, **campos) -> None:
+        """Grava campos em ``caixa.json`` (mantendo os que já existem)."""
+        meta = self.meta
+        meta.update(campos)
+        tmp = self.caminho / _TMP / _META
+        tmp.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.caminho / _META)
+
+    # --- gravação -----------------------------------------------------------
+
+    def gravar(self, indice, remetente: str, destino: str, dados: bytes) -> Path:
+        """Grava uma mensagem pronta em ``new/`` (via ``tmp/``, sem fsync por arquivo)."""
+        with self._lock:
+            self._seq += 1
+            nome = f"{self._prefixo}.{self._seq:09d}.{os.getpid()}.eml"
+        envelope = (
+            f"X-Outbox-From: {remetente}\r\n"
+            f"X-Outbox-To: {destino}\r\n"
+            f"X-Outbox-Index: {json.dumps(indice, default=str)}\r\n"
+        ).encode("utf-8")
+        tmp = self.caminho / _TMP / nome
+        with open(tmp, "wb") as f:
+            f.write(envelope + dados)
+        final = self.caminho / PENDENTES / nome
+        os.replace(tmp, final)
+        return final
+
+    def sincronizar(self) -> None:
+        """Descarrega para o disco o que foi gravado (um sync ao fim do lote)."""
+        if hasattr(os, "sync"):
+            os.sync()
+
+    # --- descarga -----------------------------------------------------------
+
+    def _arquivos(self, pasta: str) -> list[str]:
+        return sorted(n for n in os.listdir(self.caminho / pasta) if n.endswith(".eml"))
+
+    def reivindicar(self):
+        """Move cada mensagem pendente para ``cur/``, na ordem de gravação, e a devolve."""
+        for nome in self._arquivos(PENDENTES):
+            destino = self.caminho / EM_ENVIO / nome
+            try:
+                os.replace(self.caminho / PENDENTES / nome, destino)
+            except FileNotFoundError:
+                continue
+            yield destino
+
+    @staticmethod
+    def ler(arquivo: str | Path) -> tuple[object, str, str, bytes]:
+        """(índice, remetente, destino, dados) de uma mensagem da caixa."""
+        conteudo = Path(arquivo).read_bytes()
+        envelope = {}
+        while conteudo.startswith(_ENVELOPE):
+            linha, _, conteudo = conteudo.partition(b"\r\n")
+            chave, _, valor = linha[len(_ENVELOPE):].decode("utf-8").partition(":")
+            envelope[chave.strip().lower()] = valor.strip()
+        try:
+            indice = json.loads(envelope.get("index", "null"))
+        except ValueError:
+            indice = envelope.get("index")
+        return indice, envelope.get("from", ""), envelope.get("to", ""), conteudo
+
+    def concluir(self, arquivo: str | Path, sucesso: bool) -> None:
+        arquivo = Path(arquivo)
+        os.replace(arquivo, self.caminho / (ENVIADOS if sucesso else FALHAS) / arquivo.name)
+
+    def recuperar(self) -> int:
+        """Devolve para ``new/`` o que ficou em ``cur/`` (descarga interrompida)."""
+        nomes = self._arquivos(EM_ENVIO)
+        for nome in nomes:
+            os.replace(self.caminho / EM_ENVIO / nome, self.caminho / PENDENTES / nome)
+        return len(nomes)
+
+    def refazer_falhas(self) -> int:
+        """Devolve as falhas para ``new/`` (nova tentativa de envio)."""
+        nomes = self._arquivos(FALHAS)
+        for nome in nomes:
+            os.replace(self.caminho / FALHAS / nome, self.caminho / PENDENTES / nome)
+        return len(nomes)
+
+    def contagem(self) -> dict[str, int]:
+        return {pasta: len(self._arquivos(pasta)) for pasta in (PENDENTES, EM_ENVIO, ENVIADOS, FALHAS)}
+
+    def tamanho(self, pasta: str = PENDENTES) -> int:
+        """Bytes ocupados pelas mensagens de ``pasta``."""
+        with os.scandir(self.caminho / pasta) as entradas:
+            return sum(e.stat().st_size for e in entradas if e.name.endswith(".eml"))
+
+
+# --- linha de comando ---------------------------------------------------------
+
+def _renderizar(args) -> int:
+    from .email_sender import enviar_em_lote
+    from .excel_reader import contatos_para_envio, ler_contatos
+    from . import validacao
+
+    texto = Path(args.texto).read_text(encoding="utf-8")
+    html = Path(args.html).read_text(encoding="utf-8") if args.html else None
+    campanha = args.campanha or args.assunto
+    caixa = CaixaSaida(args.caixa) if args.caixa else CaixaSaida.para_campanha(campanha)
+    try:
+        planilha = ler_contatos(args.planilha)
+    except FileNotFoundError as e:
+        print(e)
+        return 1
+    pendentes = contatos_para_envio(planilha)
+    if args.limite is not None:
+        pendentes = islice(pendentes, args.limite)
+    # domínios resolvidos antes, em paralelo (o lote usa o cache); só até o limite
+    validacao.padrao().preverificar(
+        c.get("E-mail") for _i, c in islice(contatos_para_envio(planilha), args.limite)
+    )
+    caixa.anotar(campanha=campanha, assunto=args.assunto, planilha=str(Path(args.planilha).resolve()))
+
+    inicio = time.monotonic()
+    gravadas = puladas = 0
+    for _i, sucesso, _destino in enviar_em_lote(
+        pendentes,
+        args.assunto,
+        texto,
+        intervalo=0,
+        anexos=args.anexo or None,
+        html_template=html,
+        indexados=True,
+        campanha=campanha,
+        caixa=caixa,
+    ):
+        if sucesso:
+            gravadas += 1
+        else:
+            puladas += 1
+    segundos = time.monotonic() - inicio
+    tamanho = caixa.tamanho()
+    por_segundo = gravadas / segundos if segundos else 0.0
+    media = tamanho / gravadas if gravadas else 0
+    print(
+        f"[caixa] {gravadas} mensagens renderizadas ({puladas} puladas) em {segundos:.1f}s "
+        f"({por_segundo:.0f} msg/s); {tamanho / 1e6:.1f} MB, média {media / 1024:.1f} KB -> {caixa.caminho}"
+    )
+    return 0
+
+
+def _enviar(args) -> int:
+    from .email_sender import enviar_caixa
+
+    caixa = CaixaSaida(args.caixa)
+    if args.refazer_falhas:
+        print(f"[caixa] {caixa.refazer_falhas()} falhas devolvidas para envio")
+    meta = caixa.meta
+    planilha = atualizar = None
+    if meta.get("planilha") and Path(meta["planilha"]).exists() and not args.sem_status:
+        from .excel_reader import atualizar_status, compactar_status, ler_contatos
+
+        planilha = ler_contatos(meta["planilha"])
+        atualizar = atualizar_status
+
+    inicio = time.monotonic()
+    enviados = falhas = 0
+    try:
+        for i, sucesso, _destino in enviar_caixa(caixa, workers=args.workers, intervalo=args.intervalo):
+            if sucesso:
+                enviados += 1
+            else:
+                falhas += 1
+            if planilha is not None and i is not None:
+                atualizar(planilha, i, "Contatado" if sucesso else "Erro", meta["planilha"])
+    except KeyboardInterrupt:
+        print("Interrompido; o que não foi enviado continua na caixa.")
+    finally:
+        if planilha is not None:
+            compactar_status(planilha, meta["planilha"])
+    segundos = time.monotonic() - inicio
+    print(f"[caixa] {enviados} enviados, {falhas} com erro em {segundos:.1f}s; restantes: {caixa.contagem()[PENDENTES]}")
+    return 0
+
+
+def _status(args) -> int:
+    caixa = CaixaSaida(args.caixa)
+    contagem = caixa.contagem()
+    print(f"{caixa.caminho}: " + ", ".join(f"{pasta}={n}" for pasta, n in contagem.items()))
+    print(f"pendentes: {caixa.tamanho() / 1e6:.1f} MB")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Caixa de saída em disco: renderiza e depois envia a campanha")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    r = sub.add_parser("renderizar", help="renderiza a planilha para a caixa (não envia nada)")
+    r.add_argument("planilha")
+    r.add_argument("--assunto", default=SUBJECT)
+    r.add_argument("--campanha", help="nome da campanha (padrão: o assunto)")
+    r.add_argument("--texto", required=True, help="arquivo com o template de texto ({nome}, {empresa}...)")
+    r.add_argument("--html", help="arquivo com o template HTML (opcional)")
+    r.add_argument("--anexo", action="append", default=[], help="arquivo anexo (pode repetir)")
+    r.add_argument("--caixa", help="pasta da caixa (padrão: DATA_DIR/outbox/<campanha>)")
+    r.add_argument("--limite", type=int, help="máximo de contatos")
+    r.set_defaults(func=_renderizar)
+
+    e = sub.add_parser("enviar", help="descarrega a caixa pelo SMTP")
+    e.add_argument("caixa")
+    e.add_argument("-w", "--workers", type=int, default=SEND_WORKERS)
+    e.add_argument("--intervalo", type=float, default=SEND_INTERVAL, help="segundos entre envios")
+    e.add_argument("--refazer-falhas", action="store_true", help="tenta de novo as mensagens em falhas/")
+    e.add_argument("--sem-status", action="store_true", help="não atualiza o Status da planilha de origem")
+    e.set_defaults(func=_enviar)
+
+    s = sub.add_parser("status", help="mensagens em cada pasta da caixa")
+    s.add_argument("caixa")
+    s.set_defaults(func=_status)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""Campanha offline em vários processos (CLI).
+
+Para listas grandes, um processo só não dá conta de montar MIME e fazer TLS
+no ritmo que as cotas permitem. Aqui o processo principal lê a planilha
+(``ler_contatos``), distribui os contatos em blocos para ``--processos``
+processos de envio (cada um com as suas conexões e ``--workers`` threads
+rodando ``enviar_em_lote``) e junta os resultados num único fluxo:
+
+- ritmo global e por domínio: ``RitmoCompartilhado`` (memória compartilhada),
+  então a soma dos processos respeita ``SEND_RATE_PER_MINUTE``/``SEND_INTERVAL``
+  e ``DOMAIN_RATE_LIMITS``; as cotas de hora/24h já são compartilhadas pelo
+  SQLite (``CotaPersistente``). Com ``SENDER_POOL``, cada conta também tem o
+  seu ritmo compartilhado;
+- status: só o processo principal grava, via ``atualizar_status`` (journal +
+  compactação), sem disputa pela planilha;
+- e-mails repetidos ou inválidos na planilha são descartados antes da
+  distribuição (cada processo só enxerga o seu pedaço da lista); com
+  ``VALIDATE_MX`` os domínios da lista inteira são resolvidos antes, em
+  paralelo, no processo principal.
+
+Uso::
+
+    python -m src.campanha data/contatos.xlsx --texto mensagem.txt --processos 4 --workers 2
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+
+from .config import EMAIL, SMTP_USER, USE_MAILJET_API, SEND_INTERVAL, SEND_WORKERS, SUBJECT
+
+
+# Contatos por mensagem na fila de trabalho (menos overhead de IPC que um a um)
+TAMANHO_BLOCO = 50
+_FIM = None
+
+
+def _contatos_da_fila(trabalho):
+    """Pares (índice, contato) dos blocos da fila até o sinal de fim."""
+    while True:
+        bloco = trabalho.get()
+        if bloco is _FIM:
+            return
+        yield from bloco
+
+
+def _processo_envio(trabalho, resultados, opcoes: dict, ritmo, ritmos_contas: dict, contas):
+    """Corpo de cada processo de envio: ``enviar_em_lote`` sobre a fila de trabalho."""
+    from .agendador import Agendador
+    from .email_sender import enviar_em_lote
+    from . import remetentes as _remetentes
+    from .validacao import Validador
+
+    try:
+        remetentes = False
+        if contas:
+            for conta in contas:
+                conta.agendador = Agendador.para_lote(
+                    opcoes["intervalo"],
+                    conta.chave_cota,
+                    por_minuto=conta.por_minuto,
+                    por_hora=conta.por_hora,
+                    por_dia=conta.por_dia,
+                    dominios=False,
+                    compartilhado=ritmos_contas[conta.nome],
+                )
+            remetentes = _remetentes.PoolRemetentes(contas, intervalo=opcoes["intervalo"])
+            agendador = Agendador.para_dominios(compartilhado=ritmo)
+        else:
+            # mesma chave de cota do envio com uma conta só (ver enviar_em_lote)
+            conta = f"mailjet:{EMAIL}" if USE_MAILJET_API else (SMTP_USER or EMAIL)
+            agendador = Agendador.para_lote(opcoes["intervalo"], conta, compartilhado=ritmo)
+
+        lote = enviar_em_lote(
+            _contatos_da_fila(trabalho),
+            opcoes["assunto"],
+            opcoes["texto"],
+            intervalo=opcoes["intervalo"],
+            anexos=opcoes["anexos"],
+            html_template=opcoes["html"],
+            workers=opcoes["workers"],
+            agendador=agendador,
+            indexados=True,
+            remetentes=remetentes,
+            # domínios já verificados pelo processo principal (ver executar)
+            validador=Validador(verificar_dominio=False),
+        )
+        for i, sucesso, destino in lote:
+            resultados.put((i, sucesso, destino))
+    finally:
+        resultados.put(_FIM)
+
+
+def executar(
+    caminho: str | Path,
+    assunto: str,
+    texto: str,
+    *,
+    html: str | None = None,
+    anexos: list[str] | None = None,
+    processos: int | None = None,
+    workers: int = 1,
+    intervalo: float = SEND_INTERVAL,
+    limite: int | None = None,
+):
+    """Envia a campanha da planilha em ``processos`` processos e grava o status.
+
+    Yields: (index, sucesso, destino_email), na ordem de conclusão.
+    """
+    from .agendador import RitmoCompartilhado
+    from .excel_reader import atualizar_status, compactar_status, contatos_para_envio, ler_contatos
+    from . import remetentes as _remetentes
+    from . import validacao
+    from .supressao import normalizar_email
+
+    processos = max(1, processos or os.cpu_count() or 1)
+    planilha = ler_contatos(caminho)
+
+    def pendentes():
+        linhas = contatos_para_envio(planilha)
+        return islice(linhas, limite) if limite is not None else linhas
+
+    # lista inteira validada aqui, com os domínios resolvidos em paralelo uma
+    # vez só (o cache não é compartilhado com os processos de envio)
+    validador = validacao.padrao()
+    validador.preverificar(contato.get("E-mail") for _i, contato in pendentes())
+
+    # spawn: processos limpos (sem threads/conexões herdadas) em qualquer SO
+    contexto = multiprocessing.get_context("spawn")
+    contas = _remetentes.carregar()
+    ritmo = RitmoCompartilhado(intervalo, dominios=True, contexto=contexto)
+    ritmos_contas = {
+        c.nome: RitmoCompartilhado(intervalo, por_minuto=c.por_minuto, dominios=False, contexto=contexto)
+        for c in contas
+    }
+    opcoes = {
+        "assunto": assunto,
+        "texto": texto,
+        "html": html,
+        "anexos": anexos,
+        "workers": workers,
+        "intervalo": intervalo,
+    }
+    trabalho = contexto.Queue(maxsize=processos * 4)
+    resultados = contexto.Queue()
+    filhos = [
+        contexto.Process(
+            target=_processo_envio,
+            args=(trabalho, resultados, opcoes, ritmo, ritmos_contas, contas),
+            name=f"campanha-{n}",
+            daemon=True,
+        )
+        for n in range(processos)
+    ]
+    for filho in filhos:
+        filho.start()
+
+    parar = threading.Event()
+    pulados_fila = []
+    lock_pulados = threading.Lock()
+
+    def distribuir():
+        """Alimenta a fila em blocos (com contrapressão) e manda um fim por processo."""
+        vistos = set()
+        bloco = []
+
+        def entregar(item) -> bool:
+            while not parar.is_set():
+                try:
+                    trabalho.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        for i, contato in pendentes():
+            email, motivo = validador.validar(contato.get("E-mail", ""))
+            chave = normalizar_email(email)
+            if motivo or chave in vistos:
+                aviso = f"e-mail inválido: {motivo}" if motivo else "repetido na planilha"
+                with lock_pulados:
+                    pulados_fila.append((i, email, aviso))
+                continue
+            vistos.add(chave)
+            bloco.append((i, contato))
+            if len(bloco) >= TAMANHO_BLOCO:
+                if not entregar(bloco):
+                    return
+                bloco = []
+        if bloco and not entregar(bloco):
+            return
+        for _ in filhos:
+            if not entregar(_FIM):
+                return
+
+    distribuidor = threading.Thread(target=distribuir, name="campanha-distribuidor", daemon=True)
+    distribuidor.start()
+
+    ativos = len(filhos)
+    try:
+        while ativos:
+            with lock_pulados:
+                pulados, pulados_fila[:] = list(pulados_fila), []
+            for i, destino, aviso in pulados:
+                print(f"Pulado ({aviso}): {destino}")
+                atualizar_status(planilha, i, "Erro", caminho)
+                yield i, False, destino
+            try:
+                item = resultados.get(timeout=0.5)
+            except queue.Empty:
+                if not any(f.is_alive() for f in filhos):
+                    break  # processo morto sem avisar (ex.: kill)
+                continue
+            if item is _FIM:
+                ativos -= 1
+                continue
+            i, sucesso, destino = item
+            atualizar_status(planilha, i, "Contatado" if sucesso else "Erro", caminho)
+            yield i, sucesso, destino
+    finally:
+        # Encerrado cedo (cota esgotada em todos, Ctrl+C, consumidor parou): sem novos envios
+        parar.set()
+        trabalho.cancel_join_thread()  # blocos que ninguém vai ler não seguram a saída
+        for filho in filhos:
+            filho.join(timeout=5)
+            if filho.is_alive():
+                filho.terminate()
+        distribuidor.join(timeout=1)
+        compactar_status(planilha, caminho)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Envia a campanha da planilha em vários processos")
+    parser.add_argument("planilha", nargs="?", default=str(Path(__file__).resolve().parents[1] / "data" / "contatos.xlsx"))
+    parser.add_argument("--assunto", default=SUBJECT)
+    parser.add_argument("--texto", required=True, help="arquivo com o template de texto ({nome}, {empresa}...)")
+    parser.add_argument("--html", help="arquivo com o template HTML (opcional)")
+    parser.add_argument("--anexo", action="append", default=[], help="arquivo anexo (pode repetir)")
+    parser.add_argument("-p", "--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-w", "--workers", type=int, default=SEND_WORKERS, help="envios paralelos por processo")
+    parser.add_argument("--intervalo", type=float, default=SEND_INTERVAL, help="segundos entre envios (somando os processos)")
+    parser.add_argument("--limite", type=int, help="máximo de contatos nesta execução")
+    args = parser.parse_args(argv)
+
+    texto = Path(args.texto).read_text(encoding="utf-8")
+    html = Path(args.html).read_text(encoding="utf-8") if args.html else None
+    inicio = time.monotonic()
+    enviados = falhas = 0
+    try:
+        for _i, sucesso, _destino in executar(
+            args.planilha,
+            args.assunto,
+            texto,
+            html=html,
+            anexos=args.anexo or None,
+            processos=args.processos,
+            workers=args.workers,
+            intervalo=args.intervalo,
+            limite=args.limite,
+        ):
+            if sucesso:
+                enviados += 1
+            else:
+                falhas += 1
+    except FileNotFoundError as e:
+        print(e)
+        return 1
+    except KeyboardInterrupt:
+        print("Interrompido; os status já gravados foram mantidos.")
+    segundos = time.monotonic() - inicio
+    print(f"[campanha] {enviados} enviados, {falhas} com erro/pulados em {segundos:.1f}s ({args.processos} processos)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,13 @@
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Carrega variáveis do arquivo .env na raiz do pacote email_sender/
+# Carrega variáveis do arquivo .env na raiz do pacote email_sender/ (se existir:
+# na Vercel as variáveis vêm do ambiente e o dotenv nem é importado)
 _ROOT = Path(__file__).resolve().parents[1]
-load_dotenv(_ROOT / ".env")
+if (_ROOT / ".env").is_file():
+    from dotenv import load_dotenv
+
+    load_dotenv(_ROOT / ".env")
 
 EMAIL = os.getenv("EMAIL")
 SMTP_USER = os.getenv("SMTP_USER")  # login SMTP (pode ser diferente do EMAIL/From)
@@ -12,14 +15,46 @@ SENHA = os.getenv("SENHA_APP")  # Senha/Secret (ex.: Mailjet Secret Key)
 # Padrões focados em Mailjet
 SMTP_SERVER = os.getenv("SMTP_SERVER", "in-v3.mailjet.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in {"1", "true", "yes"}  # false só para servidores locais/de teste sem TLS
 FROM_NAME = os.getenv("FROM_NAME", "")
 REPLY_TO = os.getenv("REPLY_TO", EMAIL or "")
 SEND_INTERVAL = int(os.getenv("SEND_INTERVAL", "15"))
+SEND_WORKERS = int(os.getenv("SEND_WORKERS", "1"))  # envios paralelos por lote (1 = sequencial)
+SEND_RETRIES = int(os.getenv("SEND_RETRIES", "3"))  # tentativas por destinatário em falhas transitórias (4xx, conexão, HTTP 429/5xx)
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "2"))  # segundos antes da 2ª tentativa (dobra a cada uma, com jitter)
+RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "60"))
+CIRCUIT_THRESHOLD = int(os.getenv("CIRCUIT_THRESHOLD", "3"))  # sinais de limitação do provedor que pausam o lote (0 desativa)
+CIRCUIT_WINDOW = float(os.getenv("CIRCUIT_WINDOW", "60"))  # janela, em segundos, para contar esses sinais
+CIRCUIT_PAUSE = float(os.getenv("CIRCUIT_PAUSE", "60"))  # pausa inicial do lote, em segundos (dobra se o bloqueio continuar)
+SMTP_MAX_RECIPIENTS = int(os.getenv("SMTP_MAX_RECIPIENTS", "1"))  # destinatários por transação SMTP quando texto/HTML não são personalizados (1 = uma mensagem por contato)
+SMTP_POOL_IDLE = int(os.getenv("SMTP_POOL_IDLE", "60"))  # segundos que uma sessão SMTP ociosa fica aberta para reuso (0 = não reutiliza)
 LIST_UNSUBSCRIBE = os.getenv("LIST_UNSUBSCRIBE", "")  # ex.: <mailto:seuemail+unsubscribe@dominio.com>
+LIST_UNSUBSCRIBE_URL = os.getenv("LIST_UNSUBSCRIBE_URL", "")  # ex.: https://seu-app/api/unsubscribe (descadastro em um clique, por destinatário)
+UNSUBSCRIBE_SECRET = os.getenv("UNSUBSCRIBE_SECRET", "")  # chave HMAC dos links de descadastro (vazio = gerada e guardada em DATA_DIR)
 TEXT_ONLY = os.getenv("TEXT_ONLY", "false").lower() in {"1", "true", "yes"}
 SUBJECT = os.getenv("SUBJECT", "Candidato a Estágio em TI – Lucas Andrade")
 ATTACH_CV = os.getenv("ATTACH_CV", "true").lower() in {"1", "true", "yes"}
-DAILY_LIMIT = int(os.getenv("DAILY_LIMIT", "100"))
+ANEXO_CACHE_MB = int(os.getenv("ANEXO_CACHE_MB", "64"))  # memória máxima do cache de anexos codificados
+SENDER_POOL = os.getenv("SENDER_POOL", "")  # várias contas remetentes: JSON (lista) ou caminho de um arquivo .json
+SENDER_MAX_FAILURES = int(os.getenv("SENDER_MAX_FAILURES", "5"))  # falhas seguidas que tiram uma conta do pool por CIRCUIT_PAUSE s
+DAILY_LIMIT = int(os.getenv("DAILY_LIMIT", "100"))  # cota por conta em 24h corridas (0 = sem cota)
+SEND_LIMIT = int(os.getenv("SEND_LIMIT", "100"))  # contatos por chamada de /api/send se o formulário não informar (0 = sem limite além do teto de 100)
+HOURLY_LIMIT = int(os.getenv("HOURLY_LIMIT", "0"))  # cota por conta em 1h corrida (0 = sem cota)
+SEND_RATE_PER_MINUTE = float(os.getenv("SEND_RATE_PER_MINUTE", "0"))  # ritmo máximo; 0 = usa SEND_INTERVAL
+DOMAIN_RATE_LIMITS = os.getenv("DOMAIN_RATE_LIMITS", "")  # ex.: gmail.com=20/min,outlook.com=300/h
+DOMAIN_CONCURRENCY = os.getenv("DOMAIN_CONCURRENCY", "")  # envios simultâneos por domínio, ex.: gmail.com=2,outlook.com=4
+GROUP_BY_DOMAIN = os.getenv("GROUP_BY_DOMAIN", "false").lower() in {"1", "true", "yes"}  # intercala os domínios e evita esperar por domínio limitado
+GROUP_BY_DOMAIN_WINDOW = int(os.getenv("GROUP_BY_DOMAIN_WINDOW", "5000"))  # contatos lidos por vez para intercalar uma lista em streaming (0 = a lista inteira)
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "20"))  # tamanho máximo da requisição de upload (413 acima disso; 0 = sem limite)
+UPLOAD_MEMORY_KB = int(os.getenv("UPLOAD_MEMORY_KB", "512"))  # uploads maiores vão para um arquivo temporário em disco
+STATUS_COMPACT_EVERY = int(os.getenv("STATUS_COMPACT_EVERY", "200"))  # mínimo de status no journal para regravar a planilha no meio do envio (o limite cresce com a planilha)
+VALIDATE_MX = os.getenv("VALIDATE_MX", "false").lower() in {"1", "true", "yes"}  # rejeita domínios sem MX/A antes do envio (requer dnspython)
+VALIDATE_MX_TTL = int(os.getenv("VALIDATE_MX_TTL", "3600"))  # segundos que o resultado por domínio fica em cache
+SUPPRESSION_ENABLED = os.getenv("SUPPRESSION_ENABLED", "true").lower() in {"1", "true", "yes"}  # pula descadastrados/bounces e quem já recebeu a campanha
+SUPPRESSION_BLOOM = os.getenv("SUPPRESSION_BLOOM", "true").lower() in {"1", "true", "yes"}  # filtro de Bloom em memória antes de consultar o banco
+EVENTS_TOKEN = os.getenv("EVENTS_TOKEN", "")  # segredo do webhook /api/events (senha do Basic Auth ou ?token=); vazio = desativado
+EVENTS_BATCH = int(os.getenv("EVENTS_BATCH", "5000"))  # máximo de eventos do webhook por transação no banco
+DATA_DIR = os.getenv("DATA_DIR", str(_ROOT / "data"))  # estado local (cotas, filas...); na Vercel use /tmp
 PUBLIC_MODE = os.getenv("PUBLIC_MODE", "false").lower() in {"1", "true", "yes"}
 DEBUG_SMTP = os.getenv("DEBUG_SMTP", "false").lower() in {"1", "true", "yes"}
 
@@ -27,4 +62,6 @@ DEBUG_SMTP = os.getenv("DEBUG_SMTP", "false").lower() in {"1", "true", "yes"}
 MAILJET_API_KEY = os.getenv("MAILJET_API_KEY")
 MAILJET_API_SECRET = os.getenv("MAILJET_API_SECRET")
 USE_MAILJET_API = os.getenv("USE_MAILJET_API", "false").lower() in {"1", "true", "yes"}
+MAILJET_API_URL = os.getenv("MAILJET_API_URL", "https://api.mailjet.com/v3.1/send")
+MAILJET_BATCH_SIZE = int(os.getenv("MAILJET_BATCH_SIZE", "50"))  # mensagens por chamada /v3.1/send (1 = uma por chamada, máx. 50)
 
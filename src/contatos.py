@@ -0,0 +1,173 @@
+"""Leitor de contatos em streaming, compartilhado pela CLI e pela API.
+
+Lê .xlsx (openpyxl em modo read-only), .csv e .tsv linha a linha, sem pandas
+e com memória constante. As colunas são detectadas de forma tolerante (a
+primeira coluna com "mail" no nome é o e-mail; "Nome"/"Name" e "Status" sem
+diferenciar maiúsculas, espaços, ``-`` e ``_``) e saem com os nomes canônicos
+``"Nome"``, ``"E-mail"`` e ``"Status"``; as demais colunas mantêm o cabeçalho
+original (e podem ser usadas nos templates como ``{coluna}``).
+"""
+import csv
+import io
+import time
+from pathlib import Path
+
+from .metricas import FASES
+from .templates import normalizar_coluna
+
+
+FORMATOS = {"xlsx", "csv", "tsv"}
+
+
+class PlanilhaInvalida(ValueError):
+    """Arquivo de contatos ilegível ou sem as colunas necessárias (mensagem para o usuário)."""
+
+
+def detectar_colunas(cabecalho: list[str]) -> tuple[int | None, int | None, int | None]:
+    """Índices das colunas (email, nome, status) no cabeçalho."""
+    idx_email = idx_nome = idx_status = None
+    for idx, nome in enumerate(cabecalho):
+        normed = normalizar_coluna(nome)
+        if idx_email is None and "mail" in normed:
+            idx_email = idx
+        if idx_nome is None and normed in {"nome", "name"}:
+            idx_nome = idx
+        if idx_status is None and normed == "status":
+            idx_status = idx
+    return idx_email, idx_nome, idx_status
+
+
+def chaves_canonicas(cabecalho: list[str]) -> list[str]:
+    """Nome de cada coluna nos contatos gerados: ``"E-mail"``, ``"Nome"`` e
+    ``"Status"`` para as detectadas, o cabeçalho original para as demais.
+    Levanta ``PlanilhaInvalida`` sem coluna de e-mail."""
+    idx_email, idx_nome, idx_status = detectar_colunas(cabecalho)
+    if idx_email is None:
+        raise PlanilhaInvalida("Planilha inválida: coluna de e-mail ausente. Use 'E-mail' ou 'Email'.")
+    chaves = list(cabecalho)
+    chaves[idx_email] = "E-mail"
+    if idx_nome is not None:
+        chaves[idx_nome] = "Nome"
+    if idx_status is not None:
+        chaves[idx_status] = "Status"
+    return chaves
+
+
+def formato_arquivo(origem, formato: str | None = None) -> str:
+    """Formato ("xlsx", "csv" ou "tsv") explícito ou pela extensão do caminho/nome (padrão: xlsx)."""
+    if formato:
+        formato = formato.lower().lstrip(".")
+    else:
+        nome = origem if isinstance(origem, (str, Path)) else getattr(origem, "name", "") or ""
+        formato = Path(str(nome)).suffix.lower().lstrip(".") or "xlsx"
+    if formato not in FORMATOS:
+        raise PlanilhaInvalida(f"Formato '{formato}' não suportado. Use .xlsx, .csv ou .tsv.")
+    return formato
+
+
+def delimitador_csv(amostra: str) -> str:
+    """Separador de um CSV pelo começo do arquivo (o Excel em pt-BR costuma usar ";")."""
+    try:
+        return csv.Sniffer().sniff(amostra, delimiters=",;\t").delimiter
+    except csv.Error:
+        return ","
+
+
+def _linhas_xlsx(origem):
+    try:
+        from openpyxl import load_workbook
+        wb = load_workbook(origem, read_only=True, data_only=True)
+    except Exception:
+        raise PlanilhaInvalida("Falha ao ler o Excel (openpyxl). Verifique o formato (.xlsx) e as colunas.")
+    try:
+        ws = wb.active
+        if ws is None:
+            raise PlanilhaInvalida("Não foi possível acessar a primeira planilha")
+        yield from ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _linhas_texto(origem, formato: str):
+    if isinstance(origem, (str, Path)):
+        arquivo = open(origem, "r", encoding="utf-8-sig", newline="")
+    else:
+        arquivo = io.TextIOWrapper(origem, encoding="utf-8-sig", newline="")
+    try:
+        if formato == "tsv":
+            delimitador = "\t"
+        else:
+            amostra = arquivo.read(4096)
+            arquivo.seek(0)
+            delimitador = delimitador_csv(amostra)
+        yield from csv.reader(arquivo, delimiter=delimitador)
+    except UnicodeDecodeError:
+        raise PlanilhaInvalida("Falha ao ler o arquivo: salve o CSV/TSV com codificação UTF-8.")
+    finally:
+        if isinstance(origem, (str, Path)):
+            arquivo.close()
+        else:
+            arquivo.detach()  # o upload continua aberto (e relegível) para quem o passou
+
+
+def _texto(valor) -> str:
+    return "" if valor is None else str(valor).strip()
+
+
+def iterar_contatos(
+    origem,
+    *,
+    formato: str | None = None,
+    limite: int | None = None,
+    ignorar_contatados: bool = True,
+    contagem: dict | None = None,
+    numerados: bool = False,
+):
+    """Gera um dict por contato, linha a linha.
+
+    ``origem`` é um caminho ou arquivo binário (upload); o formato vem de
+    ``formato`` ou da extensão. Linhas sem e-mail e, com ``ignorar_contatados``,
+    com ``Status == "Contatado"`` são puladas; a leitura para ao atingir
+    ``limite`` contatos. ``contagem`` (opcional) recebe ``total`` (linhas lidas)
+    e ``pendentes`` (contatos gerados). Com ``numerados``, gera pares
+    ``(linha, contato)``, com a posição da linha na planilha (0 = a primeira
+    depois do cabeçalho, contando as vazias).
+    """
+    formato = formato_arquivo(origem, formato)
+    inicio = time.perf_counter()
+    linhas = _linhas_xlsx(origem) if formato == "xlsx" else _linhas_texto(origem, formato)
+    if contagem is None:
+        contagem = {}
+    contagem.update(total=0, pendentes=0)
+    if limite is not None and limite <= 0:
+        return
+
+    try:
+        primeira = next(linhas)
+    except StopIteration:
+        raise PlanilhaInvalida("Planilha vazia")
+    chaves = chaves_canonicas([_texto(h) for h in primeira])
+    colunas = [(idx, chave) for idx, chave in enumerate(chaves) if chave]
+
+    try:
+        for r in linhas:
+            contagem["total"] += 1
+            if not r:
+                continue
+            contato = {chave: _texto(r[idx]) if idx < len(r) else "" for idx, chave in colunas}
+            if not contato["E-mail"]:
+                continue
+            contato.setdefault("Nome", "")
+            contato["Status"] = contato.get("Status") or "Aguardando"
+            if ignorar_contatados and contato["Status"] == "Contatado":
+                continue
+            contagem["pendentes"] += 1
+            pausa = time.perf_counter()
+            yield (contagem["total"] - 1, contato) if numerados else contato
+            inicio += time.perf_counter() - pausa  # o tempo do consumidor não conta como leitura
+            if limite is not None and contagem["pendentes"] >= limite:
+                # já coletamos o necessário para envio
+                break
+    finally:
+        linhas.close()
+        FASES.observar(time.perf_counter() - inicio, fase="planilha")
@@ -1,17 +1,24 @@
+import threading
 import time
-import smtplib
-import re
-import mimetypes
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
-import random
-import base64
-import requests
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
-from email.utils import formataddr
-from .config import EMAIL, SMTP_USER, SENHA, SMTP_SERVER, SMTP_PORT, FROM_NAME, REPLY_TO, SEND_INTERVAL, LIST_UNSUBSCRIBE, TEXT_ONLY, DEBUG_SMTP
-from .config import MAILJET_API_KEY, MAILJET_API_SECRET, USE_MAILJET_API
+from .config import EMAIL, SMTP_USER, SENHA, SMTP_SERVER, SMTP_PORT, FROM_NAME, REPLY_TO, SEND_INTERVAL
+from .config import USE_MAILJET_API, SUPPRESSION_ENABLED, GROUP_BY_DOMAIN, SEND_RETRIES
+from .config import LIST_UNSUBSCRIBE_URL, SMTP_MAX_RECIPIENTS
+from . import mailjet_api, remetentes as _remetentes, supressao as _supressao, validacao as _validacao
+from .agendador import Agendador, CotaEsgotada
+from .anexos import cache as cache_anexos
+from .caixa_saida import CaixaSaida
+from .excel_reader import Planilha
+from .falhas import classificar_smtp, disjuntor, espera_backoff
+from .mensagem import EsqueletoMensagem
+from .metricas import ENVIOS, FASES
+from .planejador import PlanoDominios
+from .tabela_contatos import TabelaContatos
+from .templates import compilar, dados_contato
+from .smtp_pool import SessaoSMTP, pool as _pool_smtp
 
 
 def _send_via_mailjet_api(
@@ -24,85 +31,19 @@ def _send_via_mailjet_api(
     from_email: str,
     from_name: str | None,
     reply_to: str | None,
+    pausar: bool = True,
 ) -> bool:
     """Envia e-mail usando a API HTTP do Mailjet.
 
     Docs: https://dev.mailjet.com/email/guides/send-api-v31/
     """
-    if not MAILJET_API_KEY or not MAILJET_API_SECRET:
-        print("[Mailjet API] MAILJET_API_KEY/MAILJET_API_SECRET não configurados.")
-        return False
-
-    msg = {
-        "From": {
-            "Email": from_email,
-            "Name": (from_name or "").strip() or from_email,
-        },
-        "To": [{"Email": destino}],
-        "Subject": assunto,
-        "TextPart": corpo or "",
-    }
-    if html and not TEXT_ONLY:
-        msg["HTMLPart"] = html
-
-    headers = {}
-    if reply_to:
-        headers["Reply-To"] = reply_to
-    if LIST_UNSUBSCRIBE:
-        headers["List-Unsubscribe"] = LIST_UNSUBSCRIBE
-    if headers:
-        msg["Headers"] = headers
-
-    # Anexos
-    attachments = []
-    if anexos:
-        for path in anexos:
-            if not path:
-                continue
-            p = Path(path)
-            if not p.exists() or not p.is_file():
-                print(f"Anexo não encontrado, ignorado: {p}")
-                continue
-            ctype, encoding = mimetypes.guess_type(str(p))
-            if ctype is None or encoding is not None:
-                ctype = 'application/octet-stream'
-            with open(p, 'rb') as f:
-                b64 = base64.b64encode(f.read()).decode('ascii')
-            attachments.append({
-                "ContentType": ctype,
-                "Filename": p.name,
-                "Base64Content": b64,
-            })
-    if attachments:
-        msg["Attachments"] = attachments
-
-    payload = {"Messages": [msg]}
-
-    try:
-        resp = requests.post(
-            "https://api.mailjet.com/v3.1/send",
-            auth=(MAILJET_API_KEY, MAILJET_API_SECRET),
-            json=payload,
-            timeout=30,
-        )
-        if DEBUG_SMTP:
-            print(f"[Mailjet API] Status: {resp.status_code} Body: {resp.text[:500]}")
-        resp.raise_for_status()
-        data = resp.json()
-        # Verifica se houve falhas
-        messages = data.get("Messages", [])
-        if not messages:
-            print("[Mailjet API] Resposta sem 'Messages'.")
-            return False
-        status = messages[0].get("Status")
-        if status and status.lower() == "success":
-            print(f"E-mail enviado para {destino} via Mailjet API")
-            return True
-        print(f"[Mailjet API] Envio não confirmado: {data}")
-        return False
-    except Exception as e:
-        print(f"[Mailjet API] Erro ao enviar para {destino}: {e}")
+    if not mailjet_api.configurado():
         return False
+    globais = mailjet_api.montar_globais(
+        assunto, anexos, from_email=from_email, from_name=from_name, reply_to=reply_to
+    )
+    mensagem = mailjet_api.montar_mensagem(destino, corpo, html)
+    return mailjet_api.enviar_mensagens(globais, [mensagem], pausar=pausar)[0]
 
 
 def enviar_email(
@@ -119,15 +60,27 @@ def enviar_email(
     from_email: str | None = None,
     from_name: str | None = None,
     reply_to: str | None = None,
+    sessao: SessaoSMTP | None = None,
+    esqueleto: EsqueletoMensagem | None = None,
+    tentativas: int = SEND_RETRIES,
+    provedor: str | None = None,
+    pausar: bool = True,
 ) -> bool:
+    """Envia um e-mail. Se ``sessao`` for informada (ver ``enviar_em_lote``),
+    reutiliza a conexão SMTP já autenticada; caso contrário usa o pool.
+
+    ``esqueleto`` traz os headers comuns e anexos já serializados (nesse caso
+    ``assunto``, ``anexos`` e o remetente do esqueleto prevalecem).
+
+    Falhas transitórias são tentadas de novo até ``tentativas`` vezes (ver
+    ``falhas``); recusas permanentes de caixa inexistente (5.1.x) entram na
+    lista de supressão como bounce. ``provedor`` nomeia o disjuntor
+    (padrão: o servidor SMTP); sem ``pausar``, um disjuntor aberto levanta
+    ``falhas.DisjuntorAberto`` em vez de esperar.
+    """
     # Configura remetente e headers comuns
-    _login_user = smtp_user or SMTP_USER or EMAIL
-    _pass = smtp_pass or SENHA
-    _server = smtp_server or SMTP_SERVER
-    _port = int(smtp_port or SMTP_PORT)
-    _from_email = (from_email or EMAIL) if (from_email or EMAIL) else _login_user
-    _from_name = from_name if from_name is not None else FROM_NAME
-    _reply_to = reply_to if reply_to is not None else (REPLY_TO or _from_email)
+    _server, _port, _login_user, _pass = _resolver_smtp(smtp_user, smtp_pass, smtp_server, smtp_port)
+    _from_email, _from_name, _reply_to = _resolver_remetente(from_email, from_name, reply_to, _login_user)
 
     # Caminho via API do Mailjet (opcional)
     if USE_MAILJET_API:
@@ -140,62 +93,191 @@ def enviar_email(
             from_email=_from_email,
             from_name=_from_name,
             reply_to=_reply_to,
+            pausar=pausar,
         )
 
     # SMTP (padrão)
-    msg = MIMEMultipart('mixed')
-    display_from = formataddr(((_from_name or '').strip(), _from_email)) if _from_name else _from_email
-    msg['From'] = display_from
-    msg['To'] = destino
-    msg['Subject'] = assunto
-    if _reply_to:
-        msg['Reply-To'] = _reply_to
-    if LIST_UNSUBSCRIBE:
-        msg['List-Unsubscribe'] = LIST_UNSUBSCRIBE
-
-    alternative = MIMEMultipart('alternative')
-    alternative.attach(MIMEText(corpo, 'plain'))
-    if html and not TEXT_ONLY:
-        alternative.attach(MIMEText(html, 'html'))
-    msg.attach(alternative)
+    if esqueleto is None:
+        esqueleto = EsqueletoMensagem(
+            assunto,
+            cache_anexos.obter_varios(anexos),
+            from_email=_from_email,
+            from_name=_from_name,
+            reply_to=_reply_to,
+        )
+    credenciais = (_server, _port, _login_user, _pass)
+    return _enviar_smtp(destino, corpo, html, esqueleto, credenciais, sessao, tentativas, provedor or _server, pausar)
 
+
+def _enviar_smtp(
+    destino: str,
+    corpo: str,
+    html: str | None,
+    esqueleto: EsqueletoMensagem,
+    credenciais: tuple[str, int, str, str],
+    sessao: SessaoSMTP | None,
+    tentativas: int,
+    nome_provedor: str,
+    pausar: bool = True,
+) -> bool:
+    """Parte SMTP de ``enviar_email``: monta a partir do esqueleto e transmite
+    com retentativa, pela ``sessao`` ou por uma sessão do pool."""
     try:
-        server = smtplib.SMTP(_server, _port, timeout=60)
-        if DEBUG_SMTP:
-            server.set_debuglevel(1)
-        # Handshake + STARTTLS
-        server.ehlo()
-        server.starttls()
-        server.ehlo()
-        server.login(_login_user, _pass)
-        # anexos
-        if anexos:
-            for path in anexos:
-                if not path:
-                    continue
-                p = Path(path)
-                if not p.exists() or not p.is_file():
-                    print(f"Anexo não encontrado, ignorado: {p}")
-                    continue
-                ctype, encoding = mimetypes.guess_type(str(p))
-                if ctype is None or encoding is not None:
-                    ctype = 'application/octet-stream'
-                maintype, subtype = ctype.split('/', 1)
-                with open(p, 'rb') as f:
-                    part = MIMEApplication(f.read(), _subtype=subtype)
-                part.add_header('Content-Disposition', 'attachment', filename=p.name)
-                msg.attach(part)
-        refused = server.send_message(msg)
-        server.quit()
-        if refused:
-            # refused contém dict: {recipient: (code, resp)}
-            print(f"Envio parcialmente recusado pelo servidor: {refused}")
-            return False
-        print(f"E-mail enviado para {destino}")
-        return True
+        with FASES.medir(fase="montagem"):
+            dados = esqueleto.renderizar(destino, corpo, html)
     except Exception as e:
-        print(f"Erro ao enviar para {destino}: {e}")
+        print(f"Erro ao montar a mensagem para {destino}: {e}")
+        ENVIOS.inc(resultado="falhou", motivo=type(e).__name__)
         return False
+    return _transmitir_smtp(destino, esqueleto.from_email, dados, credenciais, sessao, tentativas, nome_provedor, pausar)
+
+
+def _transmitir_smtp(
+    destino: str,
+    remetente: str,
+    dados: bytes,
+    credenciais: tuple[str, int, str, str],
+    sessao: SessaoSMTP | None,
+    tentativas: int,
+    nome_provedor: str,
+    pausar: bool = True,
+) -> bool:
+    """Transmite uma mensagem já montada (``dados``), com retentativa.
+
+    Bounces permanentes de caixa inexistente entram na lista de supressão.
+    """
+    # Falhas transitórias (4xx, conexão perdida) são repetidas com backoff na
+    # mesma sessão; sinais de limitação alimentam o disjuntor do servidor.
+    provedor = disjuntor(nome_provedor)
+    for tentativa in range(1, max(1, tentativas) + 1):
+        provedor.aguardar(pausar)
+        try:
+            if sessao is not None:
+                refused = sessao.enviar_bruto(remetente, [destino], dados)
+            else:
+                with _pool_smtp.sessao(*credenciais) as s:
+                    refused = s.enviar_bruto(remetente, [destino], dados)
+            # refused contém dict: {recipient: (code, resp)}
+            erro = refused
+            falha = classificar_smtp(refused) if refused else None
+        except Exception as e:
+            erro = e
+            falha = classificar_smtp(e)
+        if falha is None:
+            provedor.registrar_sucesso()
+            print(f"E-mail enviado para {destino}")
+            ENVIOS.inc(resultado="enviado", motivo="smtp")
+            return True
+        if falha.limitacao:
+            provedor.registrar_limitacao()
+        if not falha.transitoria or tentativa >= tentativas:
+            break
+        espera = espera_backoff(tentativa)
+        print(f"Falha temporária ao enviar para {destino} ({falha.codigo or falha.motivo}); nova tentativa em {espera:.0f}s")
+        ENVIOS.inc(resultado="retentado", motivo=str(falha.codigo or falha.motivo))
+        time.sleep(espera)
+
+    _registrar_falha(destino, falha, erro)
+    return False
+
+
+def _registrar_falha(destino: str, falha, erro) -> None:
+    """Falha definitiva de um destinatário; caixa inexistente vira bounce na supressão."""
+    print(f"Erro ao enviar para {destino} ({falha.tipo}): {erro}")
+    ENVIOS.inc(resultado="falhou", motivo=f"{falha.tipo}:{falha.codigo or falha.motivo}")
+    if falha.caixa_inexistente and SUPPRESSION_ENABLED:
+        indice = _supressao.indice()
+        if indice is not None:
+            indice.suprimir(destino, _supressao.BOUNCE)
+
+
+def _transmitir_coletivo(
+    destinos: list[str],
+    remetente: str,
+    dados: bytes,
+    sessao: SessaoSMTP,
+    tentativas: int,
+    nome_provedor: str,
+    pausar: bool = True,
+) -> dict[str, bool]:
+    """Como ``_transmitir_smtp``, numa transação com vários ``RCPT TO``.
+
+    O resultado é por destinatário, pela resposta ao RCPT de cada um; recusas
+    transitórias são tentadas de novo numa transação só com os recusados.
+    """
+    provedor = disjuntor(nome_provedor)
+    resultados = dict.fromkeys(destinos, False)
+    pendentes = list(destinos)
+    for tentativa in range(1, max(1, tentativas) + 1):
+        provedor.aguardar(pausar)
+        ultima = tentativa >= tentativas
+        try:
+            recusados = sessao.enviar_varios(remetente, pendentes, dados)
+        except Exception as e:
+            # a transação inteira falhou (MAIL/DATA recusado, conexão perdida)
+            falha = classificar_smtp(e)
+            if falha.limitacao:
+                provedor.registrar_limitacao()
+            if not falha.transitoria or ultima:
+                for destino in pendentes:
+                    _registrar_falha(destino, falha, e)
+                return resultados
+        else:
+            if len(recusados) < len(pendentes):
+                provedor.registrar_sucesso()
+            falha = None
+            proximos = []
+            for destino in pendentes:
+                if destino not in recusados:
+                    resultados[destino] = True
+                    ENVIOS.inc(resultado="enviado", motivo="smtp")
+                    continue
+                falha = classificar_smtp({destino: recusados[destino]})
+                if falha.limitacao:
+                    provedor.registrar_limitacao()
+                if falha.transitoria and not ultima:
+                    proximos.append(destino)
+                else:
+                    _registrar_falha(destino, falha, recusados[destino])
+            print(f"Transação para {len(pendentes)} destinatários: {len(pendentes) - len(recusados)} aceitos")
+            pendentes = proximos
+            if not pendentes:
+                return resultados
+        espera = espera_backoff(tentativa)
+        print(
+            f"Falha temporária para {len(pendentes)} destinatários "
+            f"({falha.codigo or falha.motivo}); nova tentativa em {espera:.0f}s"
+        )
+        ENVIOS.inc(resultado="retentado", motivo=str(falha.codigo or falha.motivo))
+        time.sleep(espera)
+    return resultados
+
+
+def _resolver_smtp(
+    smtp_user: str | None = None,
+    smtp_pass: str | None = None,
+    smtp_server: str | None = None,
+    smtp_port: int | None = None,
+) -> tuple[str, int, str, str]:
+    """Aplica os padrões do .env às credenciais: (server, port, user, senha)."""
+    _login_user = smtp_user or SMTP_USER or EMAIL
+    _pass = smtp_pass or SENHA
+    _server = smtp_server or SMTP_SERVER
+    _port = int(smtp_port or SMTP_PORT)
+    return _server, _port, _login_user, _pass
+
+
+def _resolver_remetente(
+    from_email: str | None,
+    from_name: str | None,
+    reply_to: str | None,
+    login_user: str | None,
+) -> tuple[str, str, str]:
+    """Aplica os padrões do .env ao remetente: (from_email, from_name, reply_to)."""
+    _from_email = (from_email or EMAIL) if (from_email or EMAIL) else login_user
+    _from_name = from_name if from_name is not None else FROM_NAME
+    _reply_to = reply_to if reply_to is not None else (REPLY_TO or _from_email)
+    return _from_email, _from_name, _reply_to
 
 
 def enviar_em_lote(
@@ -214,68 +296,620 @@ def enviar_em_lote(
     from_name: str | None = None,
     reply_to: str | None = None,
     is_serverless: bool = False,
+    workers: int = 1,
+    preservar_ordem: bool = False,
+    agendador: Agendador | None = None,
+    indexados: bool = False,
+    supressao: "_supressao.IndiceSupressao | None | bool" = None,
+    campanha: str | None = None,
+    validador: "_validacao.Validador | None" = None,
+    por_dominio: bool | None = None,
+    remetentes: "_remetentes.PoolRemetentes | None | bool" = None,
+    caixa: CaixaSaida | None = None,
+    por_transacao: int | None = None,
+    interrompido: list[str] | None = None,
 ):
-    """Itera sobre os contatos (DataFrame ou lista de dicts), envia e-mail e espera intervalo.
+    """Itera sobre os contatos (DataFrame ou lista de dicts) e envia os e-mails.
 
     Agora aceita:
     - pandas.DataFrame (via iterrows)
+    - ``excel_reader.Planilha`` (de ``ler_contatos``): lida em streaming,
+      sem as linhas sem e-mail nem as já contatadas; os índices são as linhas
+      da planilha (para ``atualizar_status``)
+    - ``TabelaContatos`` (ou uma fatia/filtro dela): as linhas são lidas sob
+      demanda e os índices são os da tabela original
     - Iterable de dicts com chaves "Nome" e "E-mail"
+    - Iterable de pares (index, dict), com ``indexados=True`` (ex.: retomada de job)
+
+    Uma única sessão SMTP autenticada (do pool) é usada para todo o lote.
+
+    O ritmo e as cotas vêm do ``agendador`` (padrão: ``Agendador.para_lote``,
+    uma mensagem a cada ``intervalo`` segundos contando o tempo do envio, mais
+    as cotas de hora/24h da conta). Se a cota de 24h acabar, o lote para e os
+    contatos restantes não são devolvidos.
+
+    Com ``workers > 1`` os envios rodam em paralelo, cada worker com a sua
+    própria conexão, todos sob o mesmo agendador. Os resultados saem na ordem
+    de conclusão, ou na ordem de entrada se ``preservar_ordem``.
+
+    Com ``USE_MAILJET_API`` e ``MAILJET_BATCH_SIZE > 1`` as mensagens são
+    agrupadas em chamadas únicas à API (ver ``_enviar_lotes_mailjet``).
+
+    Antes de renderizar, cada destinatário passa pelo índice de supressão
+    (padrão: ``supressao.indice()`` se ``SUPPRESSION_ENABLED``; ``False``
+    desliga): são pulados os descadastrados/bounces, quem já recebeu a
+    ``campanha`` (padrão: o assunto) pelo mesmo remetente e os repetidos no lote. Cada envio bem
+    sucedido é registrado na campanha. Endereços inválidos (sintaxe,
+    placeholders e, com ``VALIDATE_MX``, domínio) são pulados pelo
+    ``validador`` (padrão: ``validacao.padrao()``).
+
+    Com ``por_dominio`` (padrão: ``GROUP_BY_DOMAIN``) a lista é reordenada
+    por ``planejador.PlanoDominios``: domínios intercalados e adiamento dos
+    que estão no limite do agendador. Os índices continuam os da entrada.
+
+    Com um pool de ``remetentes`` (padrão: ``SENDER_POOL``, se nenhuma
+    credencial SMTP foi informada; ``False`` desliga) cada contato sai pela
+    próxima conta do pool, com o ritmo e as cotas dela; quando a cota de uma
+    conta acaba, o lote segue pelas outras. O ``agendador`` fica só com os
+    limites por domínio, e o Mailjet envia uma mensagem por chamada.
+
+    Se nem o texto nem o HTML são personalizados (sem ``{campo}``) e
+    ``por_transacao`` (padrão: ``SMTP_MAX_RECIPIENTS``) passa de 1, o SMTP
+    envia uma única mensagem com ``To: undisclosed-recipients:;`` em
+    transações de até ``por_transacao`` ``RCPT TO`` (ver ``_enviar_coletivo``);
+    o resultado de cada contato vem da resposta ao seu RCPT. Não vale com
+    pool de remetentes, Mailjet, caixa de saída ou ``LIST_UNSUBSCRIBE_URL``
+    (link por destinatário), e roda numa conexão só (``workers`` ignorado).
+
+    Com uma ``caixa`` (ver ``caixa_saida``) nada é enviado: cada mensagem é
+    renderizada e gravada na caixa de saída, e ``sucesso`` indica que ela foi
+    gravada. O envio (e o registro na campanha) fica para ``enviar_caixa``.
+
+    Se o lote para antes do fim (cota esgotada), o motivo é acrescentado a
+    ``interrompido`` (opcional), para quem consome os resultados avisar o usuário.
+
+    Com verificação de domínio (``VALIDATE_MX``), uma origem que pode ser lida
+    de novo (DataFrame, ``Planilha``, ``TabelaContatos`` ou ``list``) tem os
+    domínios resolvidos em paralelo antes do primeiro envio
+    (``Validador.preverificar``).
 
     Yields: (index, sucesso, destino_email)
     """
     # Decide o iterador conforme o tipo de "contatos"
+    tabela = isinstance(contatos, TabelaContatos)
+    planilha = isinstance(contatos, Planilha)
     if hasattr(contatos, "iterrows"):
         iterator = contatos.iterrows()
-        get_nome = lambda row: str(row.get("Nome", "")).strip()
-        get_email = lambda row: str(row.get("E-mail", "")).strip()
+    elif planilha:
+        iterator = contatos.pares()
+    elif tabela:
+        iterator = contatos.pares()
+    elif indexados:
+        iterator = iter(contatos)
     else:
         iterator = enumerate(contatos)
-        get_nome = lambda row: str((row or {}).get("Nome", "")).strip()
-        get_email = lambda row: str((row or {}).get("E-mail", "")).strip()
 
-    for i, row in iterator:
-        nome = get_nome(row)
-        destino = get_email(row)
+    # Templates compilados uma vez; {coluna} aceita qualquer coluna da planilha
+    tpl_texto = compilar(template)
+    tpl_html = compilar(html_template)
 
-        # validação simples de e-mail e bloqueio de placeholders
-        if not _email_valido(destino):
-            print(f"Pulado (e-mail inválido ou placeholder): {destino}")
-            yield i, False, destino
-            continue
+    _server, _port, _login_user, _pass = _resolver_smtp(smtp_user, smtp_pass, smtp_server, smtp_port)
+    _from_email, _from_name, _reply_to = _resolver_remetente(from_email, from_name, reply_to, _login_user)
+    credenciais = None if USE_MAILJET_API else (_server, _port, _login_user, _pass)
+    if caixa is not None:
+        remetentes = False  # a caixa sai por uma conta só (ver enviar_caixa)
+    if remetentes is None and not (smtp_user or smtp_pass):
+        remetentes = _remetentes.padrao(intervalo, pausar=not is_serverless)
+    remetentes = remetentes or None
+    if remetentes is not None:
+        # cada conta tem o seu ritmo/cota; aqui ficam só os limites por domínio
+        credenciais = None
+        if agendador is None:
+            agendador = Agendador.para_dominios(pausar=not is_serverless)
+    if agendador is None:
+        # Em ambiente serverless, não fazemos espera para evitar timeout (as cotas continuam valendo)
+        conta = f"mailjet:{_from_email}" if USE_MAILJET_API else _login_user
+        agendador = Agendador.para_lote(intervalo, conta, pausar=not is_serverless)
+    # Em serverless, sem esperas de backoff (o tempo da requisição é limitado)
+    tentativas = 1 if is_serverless else SEND_RETRIES
+    if por_dominio if por_dominio is not None else GROUP_BY_DOMAIN:
+        # a tabela já tem os domínios: o plano guarda só índices, não linhas
+        iterator = iter(PlanoDominios(contatos if tabela else iterator, agendador=agendador))
 
-        corpo = template.format(nome=nome)
-        sucesso = enviar_email(
-            destino,
+    if supressao is None and SUPPRESSION_ENABLED:
+        supressao = _supressao.indice()
+    if supressao:
+        supressao.atualizar()
+    else:
+        supressao = None
+    # "já recebeu" vale por remetente: outra conta com o mesmo assunto não conta
+    campanha = _supressao.chave_campanha(_from_email, campanha or assunto)
+    vistos: set[str] = set()
+    lock_vistos = threading.Lock()
+    validador = validador or _validacao.padrao()
+    relegivel = tabela or planilha or hasattr(contatos, "iterrows") or isinstance(contatos, list)
+    if validador.resolvedor is not None and relegivel:
+        # origem que pode ser lida de novo: os domínios são resolvidos em
+        # paralelo antes do primeiro envio; um iterador só é lido uma vez (quem
+        # o gera pode chamar ``preverificar`` na origem, como campanha e caixa_saida)
+        if tabela:
+            emails = (linha.get("E-mail") for linha in contatos)
+        elif planilha:
+            emails = (c.get("E-mail") for _i, c in contatos.pares())
+        elif hasattr(contatos, "iterrows"):
+            emails = (dados_contato(row).get("email") for _i, row in contatos.iterrows())
+        else:
+            emails = (dados_contato(row[1] if indexados else row).get("email") for row in contatos)
+        validador.preverificar(emails)
+
+    def preparar(row):
+        """Valida e renderiza um contato. Retorna (destino, corpo, html); corpo None = pulado."""
+        dados = dados_contato(row)
+        destino = dados.get("email", "")
+
+        # sintaxe, placeholders e domínio (cache por domínio; ver validacao)
+        destino, motivo = validador.validar(destino)
+        if motivo:
+            print(f"Pulado (e-mail inválido: {motivo}): {destino}")
+            ENVIOS.inc(resultado="pulado", motivo="invalido")
+            return destino, None, None
+
+        chave = _supressao.normalizar_email(destino)
+        with lock_vistos:
+            repetido = chave in vistos
+            vistos.add(chave)
+        if repetido:
+            print(f"Pulado (repetido no lote): {destino}")
+            ENVIOS.inc(resultado="pulado", motivo="repetido")
+            return destino, None, None
+        if supressao is not None:
+            motivo = supressao.motivo(chave)
+            if motivo:
+                print(f"Pulado (suprimido: {motivo}): {destino}")
+                ENVIOS.inc(resultado="pulado", motivo=f"suprimido_{motivo}")
+                return destino, None, None
+            if supressao.ja_enviado(campanha, chave):
+                print(f"Pulado (já recebeu esta campanha): {destino}")
+                ENVIOS.inc(resultado="pulado", motivo="ja_enviado")
+                return destino, None, None
+        html = tpl_html.renderizar(dados) if tpl_html is not None else None
+        return destino, tpl_texto.renderizar(dados), html
+
+    def registrados(resultados):
+        """Registra na campanha cada envio bem sucedido."""
+        for i, sucesso, destino in resultados:
+            if sucesso and supressao is not None:
+                supressao.registrar_envio(campanha, destino)
+            yield i, sucesso, destino
+
+    try:
+        if caixa is not None:
+            esqueleto = EsqueletoMensagem(
+                assunto,
+                cache_anexos.obter_varios(anexos),
+                from_email=_from_email,
+                from_name=_from_name,
+                reply_to=_reply_to,
+            )
+            yield from _renderizar_caixa(iterator, preparar, esqueleto, caixa)
+            return
+
+        if remetentes is None and USE_MAILJET_API and mailjet_api.tamanho_lote() > 1:
+            globais = mailjet_api.montar_globais(
+                assunto, anexos, from_email=_from_email, from_name=_from_name, reply_to=_reply_to
+            )
+            yield from registrados(_enviar_lotes_mailjet(iterator, preparar, globais, agendador, tentativas))
+            return
+
+        # Headers comuns e anexos serializados uma única vez para o lote
+        esqueleto = None if USE_MAILJET_API or remetentes is not None else EsqueletoMensagem(
             assunto,
-            corpo,
-            anexos=anexos,
-            html=html_template,
-            smtp_user=smtp_user,
-            smtp_pass=smtp_pass,
-            smtp_server=smtp_server,
-            smtp_port=smtp_port,
-            from_email=from_email,
-            from_name=from_name,
-            reply_to=reply_to,
+            cache_anexos.obter_varios(anexos),
+            from_email=_from_email,
+            from_name=_from_name,
+            reply_to=_reply_to,
         )
-        yield i, sucesso, destino
-        # Em ambiente serverless, não fazemos espera para evitar timeout
-        if not is_serverless and intervalo > 0:
-            # jitter de 20% para evitar cadência fixa (mínimo 1s)
-            jitter = intervalo * random.uniform(-0.2, 0.2)
-            espera = max(1, intervalo + jitter)
-            time.sleep(espera)
+        por_transacao = SMTP_MAX_RECIPIENTS if por_transacao is None else por_transacao
+        coletivo = (
+            esqueleto is not None
+            and por_transacao > 1
+            and not LIST_UNSUBSCRIBE_URL
+            and not tpl_texto.personalizado
+            and (tpl_html is None or not tpl_html.personalizado)
+        )
+        if coletivo:
+            yield from registrados(
+                _enviar_coletivo(iterator, preparar, esqueleto, credenciais, agendador, tentativas, por_transacao)
+            )
+            return
+        if remetentes is not None:
+            enviar_pelo_pool = _enviador_pool(
+                remetentes, agendador, assunto, anexos, tentativas,
+                from_name=_from_name, reply_to=_reply_to,
+            )
+
+        def processar(i, row, sessao):
+            """Envia para um contato quando o agendador permitir."""
+            destino, corpo, html = preparar(row)
+            if corpo is None:
+                return i, False, destino
+
+            dominio = _dominio(destino)
+            with agendador.vaga(dominio):
+                if remetentes is not None:
+                    return i, enviar_pelo_pool(destino, corpo, html, dominio), destino
+                agendador.aguardar(dominio)
+                sucesso = enviar_email(
+                    destino,
+                    assunto,
+                    corpo,
+                    anexos=anexos,
+                    html=html,
+                    smtp_user=smtp_user,
+                    smtp_pass=smtp_pass,
+                    smtp_server=smtp_server,
+                    smtp_port=smtp_port,
+                    from_email=from_email,
+                    from_name=from_name,
+                    reply_to=reply_to,
+                    sessao=sessao,
+                    esqueleto=esqueleto,
+                    tentativas=tentativas,
+                    pausar=agendador.pausar,
+                )
+            return i, sucesso, destino
+
+        if workers > 1:
+            yield from registrados(_enviar_concorrente(iterator, processar, credenciais, workers, preservar_ordem))
+            return
+
+        # Conecta/autentica uma vez por lote (lazy: só no primeiro envio)
+        sessao = _pool_smtp.obter(*credenciais) if credenciais else None
+        try:
+            yield from registrados(processar(i, row, sessao) for i, row in iterator)
+        finally:
+            if sessao is not None:
+                _pool_smtp.devolver(sessao)
+    except CotaEsgotada as e:
+        print(f"Lote interrompido: {e}")
+        if interrompido is not None:
+            interrompido.append(str(e))
+
+
+def _enviar_coletivo(
+    iterator,
+    preparar,
+    esqueleto: EsqueletoMensagem,
+    credenciais: tuple[str, int, str, str],
+    agendador: Agendador,
+    tentativas: int,
+    tamanho: int,
+):
+    """Conteúdo igual para todos: a mensagem é montada uma vez e cada
+    transação leva até ``tamanho`` destinatários no envelope.
+
+    O agendador reserva de uma vez as vagas dos destinatários da transação
+    (por domínio), então o ritmo e as cotas continuam contando contatos. Se
+    as cotas só liberam parte deles, a transação leva essa parte e o resto
+    vai na seguinte.
+    """
+    sessao = _pool_smtp.obter(*credenciais)
+    indices, destinos = [], []
+    dados = None
+
+    def descarregar():
+        while destinos:
+            liberados, esgotada = {}, None
+            for dominio, quantidade in Counter(_dominio(d) for d in destinos).items():
+                try:
+                    liberados[dominio] = agendador.aguardar(dominio, quantidade)
+                except CotaEsgotada as e:
+                    esgotada = e  # envia o que já foi reservado e para
+                    break
+            lote, resto = [], []
+            for i, destino in zip(indices, destinos):
+                dominio = _dominio(destino)
+                if liberados.get(dominio, 0) > 0:
+                    liberados[dominio] -= 1
+                    lote.append((i, destino))
+                else:
+                    resto.append((i, destino))
+            if lote:
+                aceitos = _transmitir_coletivo(
+                    [d for _, d in lote],
+                    esqueleto.from_email,
+                    dados,
+                    sessao,
+                    tentativas,
+                    credenciais[0],
+                    agendador.pausar,
+                )
+                yield from ((i, aceitos[d], d) for i, d in lote)
+            if esgotada is not None:
+                raise esgotada
+            indices[:] = [i for i, _ in resto]
+            destinos[:] = [d for _, d in resto]
+
+    try:
+        for i, row in iterator:
+            destino, corpo, html = preparar(row)
+            if corpo is None:
+                yield i, False, destino
+                continue
+            if dados is None:
+                try:
+                    with FASES.medir(fase="montagem"):
+                        dados = esqueleto.renderizar(None, corpo, html)
+                except Exception as e:
+                    print(f"Erro ao montar a mensagem: {e}")
+                    ENVIOS.inc(resultado="falhou", motivo=type(e).__name__)
+                    yield i, False, destino
+                    continue
+            indices.append(i)
+            destinos.append(destino)
+            if len(destinos) >= tamanho:
+                yield from descarregar()
+        if destinos:
+            yield from descarregar()
+    finally:
+        _pool_smtp.devolver(sessao)
+
+
+def _renderizar_caixa(iterator, preparar, esqueleto: EsqueletoMensagem, caixa: CaixaSaida):
+    """Modo caixa de saída de ``enviar_em_lote``: monta e grava, sem rede nem agendador."""
+    try:
+        for i, row in iterator:
+            destino, corpo, html = preparar(row)
+            if corpo is None:
+                yield i, False, destino
+                continue
+            try:
+                with FASES.medir(fase="montagem"):
+                    dados = esqueleto.renderizar(destino, corpo, html)
+                caixa.gravar(i, esqueleto.from_email, destino, dados)
+            except Exception as e:
+                print(f"Erro ao gravar a mensagem para {destino} na caixa de saída: {e}")
+                ENVIOS.inc(resultado="falhou", motivo=type(e).__name__)
+                yield i, False, destino
+                continue
+            ENVIOS.inc(resultado="renderizado", motivo="caixa")
+            yield i, True, destino
+    finally:
+        caixa.sincronizar()
+
+
+def enviar_caixa(
+    caixa: CaixaSaida,
+    *,
+    smtp_user: str | None = None,
+    smtp_pass: str | None = None,
+    smtp_server: str | None = None,
+    smtp_port: int | None = None,
+    intervalo: float = SEND_INTERVAL,
+    workers: int = 1,
+    agendador: Agendador | None = None,
+    is_serverless: bool = False,
+    supressao: "_supressao.IndiceSupressao | None | bool" = None,
+    campanha: str | None = None,
+):
+    """Descarrega a caixa de saída pelo SMTP, na ordem de gravação.
+
+    Usa as sessões do pool (uma por worker), o ``agendador`` (padrão:
+    ``Agendador.para_lote`` da conta) e as mesmas retentativas do envio
+    direto. Cada arquivo vai para ``enviados/`` ou ``falhas/``; o que foi
+    reivindicado e não chegou a sair (cota esgotada, interrupção) volta para
+    ``new/``. Destinatários suprimidos depois da renderização são pulados, e
+    os envios bem sucedidos são registrados na ``campanha`` (padrão: a da
+    caixa). A caixa sai sempre por SMTP, mesmo com ``USE_MAILJET_API``.
+
+    Yields: (index, sucesso, destino_email)
+    """
+    _server, _port, _login_user, _pass = _resolver_smtp(smtp_user, smtp_pass, smtp_server, smtp_port)
+    credenciais = (_server, _port, _login_user, _pass)
+    if agendador is None:
+        agendador = Agendador.para_lote(intervalo, _login_user, pausar=not is_serverless)
+    tentativas = 1 if is_serverless else SEND_RETRIES
+    if supressao is None and SUPPRESSION_ENABLED:
+        supressao = _supressao.indice()
+    if supressao:
+        supressao.atualizar()
+    else:
+        supressao = None
+    meta = caixa.meta
+    campanha = campanha or meta.get("campanha") or meta.get("assunto")
+
+    def processar(_i, arquivo, sessao):
+        indice, remetente, destino, dados = caixa.ler(arquivo)
+        if supressao is not None:
+            motivo = supressao.motivo(_supressao.normalizar_email(destino))
+            if motivo:
+                print(f"Pulado (suprimido: {motivo}): {destino}")
+                ENVIOS.inc(resultado="pulado", motivo=f"suprimido_{motivo}")
+                caixa.concluir(arquivo, False)
+                return indice, False, destino
+
+        dominio = _dominio(destino)
+        with agendador.vaga(dominio):
+            agendador.aguardar(dominio)
+            sucesso = _transmitir_smtp(destino, remetente, dados, credenciais, sessao, tentativas, _server, agendador.pausar)
+        caixa.concluir(arquivo, sucesso)
+        if sucesso and supressao is not None and campanha:
+            supressao.registrar_envio(_supressao.chave_campanha(remetente, campanha), destino)
+        return indice, sucesso, destino
+
+    caixa.recuperar()
+    arquivos = ((arquivo, arquivo) for arquivo in caixa.reivindicar())
+    try:
+        if workers > 1:
+            yield from _enviar_concorrente(arquivos, processar, credenciais, workers, False)
+            return
+        sessao = _pool_smtp.obter(*credenciais)
+        try:
+            for arquivo, _ in arquivos:
+                yield processar(arquivo, arquivo, sessao)
+        finally:
+            _pool_smtp.devolver(sessao)
+    except CotaEsgotada as e:
+        print(f"Descarga interrompida: {e}")
+    finally:
+        arquivos.close()
+        caixa.recuperar()
+
+
+def _dominio(email: str) -> str:
+    return email.rpartition("@")[2].lower()
+
+
+def _enviador_pool(remetentes, agendador: Agendador, assunto: str, anexos, tentativas: int, *, from_name, reply_to):
+    """Função ``(destino, corpo, html, dominio) -> sucesso`` que envia pela
+    próxima conta do pool com cota, trocando de conta quando a cota acaba.
+
+    Headers e anexos são serializados uma vez por conta (cada uma tem o seu remetente).
+    """
+    serializados = cache_anexos.obter_varios(anexos)
+    esqueletos, globais = {}, {}
+    for conta in remetentes.contas:
+        nome = conta.from_name if conta.from_name is not None else from_name
+        resposta = conta.reply_to or reply_to or conta.from_email
+        if conta.tipo == _remetentes.MAILJET:
+            globais[conta.nome] = mailjet_api.montar_globais(
+                assunto, anexos, from_email=conta.from_email, from_name=nome, reply_to=resposta
+            )
+        else:
+            esqueletos[conta.nome] = EsqueletoMensagem(
+                assunto, serializados, from_email=conta.from_email, from_name=nome, reply_to=resposta
+            )
+
+    def enviar(destino: str, corpo: str, html: str | None, dominio: str) -> bool:
+        while True:
+            conta = remetentes.escolher()
+            try:
+                conta.agendador.aguardar()
+            except CotaEsgotada as e:
+                remetentes.esgotar(conta, e)
+                continue
+            agendador.aguardar(dominio)
+            if conta.tipo == _remetentes.MAILJET:
+                mensagem = mailjet_api.montar_mensagem(destino, corpo, html)
+                sucesso = mailjet_api.enviar_mensagens(
+                    globais[conta.nome], [mensagem], tentativas=tentativas, auth=conta.auth, pausar=agendador.pausar
+                )[0]
+            else:
+                credenciais = (conta.server, conta.port, conta.user, conta.senha)
+                sucesso = _enviar_smtp(
+                    destino, corpo, html, esqueletos[conta.nome], credenciais, None, tentativas, conta.provedor,
+                    agendador.pausar,
+                )
+            remetentes.registrar(conta, sucesso)
+            return sucesso
+
+    return enviar
+
+
+def _enviar_lotes_mailjet(iterator, preparar, globais: dict, agendador: Agendador, tentativas: int = SEND_RETRIES):
+    """Agrupa as mensagens renderizadas em chamadas de até ``tamanho_lote()``
+    mensagens à API do Mailjet e devolve o resultado de cada contato.
+
+    O agendador reserva de uma vez as vagas de todas as mensagens da chamada;
+    se as cotas só liberam parte delas, a chamada leva essa parte e o resto
+    vai na seguinte.
+    """
+    if not mailjet_api.configurado():
+        for i, row in iterator:
+            destino, _, _ = preparar(row)
+            yield i, False, destino
+        return
+
+    tamanho = mailjet_api.tamanho_lote()
+    indices, destinos, mensagens = [], [], []
+
+    def descarregar():
+        while mensagens:
+            n = agendador.aguardar(quantidade=len(mensagens))
+            sucessos = mailjet_api.enviar_mensagens(
+                globais, mensagens[:n], tentativas=tentativas, pausar=agendador.pausar
+            )
+            resultados = list(zip(indices[:n], sucessos, destinos[:n]))
+            del indices[:n], destinos[:n], mensagens[:n]
+            yield from resultados
+
+    for i, row in iterator:
+        destino, corpo, html = preparar(row)
+        if corpo is None:
+            yield i, False, destino
+            continue
+        indices.append(i)
+        destinos.append(destino)
+        mensagens.append(mailjet_api.montar_mensagem(destino, corpo, html))
+        if len(mensagens) >= tamanho:
+            yield from descarregar()
+    if mensagens:
+        yield from descarregar()
+
+
+def _enviar_concorrente(iterator, processar, credenciais, workers: int, preservar_ordem: bool):
+    """Distribui os contatos entre ``workers`` threads (pool limitado).
+
+    Cada thread obtém a sua própria sessão SMTP do pool. No máximo
+    ``2 * workers`` contatos ficam em voo, então a lista de entrada é
+    consumida de forma incremental.
+    """
+    local = threading.local()
+    sessoes: list[SessaoSMTP] = []
+    lock = threading.Lock()
+
+    def tarefa(i, row):
+        sessao = getattr(local, "sessao", None)
+        if sessao is None and credenciais:
+            sessao = local.sessao = _pool_smtp.obter(*credenciais)
+            with lock:
+                sessoes.append(sessao)
+        return processar(i, row, sessao)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="envio")
+    em_voo = 2 * workers
+    interrupcao: list[CotaEsgotada] = []
+
+    def proximos(n):
+        # Depois de uma cota esgotada não enviamos mais nada, só colhemos o que está em voo
+        return [] if interrupcao else [executor.submit(tarefa, i, row) for i, row in islice(itens, n)]
+
+    def colher(futuro):
+        try:
+            return futuro.result()
+        except CotaEsgotada as e:
+            interrupcao.append(e)
+            return None
+
+    try:
+        itens = iter(iterator)
+        if preservar_ordem:
+            fila = deque(proximos(em_voo))
+            while fila:
+                resultado = colher(fila.popleft())
+                fila.extend(proximos(1))
+                if resultado is not None:
+                    yield resultado
+        else:
+            pendentes = set(proximos(em_voo))
+            while pendentes:
+                prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                pendentes.update(proximos(len(prontos)))
+                for futuro in prontos:
+                    resultado = colher(futuro)
+                    if resultado is not None:
+                        yield resultado
+        if interrupcao:
+            raise interrupcao[0]
+    finally:
+        # Consumidor parou cedo (ou erro): descarta o que não começou
+        executor.shutdown(wait=True, cancel_futures=True)
+        for sessao in sessoes:
+            _pool_smtp.devolver(sessao)
 
 
 def _email_valido(email: str) -> bool:
+    """Sintaxe e placeholders, sem consultar a rede (ver ``validacao``)."""
     if not email or not isinstance(email, str):
         return False
-    email = email.strip()
-    # regex simples para e-mail
-    if re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email) is None:
-        return False
-    # evita domínios/endereços de exemplo
-    lower = email.lower()
-    if lower == "exemplo@dominio.com" or lower.endswith("@example.com") or lower.endswith("@test.com"):
-        return False
-    return True
+    return _validacao.motivo_sintaxe(_validacao.normalizar(email)) is None
@@ -0,0 +1,187 @@
+"""Arquivos estáticos da interface (``web/``) servidos da memória.
+
+Na primeira requisição de um estático, ``Estaticos`` lê a pasta uma vez e
+prepara cada arquivo:
+
+- nome com impressão digital do conteúdo (``main.3f9a1c2b7e.js``), servido
+  com ``Cache-Control: immutable`` por um ano; os HTML passam a apontar para
+  esses nomes e são servidos com ``no-cache`` (revalidação pelo ETag);
+- variantes gzip e, se o pacote ``brotli`` estiver instalado, br, escolhidas
+  pelo ``Accept-Encoding`` (só quando ficam menores que o original);
+- ETag por variante e 304 para ``If-None-Match``.
+
+Depois disso nenhum estático toca o disco. Os nomes originais continuam
+valendo (revalidados pelo ETag). Mudanças em ``web/`` só aparecem depois de
+reiniciar o processo.
+
+Na Vercel ``web/`` é servido direto pelo CDN (ver ``vercel.json``); para
+publicar a mesma saída num CDN ou nginx (``gzip_static``)::
+
+    python -m src.estaticos web/ dist/
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import re
+import sys
+import threading
+from pathlib import Path
+
+
+# Arquivos maiores que isso ficam fora do cache em memória
+MAX_MEMORIA = 1024 * 1024
+# Abaixo disso a compressão não compensa o custo
+MIN_COMPRESSAO = 512
+IMUTAVEL = "public, max-age=31536000, immutable"
+REVALIDAR = "no-cache"
+
+_COMPRIMIVEIS = ("text/", "application/javascript", "application/json", "image/svg+xml")
+_REFERENCIA = re.compile(r'(?P<attr>\b(?:href|src))=(?P<aspas>["\'])(?P<url>[^"\'#?]+)(?P=aspas)')
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+class Ativo:
+    """Um arquivo estático pronto para servir (conteúdo e variantes comprimidas)."""
+
+    __slots__ = ("nome", "tipo", "conteudo", "variantes", "etag", "cache", "caminho")
+
+    def __init__(self, nome: str, conteudo: bytes | None, *, tipo: str, cache: str, caminho: Path | None = None):
+        self.nome = nome
+        self.tipo = tipo
+        self.conteudo = conteudo  # None = grande demais, lido do disco a cada requisição
+        self.caminho = caminho
+        self.cache = cache
+        self.variantes: dict[str, bytes] = {}
+        self.etag = hashlib.sha256(conteudo if conteudo is not None else str(caminho).encode()).hexdigest()[:20]
+        if conteudo is not None and len(conteudo) >= MIN_COMPRESSAO and tipo.startswith(_COMPRIMIVEIS):
+            self._comprimir()
+
+    def _comprimir(self) -> None:
+        brotli = _brotli()
+        candidatos = {"gzip": gzip.compress(self.conteudo, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            candidatos["br"] = brotli.compress(self.conteudo, quality=11)
+        self.variantes = {cod: dados for cod, dados in candidatos.items() if len(dados) < len(self.conteudo)}
+
+    def escolher(self, aceitas) -> tuple[str | None, bytes | None]:
+        """(codificação, bytes) para o ``Accept-Encoding`` (objeto ``Accept`` do werkzeug)."""
+        for codificacao in ("br", "gzip"):
+            if codificacao in self.variantes and aceitas[codificacao]:
+                return codificacao, self.variantes[codificacao]
+        return None, self.conteudo
+
+
+def _digital(conteudo: bytes) -> str:
+    return hashlib.sha256(conteudo).hexdigest()[:10]
+
+
+def _nome_digital(nome: str, conteudo: bytes) -> str:
+    base, ponto, extensao = nome.rpartition(".")
+    return f"{base}.{_digital(conteudo)}.{extensao}" if ponto else f"{nome}.{_digital(conteudo)}"
+
+
+def _tipo(nome: str) -> str:
+    tipo = mimetypes.guess_type(nome)[0] or "application/octet-stream"
+    if tipo == "text/javascript":
+        tipo = "application/javascript"
+    return f"{tipo}; charset=utf-8" if tipo.startswith(("text/", "application/javascript")) else tipo
+
+
+class Estaticos:
+    """Todos os arquivos de uma pasta, por nome (original e com impressão digital)."""
+
+    def __init__(self, pasta: str | Path):
+        self.pasta = Path(pasta)
+        self.ativos: dict[str, Ativo] = {}
+        self.manifesto: dict[str, str] = {}  # nome original -> nome com impressão digital
+        arquivos = sorted(p for p in self.pasta.rglob("*") if p.is_file())
+        html = []
+        for caminho in arquivos:
+            nome = caminho.relative_to(self.pasta).as_posix()
+            if caminho.suffix == ".html":
+                html.append((nome, caminho))
+                continue
+            if caminho.stat().st_size > MAX_MEMORIA:
+                self.ativos[nome] = Ativo(nome, None, tipo=_tipo(nome), cache=REVALIDAR, caminho=caminho)
+                continue
+            conteudo = caminho.read_bytes()
+            digital = _nome_digital(nome, conteudo)
+            self.manifesto[nome] = digital
+            self.ativos[digital] = Ativo(digital, conteudo, tipo=_tipo(nome), cache=IMUTAVEL)
+            self.ativos[nome] = Ativo(nome, conteudo, tipo=_tipo(nome), cache=REVALIDAR)
+        # HTML por último: as referências apontam para os nomes com impressão digital
+        for nome, caminho in html:
+            self.ativos[nome] = Ativo(nome, self.reescrever(caminho.read_bytes()), tipo=_tipo(nome), cache=REVALIDAR)
+
+    def reescrever(self, html: bytes) -> bytes:
+        """Troca ``href``/``src`` locais pelos nomes com impressão digital."""
+
+        def trocar(m: re.Match) -> str:
+            url = m.group("url")
+            barra = "/" if url.startswith("/") else ""
+            digital = self.manifesto.get(url.lstrip("/"))
+            if digital is None or url.startswith("//"):
+                return m.group(0)
+            return f'{m.group("attr")}={m.group("aspas")}{barra}{digital}{m.group("aspas")}'
+
+        return _REFERENCIA.sub(trocar, html.decode("utf-8")).encode("utf-8")
+
+    def obter(self, nome: str) -> Ativo | None:
+        return self.ativos.get(nome.lstrip("/"))
+
+    def gerar(self, destino: str | Path) -> int:
+        """Grava a saída (nomes com impressão digital, ``.gz``/``.br`` e
+        ``manifest.json``) em ``destino``. Retorna quantos arquivos gravou."""
+        destino = Path(destino)
+        gravados = 0
+        for nome, ativo in self.ativos.items():
+            if ativo.conteudo is None:
+                continue
+            alvo = destino / nome
+            alvo.parent.mkdir(parents=True, exist_ok=True)
+            alvo.write_bytes(ativo.conteudo)
+            gravados += 1
+            for codificacao, dados in ativo.variantes.items():
+                alvo.with_name(alvo.name + (".br" if codificacao == "br" else ".gz")).write_bytes(dados)
+                gravados += 1
+        (destino / "manifest.json").write_text(json.dumps(self.manifesto, indent=2), encoding="utf-8")
+        return gravados + 1
+
+
+_estaticos: Estaticos | None = None
+_lock = threading.Lock()
+
+
+def registro(pasta: str | Path) -> Estaticos:
+    """Estáticos do processo (lidos na primeira chamada)."""
+    global _estaticos
+    with _lock:
+        if _estaticos is None:
+            _estaticos = Estaticos(pasta)
+        return _estaticos
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("uso: python -m src.estaticos <pasta web> <destino>")
+        return 2
+    estaticos = Estaticos(argv[0])
+    gravados = estaticos.gerar(argv[1])
+    compressao = "gzip + br" if _brotli() else "gzip (instale 'brotli' para br)"
+    print(f"[estaticos] {gravados} arquivos em {argv[1]} ({compressao})")
+    for original, digital in estaticos.manifesto.items():
+        print(f"  {original} -> {digital}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
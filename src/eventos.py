@@ -0,0 +1,233 @@
+"""Eventos de entrega do provedor (webhook ``/api/events``) gravados em lote.
+
+O Mailjet avisa por webhook o que acontece depois do ``Status: success``:
+``sent``, ``open``, ``click``, ``bounce``, ``blocked``, ``spam`` e ``unsub``,
+um evento por POST ou em arrays (opção "group events"). Aqui:
+
+- ``validar`` faz uma checagem barata de cada evento (tipo conhecido, e-mail
+  com ``@``) e descarta o resto sem derrubar o lote;
+- ``GravadorEventos`` grava por *group commit*: cada requisição entrega os
+  seus eventos a uma thread gravadora e espera a transação que os inclui. Com
+  tráfego baixo é uma transação por requisição; numa rajada, tudo o que chega
+  enquanto uma transação está em andamento vai junto na seguinte (até
+  ``EVENTS_BATCH`` eventos), então não há uma escrita por evento. A resposta
+  200 só sai depois de gravado: se o processo cair antes, o Mailjet reenvia;
+- cada lote atualiza ``DATA_DIR/eventos.sqlite3`` (histórico sem repetidos,
+  já que o Mailjet reenvia, e o último status de cada endereço) e leva para a
+  lista de supressão os bounces permanentes, reclamações de spam e
+  descadastros.
+"""
+import hmac
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from .config import DATA_DIR, EVENTS_BATCH, EVENTS_TOKEN
+from .metricas import EVENTOS
+from . import supressao as _supressao
+
+
+# Status do endereço por tipo de evento do Mailjet
+STATUS = {
+    "sent": "entregue",
+    "open": "aberto",
+    "click": "clicado",
+    "bounce": "bounce",
+    "blocked": "bloqueado",
+    "spam": "reclamacao",
+    "unsub": "descadastro",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    email TEXT NOT NULL,
+    mensagem_id TEXT NOT NULL DEFAULT '',
+    ocorrido_em INTEGER NOT NULL,
+    campanha TEXT,
+    detalhe TEXT,
+    recebido_em REAL NOT NULL,
+    UNIQUE (tipo, email, mensagem_id, ocorrido_em)
+);
+CREATE TABLE IF NOT EXISTS status_contatos (
+    email TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    detalhe TEXT,
+    ocorrido_em INTEGER NOT NULL,
+    atualizado_em REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def autorizado(senha_basic: str | None, token: str | None) -> bool:
+    """Confere o segredo do webhook (senha do Basic Auth ou ``?token=``)."""
+    if not EVENTS_TOKEN:
+        return False
+    return any(
+        valor is not None and hmac.compare_digest(valor.encode("utf-8"), EVENTS_TOKEN.encode("utf-8"))
+        for valor in (senha_basic, token)
+    )
+
+
+def _motivo_supressao(tipo: str, evento: dict) -> str | None:
+    if tipo == "bounce":
+        # só o bounce permanente; o temporário (caixa cheia...) fica só no status
+        return _supressao.BOUNCE if evento.get("hard_bounce") else None
+    if tipo == "spam":
+        return _supressao.RECLAMACAO
+    if tipo == "unsub":
+        return _supressao.DESCADASTRO
+    return None
+
+
+def validar(dados) -> tuple[list[tuple], int]:
+    """Eventos aproveitáveis de um corpo do webhook (objeto ou array).
+
+    Retorna ``(eventos, ignorados)``; cada evento é a tupla
+    ``(tipo, email, mensagem_id, ocorrido_em, campanha, detalhe, motivo_supressao)``.
+    """
+    if isinstance(dados, dict):
+        dados = [dados]
+    elif not isinstance(dados, list):
+        return [], 0
+    agora = int(time.time())
+    eventos, ignorados = [], 0
+    for evento in dados:
+        tipo = evento.get("event") if isinstance(evento, dict) else None
+        email = evento.get("email") if tipo else None
+        if tipo not in STATUS or not isinstance(email, str) or "@" not in email:
+            ignorados += 1
+            continue
+        ocorrido = evento.get("time")
+        detalhe = evento.get("error") or evento.get("error_related_to") or evento.get("url") or None
+        eventos.append((
+            tipo,
+            _supressao.normalizar_email(email),
+            str(evento.get("MessageID") or evento.get("Message_GUID") or ""),
+            ocorrido if isinstance(ocorrido, int) else agora,
+            str(evento.get("CustomCampaign") or evento.get("mj_campaign_id") or "") or None,
+            str(detalhe)[:200] if detalhe else None,
+            _motivo_supressao(tipo, evento),
+        ))
+    if ignorados:
+        EVENTOS.inc(ignorados, tipo="invalido")
+    return eventos, ignorados
+
+
+class GravadorEventos:
+    """Grava os eventos de várias requisições em transações compartilhadas."""
+
+    def __init__(self, caminho: str | Path | None = None, *, lote: int = EVENTS_BATCH, indice=None):
+        self.caminho = str(caminho or Path(DATA_DIR) / "eventos.sqlite3")
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self.lote = max(1, lote)
+        self._indice = indice
+        self._pendentes: deque[tuple[list[tuple], _Pedido]] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self.transacoes = 0
+        # só a thread gravadora usa a conexão
+        con = sqlite3.connect(self.caminho, timeout=30, check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.executescript(_SCHEMA)
+        self._con = con
+
+    def registrar(self, eventos: list[tuple], *, timeout: float = 30.0) -> bool:
+        """Entrega os eventos e espera a transação que os grava. False se não
+        ficou pronto em ``timeout`` segundos (ou se a gravação falhou)."""
+        if not eventos:
+            return True
+        pedido = _Pedido()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._trabalhar, name="eventos", daemon=True)
+                self._thread.start()
+            self._pendentes.append((eventos, pedido))
+            self._cond.notify()
+        return pedido.pronto.wait(timeout) and pedido.ok
+
+    def _trabalhar(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pendentes:
+                    self._cond.wait()
+                # tudo o que chegou durante a transação anterior, até ``lote`` eventos
+                pedidos, total = [], 0
+                while self._pendentes and (not pedidos or total + len(self._pendentes[0][0]) <= self.lote):
+                    eventos, pedido = self._pendentes.popleft()
+                    pedidos.append((eventos, pedido))
+                    total += len(eventos)
+            try:
+                ok = self._gravar([e for eventos, _ in pedidos for e in eventos])
+            except Exception as e:  # a thread gravadora não pode morrer
+                print(f"[Eventos] Erro inesperado ao gravar: {e}")
+                ok = False
+            for _, pedido in pedidos:
+                pedido.ok = ok
+                pedido.pronto.set()
+
+    def _gravar(self, eventos: list[tuple]) -> bool:
+        agora = time.time()
+        try:
+            with self._con:
+                self._con.executemany(
+                    "INSERT OR IGNORE INTO eventos "
+                    "(tipo, email, mensagem_id, ocorrido_em, campanha, detalhe, recebido_em) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [e[:6] + (agora,) for e in eventos],
+                )
+                # último evento de cada endereço (reenvios fora de ordem não voltam o status)
+                self._con.executemany(
+                    "INSERT INTO status_contatos (email, status, detalhe, ocorrido_em, atualizado_em) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (email) DO UPDATE SET status = excluded.status, detalhe = excluded.detalhe, "
+                    "ocorrido_em = excluded.ocorrido_em, atualizado_em = excluded.atualizado_em "
+                    "WHERE excluded.ocorrido_em >= status_contatos.ocorrido_em",
+                    [(e[1], STATUS[e[0]], e[5], e[3], agora) for e in eventos],
+                )
+        except sqlite3.Error as e:
+            print(f"[Eventos] Falha ao gravar {len(eventos)} eventos: {e}")
+            return False
+        self.transacoes += 1
+
+        por_motivo: dict[str, list[str]] = {}
+        for evento in eventos:
+            if evento[6]:
+                por_motivo.setdefault(evento[6], []).append(evento[1])
+        indice = self._indice or _supressao.indice()
+        if por_motivo and indice is not None:
+            try:
+                for motivo, emails in por_motivo.items():
+                    indice.suprimir_varios(emails, motivo)
+            except sqlite3.Error as e:
+                # o Mailjet reenvia; os eventos repetidos são ignorados e a supressão é refeita
+                print(f"[Eventos] Falha ao atualizar a supressão: {e}")
+                return False
+        for tipo, quantidade in Counter(e[0] for e in eventos).items():
+            EVENTOS.inc(quantidade, tipo=tipo)
+        return True
+
+
+class _Pedido:
+    __slots__ = ("pronto", "ok")
+
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.ok = False
+
+
+_gravador: GravadorEventos | None = None
+_lock = threading.Lock()
+
+
+def gravador() -> GravadorEventos:
+    """Gravador compartilhado do processo (criado sob demanda)."""
+    global _gravador
+    with _lock:
+        if _gravador is None:
+            _gravador = GravadorEventos()
+        return _gravador
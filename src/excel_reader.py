@@ -1,52 +1,247 @@
+"""Planilha de contatos da CLI: leitura em streaming e status por journal.
+
+``ler_contatos`` não carrega a planilha: devolve uma ``Planilha`` (o caminho
+e os status ainda não gravados nela). Os contatos saem de
+``contatos.iterar_contatos`` a cada leitura, com memória constante e a mesma
+detecção de colunas da API, sem pandas. ``atualizar_status`` só acrescenta
+uma linha ao journal; ``compactar_status`` regrava a planilha em streaming
+trocando apenas a coluna Status — as demais células, as linhas sem e-mail e
+as outras abas ficam como estão.
+"""
+import atexit
+import csv
+import json
+import os
+import threading
 from pathlib import Path
-import pandas as pd
+
+from .config import STATUS_COMPACT_EVERY
+from .contatos import delimitador_csv, detectar_colunas, formato_arquivo, iterar_contatos
 
 
 _ROOT = Path(__file__).resolve().parents[1]
 _DEFAULT_XLSX = _ROOT / "data" / "contatos.xlsx"
 
+# Planilhas com status ainda não gravados, por arquivo: {caminho: Planilha}
+_pendentes: dict[str, "Planilha"] = {}
+_lock = threading.Lock()
+
+
+class Planilha:
+    """Planilha de contatos em disco e os status registrados desde a última gravação."""
+
+    __slots__ = ("caminho", "status", "alteracoes", "linhas")
+
+    def __init__(self, caminho: str | Path):
+        self.caminho = Path(caminho)
+        self.status: dict[int, str] = {}  # linha -> status ainda não gravado na planilha
+        self.alteracoes = 0  # atualizações desde a última gravação
+        self.linhas = 0  # linhas de dados contadas na última gravação (0 = ainda não gravada)
+
+    def limite_journal(self) -> int:
+        """Atualizações no journal que disparam uma gravação no meio do envio.
+
+        Metade das linhas da planilha (no mínimo ``STATUS_COMPACT_EVERY``): cada
+        regravação, que custa a planilha inteira, é paga por pelo menos esse
+        número de contatos, então o custo por contato fica constante.
+        """
+        return max(STATUS_COMPACT_EVERY, self.linhas // 2)
+
+    def pares(self, *, ignorar_contatados: bool = True):
+        """Pares ``(linha, contato)`` para envio, com os status pendentes aplicados."""
+        for linha, contato in iterar_contatos(self.caminho, ignorar_contatados=False, numerados=True):
+            status = self.status.get(linha)
+            if status is not None:
+                contato["Status"] = status
+            if ignorar_contatados and contato["Status"] == "Contatado":
+                continue
+            yield linha, contato
+
+    def __repr__(self) -> str:
+        return f"Planilha({str(self.caminho)!r}, {len(self.status)} status pendentes)"
 
-def ler_contatos(caminho: str | Path = _DEFAULT_XLSX):
-    """Lê a planilha de contatos e retorna um DataFrame.
+
+def _journal(caminho: str | Path) -> Path:
+    """Arquivo de journal (append-only) ao lado da planilha: contatos.xlsx.status.jsonl"""
+    caminho = Path(caminho)
+    return caminho.with_name(caminho.name + ".status.jsonl")
+
+
+def _aplicar_journal(planilha: Planilha) -> int:
+    """Carrega os status registrados no journal (o último vence)."""
+    journal = _journal(planilha.caminho)
+    if not journal.exists():
+        return 0
+    aplicados = 0
+    with open(journal, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                item = json.loads(linha)
+                planilha.status[int(item["i"])] = str(item["s"])
+            except (ValueError, KeyError, TypeError):
+                # última linha truncada por um crash no meio da escrita
+                continue
+            aplicados += 1
+    return aplicados
+
+
+def _criar_template(caminho: Path):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Nome", "E-mail", "Empresa", "Status"])
+    ws.append(["Exemplo Nome", "exemplo@dominio.com", "(opcional)", "Aguardando"])
+    wb.save(caminho)
+
+
+def ler_contatos(caminho: str | Path = _DEFAULT_XLSX) -> Planilha:
+    """Abre a planilha de contatos (.xlsx, .csv ou .tsv) e retorna uma ``Planilha``.
 
     Se o arquivo não existir, cria um template com colunas mínimas e
-    instruções, e levanta um erro amigável para o usuário preencher.
+    instruções, e levanta um erro amigável para o usuário preencher. O
+    cabeçalho é conferido aqui (``PlanilhaInvalida`` sem coluna de e-mail);
+    as linhas só são lidas por ``contatos_para_envio``.
+
+    Status registrados no journal (ver ``atualizar_status``) e ainda não
+    gravados na planilha — por exemplo, após um crash — voltam a valer e são
+    gravados na próxima ``compactar_status``.
     """
     caminho = Path(caminho)
     if not caminho.exists():
         caminho.parent.mkdir(parents=True, exist_ok=True)
-        df_template = pd.DataFrame(
-            {
-                "Nome": ["Exemplo Nome"],
-                "E-mail": ["exemplo@dominio.com"],
-                "Empresa": ["(opcional)"],
-                "Status": ["Aguardando"],
-            }
-        )
-        df_template.to_excel(caminho, index=False)
+        _criar_template(caminho)
         raise FileNotFoundError(
             f"Arquivo de contatos não encontrado. Um template foi criado em '{caminho}'. "
             "Abra o arquivo, preencha os contatos e execute novamente."
         )
 
-    df = pd.read_excel(caminho)
+    for _ in iterar_contatos(caminho, limite=1, ignorar_contatados=False):
+        break  # só confere o cabeçalho
+    planilha = Planilha(caminho)
+    if _aplicar_journal(planilha):
+        with _lock:
+            _pendentes[str(caminho.resolve())] = planilha
+    return planilha
+
+
+def contatos_para_envio(planilha: Planilha, *, ignorar_contatados: bool = True):
+    """Pares ``(linha, contato)`` da planilha para envio (ver ``Planilha.pares``).
+
+    Cada contato é um dict de textos com os nomes canônicos de
+    ``iterar_contatos``. Linhas sem e-mail e, com ``ignorar_contatados``, as
+    já contatadas ficam de fora daqui, mas continuam na planilha.
+    """
+    return planilha.pares(ignorar_contatados=ignorar_contatados)
+
+
+def atualizar_status(planilha: Planilha, index, status: str, caminho: str | Path | None = None):
+    """Registra o status da linha ``index`` no journal da planilha.
+
+    Custo O(1) amortizado: a planilha é regravada no fim do envio (quem
+    chama usa ``compactar_status``), na saída do processo e, no meio, só
+    quando o journal passa de ``Planilha.limite_journal``.
+    """
+    caminho = Path(caminho or planilha.caminho)
+    index = int(index)
+    linha = json.dumps({"i": index, "s": status}, ensure_ascii=False)
+    with _lock:
+        with open(_journal(caminho), "a", encoding="utf-8") as f:
+            f.write(linha + "\n")
+        planilha.status[index] = status
+        planilha.alteracoes += 1
+        _pendentes[str(caminho.resolve())] = planilha
+        compactar = planilha.alteracoes >= planilha.limite_journal()
+    if compactar:
+        compactar_status(planilha, caminho)
 
-    # Validação de colunas mínimas
-    required = {"Nome", "E-mail"}
-    missing = required.difference(df.columns)
-    if missing:
-        raise ValueError(
-            "Planilha de contatos inválida. Faltam colunas: " + ", ".join(sorted(missing))
-        )
 
-    # Garante coluna Status existente
-    if "Status" not in df.columns:
-        df["Status"] = "Aguardando"
+def _texto(valor) -> str:
+    return "" if valor is None else str(valor).strip()
 
-    return df
+
+def _com_status(linhas, status: dict[int, str], contagem: dict):
+    """Linhas da planilha com a coluna Status trocada pelos ``status`` (por
+    linha de dados); cria a coluna no fim se o cabeçalho não tem uma.
+    ``contagem["linhas"]`` recebe o número de linhas de dados."""
+    cabecalho = list(next(linhas, ()))
+    _, _, coluna = detectar_colunas([_texto(c) for c in cabecalho])
+    nova = coluna is None
+    if nova:
+        coluna = len(cabecalho)
+        cabecalho.append("Status")
+    yield cabecalho
+    contagem["linhas"] = 0
+    for n, linha in enumerate(linhas):
+        contagem["linhas"] = n + 1
+        novo = status.get(n)
+        if novo is None and not (nova and any(v not in (None, "") for v in linha)):
+            yield linha
+            continue
+        linha = list(linha)
+        if len(linha) <= coluna:
+            linha.extend([None] * (coluna + 1 - len(linha)))
+        linha[coluna] = novo if novo is not None else "Aguardando"
+        yield linha
+
+
+def _regravar_xlsx(origem: Path, destino: Path, status: dict[int, str], contagem: dict) -> None:
+    from openpyxl import Workbook, load_workbook
+
+    # sem data_only: fórmulas continuam fórmulas; valores e tipos como estão
+    wb = load_workbook(origem, read_only=True)
+    saida = Workbook(write_only=True)
+    try:
+        ativa = wb.active.title
+        for ws in wb.worksheets:
+            aba = saida.create_sheet(ws.title)
+            linhas = ws.iter_rows(values_only=True)
+            for linha in _com_status(linhas, status, contagem) if ws.title == ativa else linhas:
+                aba.append(linha)
+        saida.save(destino)
+    finally:
+        wb.close()
+
+
+def _regravar_texto(origem: Path, destino: Path, status: dict[int, str], formato: str, contagem: dict) -> None:
+    with open(origem, encoding="utf-8-sig", newline="") as f, open(destino, "w", encoding="utf-8", newline="") as out:
+        if formato == "tsv":
+            separador = "\t"
+        else:
+            separador = delimitador_csv(f.read(4096))
+            f.seek(0)
+        escritor = csv.writer(out, delimiter=separador, lineterminator="\n")
+        escritor.writerows(_com_status(csv.reader(f, delimiter=separador), status, contagem))
+
+
+def compactar_status(planilha: Planilha, caminho: str | Path | None = None):
+    """Grava os status pendentes na planilha (troca atômica) e descarta o journal.
+
+    A planilha é copiada linha a linha (openpyxl read-only → write-only, ou
+    csv) com memória constante; só a coluna Status muda.
+    """
+    caminho = Path(caminho or planilha.caminho)
+    with _lock:
+        if planilha.status:
+            temporario = caminho.with_name(f".{caminho.name}.tmp")
+            formato = formato_arquivo(caminho)
+            contagem = {}
+            if formato == "xlsx":
+                _regravar_xlsx(caminho, temporario, planilha.status, contagem)
+            else:
+                _regravar_texto(caminho, temporario, planilha.status, formato, contagem)
+            os.replace(temporario, caminho)
+            planilha.linhas = contagem.get("linhas", 0)
+        _journal(caminho).unlink(missing_ok=True)
+        planilha.status.clear()
+        planilha.alteracoes = 0
+        _pendentes.pop(str(caminho.resolve()), None)
 
 
-def atualizar_status(df, index, status: str, caminho: str | Path = _DEFAULT_XLSX):
-    """Atualiza a coluna Status e salva a planilha no disco."""
-    df.at[index, "Status"] = status
-    df.to_excel(caminho, index=False)
+@atexit.register
+def _compactar_pendentes():
+    for chave, planilha in list(_pendentes.items()):
+        try:
+            compactar_status(planilha, chave)
+        except Exception as e:
+            print(f"Falha ao gravar status em '{chave}' (o journal foi mantido): {e}")
@@ -0,0 +1,162 @@
+"""Classificação de falhas de envio, retentativas e disjuntor por provedor.
+
+- ``classificar_smtp`` / ``classificar_http``: separa falhas transitórias
+  (greylisting 4xx, conexão perdida, HTTP 429/5xx) das permanentes (5xx,
+  HTTP 4xx) e marca os sinais de limitação de taxa do provedor
+  (421, 4.7.x, "too many", HTTP 429).
+- ``espera_backoff``: espera exponencial com jitter entre tentativas.
+- ``Disjuntor``: quando o provedor claramente está limitando (vários sinais
+  numa janela curta), pausa todos os envios para ele — inclusive dos outros
+  workers — em vez de insistir e piorar o bloqueio. Sem pausas (serverless),
+  o envio para com ``DisjuntorAberto`` em vez de esperar.
+"""
+import random
+import smtplib
+import threading
+import time
+
+from .agendador import CotaEsgotada
+from .config import RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX, CIRCUIT_THRESHOLD, CIRCUIT_WINDOW, CIRCUIT_PAUSE
+
+
+TRANSITORIA = "transitoria"
+PERMANENTE = "permanente"
+
+# Trechos de resposta que indicam limitação de taxa (Gmail, Outlook, Yahoo...)
+_SINAIS_LIMITE = ("rate limit", "too many", "try again later", "temporarily deferred", "4.7.0", "4.7.28", "4.7.1")
+
+
+class Falha:
+    """Resultado da classificação de uma falha de envio."""
+
+    __slots__ = ("tipo", "codigo", "motivo", "limitacao", "caixa_inexistente")
+
+    def __init__(self, tipo: str, codigo: int | None = None, motivo: str = "", *,
+                 limitacao: bool = False, caixa_inexistente: bool = False):
+        self.tipo = tipo  # TRANSITORIA ou PERMANENTE
+        self.codigo = codigo
+        self.motivo = motivo
+        self.limitacao = limitacao  # o provedor está limitando a taxa
+        self.caixa_inexistente = caixa_inexistente  # 5.1.x: endereço não existe (bounce)
+
+    @property
+    def transitoria(self) -> bool:
+        return self.tipo == TRANSITORIA
+
+
+def _por_codigo(codigo: int, resposta) -> Falha:
+    texto = resposta.decode("utf-8", "replace") if isinstance(resposta, bytes) else str(resposta or "")
+    minusculo = texto.lower()
+    limitacao = codigo == 421 or any(s in minusculo for s in _SINAIS_LIMITE)
+    if 400 <= codigo < 500:
+        return Falha(TRANSITORIA, codigo, texto[:200], limitacao=limitacao)
+    return Falha(
+        PERMANENTE,
+        codigo,
+        texto[:200],
+        caixa_inexistente=codigo in (550, 551, 553) and " 5.1." in f" {texto}",
+    )
+
+
+def classificar_smtp(erro) -> Falha:
+    """Classifica uma exceção do smtplib ou o dict de recusados do ``sendmail``."""
+    if isinstance(erro, dict):
+        # {destinatario: (codigo, resposta)}: vale a pior (permanente vence)
+        falhas = [_por_codigo(codigo, resposta) for codigo, resposta in erro.values()]
+        permanentes = [f for f in falhas if not f.transitoria]
+        return (permanentes or falhas or [Falha(PERMANENTE, motivo="recusado")])[0]
+    if isinstance(erro, smtplib.SMTPRecipientsRefused):
+        return classificar_smtp(erro.recipients)
+    if isinstance(erro, smtplib.SMTPServerDisconnected):
+        return Falha(TRANSITORIA, motivo="conexao_perdida")
+    if isinstance(erro, smtplib.SMTPResponseException):
+        return _por_codigo(erro.smtp_code, erro.smtp_error)
+    if isinstance(erro, (ConnectionError, TimeoutError, OSError)):
+        return Falha(TRANSITORIA, motivo=type(erro).__name__)
+    return Falha(PERMANENTE, motivo=type(erro).__name__)
+
+
+def classificar_http(status: int | None, erro: Exception | None = None) -> Falha:
+    """Classifica a resposta (ou a exceção de rede) de uma chamada HTTP ao provedor."""
+    if status is None:
+        return Falha(TRANSITORIA, motivo=type(erro).__name__ if erro else "sem_resposta")
+    if status == 429:
+        return Falha(TRANSITORIA, status, "HTTP 429", limitacao=True)
+    if status >= 500 or status == 408:
+        return Falha(TRANSITORIA, status, f"HTTP {status}")
+    return Falha(PERMANENTE, status, f"HTTP {status}")
+
+
+def espera_backoff(tentativa: int, base: float = RETRY_BACKOFF_BASE, maximo: float = RETRY_BACKOFF_MAX) -> float:
+    """Espera antes da tentativa seguinte à ``tentativa`` (1, 2...): exponencial com jitter."""
+    teto = min(maximo, base * 2 ** (tentativa - 1))
+    return random.uniform(teto / 2, teto)
+
+
+class DisjuntorAberto(CotaEsgotada):
+    """O provedor está limitando e não dá para esperar a pausa (serverless); o lote deve parar."""
+
+
+class Disjuntor:
+    """Pausa os envios a um provedor após ``limite`` sinais de limitação em ``janela`` segundos.
+
+    A pausa dobra a cada nova abertura seguida (até 15x a pausa base) e volta
+    ao normal após um envio bem sucedido.
+    """
+
+    def __init__(self, nome: str, *, limite: int = CIRCUIT_THRESHOLD, janela: float = CIRCUIT_WINDOW, pausa: float = CIRCUIT_PAUSE):
+        self.nome = nome
+        self.limite = limite
+        self.janela = janela
+        self.pausa = pausa
+        self._sinais: list[float] = []
+        self._aberto_ate = 0.0
+        self._aberturas = 0
+        self._lock = threading.Lock()
+
+    @property
+    def aberto(self) -> bool:
+        return time.monotonic() < self._aberto_ate
+
+    def aguardar(self, pausar: bool = True) -> None:
+        """Bloqueia enquanto o disjuntor estiver aberto. Sem ``pausar``, levanta
+        ``DisjuntorAberto`` (a pausa pode passar do tempo da requisição)."""
+        while True:
+            restante = self._aberto_ate - time.monotonic()
+            if restante <= 0:
+                return
+            if not pausar:
+                raise DisjuntorAberto(f"{self.nome} está limitando os envios; tente de novo em {restante:.0f}s")
+            time.sleep(min(restante, 5.0))
+
+    def registrar_limitacao(self) -> None:
+        if self.limite <= 0:
+            return
+        agora = time.monotonic()
+        with self._lock:
+            self._sinais = [t for t in self._sinais if agora - t < self.janela]
+            self._sinais.append(agora)
+            if len(self._sinais) < self.limite or agora < self._aberto_ate:
+                return
+            self._aberturas += 1
+            pausa = self.pausa * min(2 ** (self._aberturas - 1), 15)
+            self._aberto_ate = agora + pausa
+            self._sinais.clear()
+        print(f"[Disjuntor] {self.nome} está limitando os envios; pausando {pausa:.0f}s.")
+
+    def registrar_sucesso(self) -> None:
+        if self._aberturas:
+            with self._lock:
+                self._aberturas = 0
+
+
+_disjuntores: dict[str, Disjuntor] = {}
+_lock = threading.Lock()
+
+
+def disjuntor(provedor: str) -> Disjuntor:
+    """Disjuntor compartilhado do processo para o provedor (servidor SMTP ou "mailjet")."""
+    with _lock:
+        if provedor not in _disjuntores:
+            _disjuntores[provedor] = Disjuntor(provedor)
+        return _disjuntores[provedor]
@@ -0,0 +1,373 @@
+"""Fila de campanhas em segundo plano (SQLite).
+
+``POST /api/jobs`` grava a campanha e os contatos e responde na hora; um
+worker (thread no processo da API ou ``python -m src.jobs``) drena a fila
+através de ``enviar_em_lote`` e grava o resultado de cada contato assim que
+ele sai. Como o status por contato fica no banco, um job interrompido (crash,
+deploy, cancelamento) é retomado sem reenviar quem já recebeu.
+
+A senha SMTP nunca é gravada no banco: fica só na memória do processo que
+criou o job, e só esse processo o executa. Jobs da conta do ``.env`` (ou da API
+do Mailjet) podem ser executados por qualquer worker, inclusive um
+``python -m src.jobs`` dedicado. Depois de um crash, um job que dependia da
+senha em memória fica ``aguardando_senha`` até um ``resume`` com a senha.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from .config import DATA_DIR, SENHA, SMTP_USER, EMAIL, USE_MAILJET_API, SEND_INTERVAL
+
+
+# Estados do job
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+CANCELADO = "cancelado"
+AGUARDANDO_SENHA = "aguardando_senha"
+FALHOU = "falhou"
+
+# Job "executando" sem batimento há mais que isso é considerado órfão (crash)
+HEARTBEAT_TIMEOUT = 60
+# Intervalo do batimento, gravado por uma thread mesmo com o envio parado em esperas
+HEARTBEAT_INTERVAL = HEARTBEAT_TIMEOUT / 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    cancelar INTEGER NOT NULL DEFAULT 0,
+    requer_senha INTEGER NOT NULL DEFAULT 0,
+    erro TEXT,
+    criado_em REAL NOT NULL,
+    atualizado_em REAL NOT NULL,
+    heartbeat REAL
+);
+CREATE TABLE IF NOT EXISTS job_contatos (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    email TEXT NOT NULL,
+    dados TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Aguardando',
+    atualizado_em REAL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, criado_em);
+"""
+
+
+class FilaJobs:
+    """Armazenamento dos jobs e dos resultados por contato."""
+
+    def __init__(self, caminho: str | Path | None = None):
+        self.caminho = str(caminho or Path(DATA_DIR) / "jobs.sqlite3")
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._senhas: dict[str, str] = {}
+        self._local = threading.local()
+        self._con().executescript(_SCHEMA)
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    # --- criação e consulta -------------------------------------------------
+
+    def criar(self, params: dict, contatos, senha: str | None = None) -> str:
+        """Grava um job novo na fila. ``params`` não deve conter a senha."""
+        job_id = uuid.uuid4().hex
+        agora = time.time()
+        con = self._con()
+        with con:
+            total = 0
+            linhas = []
+            for idx, contato in enumerate(contatos):
+                total += 1
+                linhas.append((job_id, idx, str(contato.get("E-mail", "")), json.dumps(contato, ensure_ascii=False)))
+                if len(linhas) >= 1000:
+                    con.executemany("INSERT INTO job_contatos (job_id, idx, email, dados) VALUES (?, ?, ?, ?)", linhas)
+                    linhas.clear()
+            if linhas:
+                con.executemany("INSERT INTO job_contatos (job_id, idx, email, dados) VALUES (?, ?, ?, ?)", linhas)
+            requer_senha = int(bool(senha) and _senha_do_ambiente(params) is None)
+            con.execute(
+                "INSERT INTO jobs (id, status, params, total, requer_senha, criado_em, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, NA_FILA, json.dumps(params, ensure_ascii=False), total, requer_senha, agora, agora),
+            )
+        if senha:
+            self._senhas[job_id] = senha
+        return job_id
+
+    def obter(self, job_id: str) -> dict | None:
+        """Status do job com contagem por status de contato."""
+        con = self._con()
+        job = con.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            return None
+        contagem = dict(con.execute(
+            "SELECT status, COUNT(*) FROM job_contatos WHERE job_id = ? GROUP BY status", (job_id,)
+        ).fetchall())
+        params = json.loads(job["params"])
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "subject": params.get("subject"),
+            "total": job["total"],
+            "sent_ok": contagem.get("Contatado", 0),
+            "failed": contagem.get("Erro", 0),
+            "pending": contagem.get("Aguardando", 0),
+            "error": job["erro"],
+            "created_at": job["criado_em"],
+            "updated_at": job["atualizado_em"],
+        }
+
+    def resultados(self, job_id: str, *, desde: int = 0, limite: int = 500) -> list[dict]:
+        linhas = self._con().execute(
+            "SELECT idx, email, status FROM job_contatos WHERE job_id = ? AND idx >= ? ORDER BY idx LIMIT ?",
+            (job_id, desde, limite),
+        ).fetchall()
+        return [
+            {"index": r["idx"], "email": r["email"], "success": r["status"] == "Contatado", "status": r["status"]}
+            for r in linhas
+        ]
+
+    # --- controle -----------------------------------------------------------
+
+    def cancelar(self, job_id: str) -> bool:
+        con = self._con()
+        with con:
+            cur = con.execute(
+                "UPDATE jobs SET cancelar = 1, status = CASE WHEN status = ? THEN status ELSE ? END, atualizado_em = ? "
+                "WHERE id = ? AND status IN (?, ?, ?)",
+                (EXECUTANDO, CANCELADO, time.time(), job_id, NA_FILA, EXECUTANDO, AGUARDANDO_SENHA),
+            )
+        return cur.rowcount > 0
+
+    def retomar(self, job_id: str, senha: str | None = None) -> bool:
+        """Recoloca na fila um job cancelado/interrompido; só os pendentes serão enviados."""
+        if senha:
+            self._senhas[job_id] = senha
+        con = self._con()
+        with con:
+            cur = con.execute(
+                "UPDATE jobs SET status = ?, cancelar = 0, erro = NULL, atualizado_em = ? "
+                "WHERE id = ? AND status IN (?, ?, ?)",
+                (NA_FILA, time.time(), job_id, CANCELADO, AGUARDANDO_SENHA, FALHOU),
+            )
+        return cur.rowcount > 0
+
+    def recuperar_orfaos(self) -> int:
+        """Devolve à fila jobs que estavam executando quando o processo morreu."""
+        con = self._con()
+        with con:
+            cur = con.execute(
+                "UPDATE jobs SET status = CASE WHEN requer_senha THEN ? ELSE ? END, atualizado_em = ? "
+                "WHERE status = ? AND (heartbeat IS NULL OR heartbeat < ?)",
+                (AGUARDANDO_SENHA, NA_FILA, time.time(), EXECUTANDO, time.time() - HEARTBEAT_TIMEOUT),
+            )
+        return cur.rowcount
+
+    # --- execução -----------------------------------------------------------
+
+    def _senha(self, job_id: str, params: dict) -> str | None:
+        if job_id in self._senhas:
+            return self._senhas[job_id]
+        return _senha_do_ambiente(params)
+
+    def _reivindicar(self) -> sqlite3.Row | None:
+        """Marca o job mais antigo da fila como executando (atômico entre processos).
+
+        Jobs que dependem de senha em memória só são reivindicados pelo processo que a tem.
+        """
+        proprios = list(self._senhas)
+        filtro = "requer_senha = 0"
+        if proprios:
+            filtro += f" OR id IN ({', '.join('?' * len(proprios))})"
+        con = self._con()
+        with con:
+            con.execute("BEGIN IMMEDIATE")
+            job = con.execute(
+                f"SELECT * FROM jobs WHERE status = ? AND ({filtro}) ORDER BY criado_em LIMIT 1",
+                (NA_FILA, *proprios),
+            ).fetchone()
+            if job is None:
+                return None
+            con.execute(
+                "UPDATE jobs SET status = ?, heartbeat = ?, atualizado_em = ? WHERE id = ?",
+                (EXECUTANDO, time.time(), time.time(), job["id"]),
+            )
+        return job
+
+    def _pendentes(self, job_id: str):
+        """Contatos ainda não entregues, em páginas (memória constante)."""
+        ultimo = -1
+        while True:
+            linhas = self._con().execute(
+                "SELECT idx, dados FROM job_contatos WHERE job_id = ? AND idx > ? AND status != 'Contatado' "
+                "ORDER BY idx LIMIT 500",
+                (job_id, ultimo),
+            ).fetchall()
+            if not linhas:
+                return
+            for r in linhas:
+                ultimo = r["idx"]
+                yield r["idx"], json.loads(r["dados"])
+
+    def _bater(self, job_id: str, parar: threading.Event) -> None:
+        """Grava o batimento do job a cada ``HEARTBEAT_INTERVAL`` até ``parar``.
+
+        Fica fora do laço de resultados: um lote esperando o agendador, a cota
+        horária ou o disjuntor por mais que ``HEARTBEAT_TIMEOUT`` não pode
+        parecer órfão (outro worker o devolveria à fila e reenviaria contatos).
+        """
+        while not parar.wait(HEARTBEAT_INTERVAL):
+            agora = time.time()
+            try:
+                con = self._con()
+                with con:
+                    con.execute(
+                        "UPDATE jobs SET heartbeat = ?, atualizado_em = ? WHERE id = ? AND status = ?",
+                        (agora, agora, job_id, EXECUTANDO),
+                    )
+            except sqlite3.Error as e:
+                print(f"[jobs] Falha ao gravar o batimento de {job_id}: {e}")
+
+    def _finalizar(self, job_id: str, status: str, erro: str | None = None) -> None:
+        con = self._con()
+        with con:
+            con.execute(
+                "UPDATE jobs SET status = ?, erro = ?, atualizado_em = ? WHERE id = ?",
+                (status, erro, time.time(), job_id),
+            )
+        if status in {CONCLUIDO, CANCELADO}:
+            self._senhas.pop(job_id, None)
+
+    def executar_proximo(self) -> bool:
+        """Executa o próximo job da fila. Retorna False se a fila estava vazia."""
+        # Import tardio: o worker só carrega o motor de envio quando há trabalho
+        from .email_sender import enviar_em_lote
+
+        job = self._reivindicar()
+        if job is None:
+            return False
+        job_id = job["id"]
+        params = json.loads(job["params"])
+        senha = self._senha(job_id, params)
+        if senha is None:
+            print(f"[jobs] {job_id}: senha SMTP indisponível após reinício; aguardando /resume.")
+            self._finalizar(job_id, AGUARDANDO_SENHA, "Senha SMTP não está em memória; reenvie em /resume.")
+            return True
+
+        print(f"[jobs] Iniciando job {job_id} ({job['total']} contatos)")
+        con = self._con()
+        interrompido: list[str] = []
+        lote = enviar_em_lote(
+            self._pendentes(job_id),
+            params["subject"],
+            params["text_template"],
+            intervalo=params.get("interval", SEND_INTERVAL),
+            html_template=params.get("html_template"),
+            smtp_user=params.get("smtp_user"),
+            smtp_pass=senha,
+            smtp_server=params.get("smtp_server"),
+            smtp_port=params.get("smtp_port"),
+            from_email=params.get("from_email"),
+            from_name=params.get("from_name"),
+            reply_to=params.get("reply_to"),
+            workers=params.get("workers", 1),
+            indexados=True,
+            interrompido=interrompido,
+        )
+        parar_batimento = threading.Event()
+        threading.Thread(
+            target=self._bater, args=(job_id, parar_batimento), name=f"job-{job_id[:8]}-batimento", daemon=True
+        ).start()
+        try:
+            for idx, sucesso, _email in lote:
+                with con:
+                    con.execute(
+                        "UPDATE job_contatos SET status = ?, atualizado_em = ? WHERE job_id = ? AND idx = ?",
+                        ("Contatado" if sucesso else "Erro", time.time(), job_id, idx),
+                    )
+                (cancelar,) = con.execute("SELECT cancelar FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if cancelar:
+                    lote.close()
+                    print(f"[jobs] Job {job_id} cancelado.")
+                    self._finalizar(job_id, CANCELADO)
+                    return True
+        except Exception as e:
+            print(f"[jobs] Job {job_id} falhou: {e}")
+            self._finalizar(job_id, FALHOU, str(e))
+            return True
+        finally:
+            parar_batimento.set()
+        if interrompido:
+            # cota esgotada: os pendentes continuam "Aguardando" e o job pode ser retomado
+            print(f"[jobs] Job {job_id} interrompido: {interrompido[0]}")
+            self._finalizar(job_id, FALHOU, interrompido[0])
+            return True
+        self._finalizar(job_id, CONCLUIDO)
+        print(f"[jobs] Job {job_id} concluído.")
+        return True
+
+    def trabalhar(self, *, parar: threading.Event | None = None, espera: float = 2.0) -> None:
+        """Laço do worker: drena a fila até ``parar`` ser sinalizado."""
+        parar = parar or threading.Event()
+        self.recuperar_orfaos()
+        while not parar.is_set():
+            try:
+                ocupado = self.executar_proximo()
+            except Exception as e:
+                print(f"[jobs] Erro no worker: {e}")
+                ocupado = False
+            if not ocupado:
+                parar.wait(espera)
+
+
+def _senha_do_ambiente(params: dict) -> str | None:
+    """Senha conhecida por qualquer worker (sem gravá-la no banco)."""
+    if USE_MAILJET_API:
+        return ""
+    if SENHA and params.get("smtp_user") in {SMTP_USER, EMAIL}:
+        return SENHA
+    return None
+
+
+_fila: FilaJobs | None = None
+_worker: threading.Thread | None = None
+_lock = threading.Lock()
+
+
+def fila() -> FilaJobs:
+    """Fila compartilhada do processo (criada sob demanda)."""
+    global _fila
+    with _lock:
+        if _fila is None:
+            _fila = FilaJobs()
+        return _fila
+
+
+def iniciar_worker() -> None:
+    """Sobe (uma vez) a thread de worker no processo atual."""
+    global _worker
+    f = fila()
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=f.trabalhar, name="jobs-worker", daemon=True)
+            _worker.start()
+
+
+if __name__ == "__main__":
+    # Worker dedicado: python -m src.jobs
+    print(f"[jobs] Worker drenando {fila().caminho}")
+    fila().trabalhar()
@@ -0,0 +1,203 @@
+"""Cliente da API HTTP v3.1 do Mailjet.
+
+Reaproveita uma ``requests.Session`` (keep-alive) por thread e permite enviar
+várias mensagens numa única chamada a ``/v3.1/send``: as partes comuns
+(remetente, assunto, headers, anexos) vão uma só vez em ``Globals`` e o
+resultado de cada mensagem é devolvido na mesma ordem do envio.
+
+Docs: https://dev.mailjet.com/email/guides/send-api-v31/
+"""
+import threading
+import time
+from pathlib import Path
+
+from .anexos import cache as cache_anexos
+from .config import MAILJET_API_KEY, MAILJET_API_SECRET, MAILJET_API_URL, MAILJET_BATCH_SIZE, SEND_RETRIES, LIST_UNSUBSCRIBE, LIST_UNSUBSCRIBE_URL, TEXT_ONLY, DEBUG_SMTP
+from .falhas import DisjuntorAberto, classificar_http, disjuntor, espera_backoff
+from .metricas import ENVIOS, FASES
+from .supressao import list_unsubscribe
+
+
+API_URL = MAILJET_API_URL
+# Limite da própria API: no máximo 50 mensagens por chamada
+MAX_MENSAGENS = 50
+
+_local = threading.local()
+
+
+def _sessao(auth: tuple[str, str] | None = None) -> "requests.Session":
+    """Sessão HTTP persistente da thread atual para as chaves ``auth``
+    (padrão: as do .env). Session não é thread-safe."""
+    import requests  # só quem envia pela API paga a importação
+
+    auth = auth or (MAILJET_API_KEY, MAILJET_API_SECRET)
+    sessoes = getattr(_local, "sessoes", None)
+    if sessoes is None:
+        sessoes = _local.sessoes = {}
+    sessao = sessoes.get(auth)
+    if sessao is None:
+        sessao = sessoes[auth] = requests.Session()
+        sessao.auth = auth
+    return sessao
+
+
+def configurado(auth: tuple[str, str] | None = None) -> bool:
+    chave, segredo = auth or (MAILJET_API_KEY, MAILJET_API_SECRET)
+    if not chave or not segredo:
+        print("[Mailjet API] MAILJET_API_KEY/MAILJET_API_SECRET não configurados.")
+        return False
+    return True
+
+
+def tamanho_lote() -> int:
+    return max(1, min(MAX_MENSAGENS, MAILJET_BATCH_SIZE))
+
+
+def montar_anexos(anexos: list[str | Path] | None) -> list[dict]:
+    return [
+        {
+            "ContentType": anexo.ctype,
+            "Filename": anexo.nome,
+            "Base64Content": anexo.base64,
+        }
+        for anexo in cache_anexos.obter_varios(anexos)
+    ]
+
+
+def montar_globais(
+    assunto: str,
+    anexos: list[str | Path] | None = None,
+    *,
+    from_email: str,
+    from_name: str | None,
+    reply_to: str | None,
+) -> dict:
+    """Partes comuns a todas as mensagens de um lote (campo ``Globals``)."""
+    globais = {
+        "From": {
+            "Email": from_email,
+            "Name": (from_name or "").strip() or from_email,
+        },
+        "Subject": assunto,
+    }
+    headers = {}
+    if reply_to:
+        headers["Reply-To"] = reply_to
+    if LIST_UNSUBSCRIBE_URL:
+        headers["List-Unsubscribe-Post"] = "List-Unsubscribe=One-Click"
+    elif LIST_UNSUBSCRIBE:
+        headers["List-Unsubscribe"] = LIST_UNSUBSCRIBE
+    if headers:
+        globais["Headers"] = headers
+    attachments = montar_anexos(anexos)
+    if attachments:
+        globais["Attachments"] = attachments
+    return globais
+
+
+def montar_mensagem(destino: str, corpo: str, html: str | None = None) -> dict:
+    """Parte específica de um destinatário."""
+    msg = {
+        "To": [{"Email": destino}],
+        "TextPart": corpo or "",
+    }
+    if html and not TEXT_ONLY:
+        msg["HTMLPart"] = html
+    if LIST_UNSUBSCRIBE_URL:
+        msg["Headers"] = {"List-Unsubscribe": list_unsubscribe(destino)}
+    return msg
+
+
+def _post(payload: dict, tentativas: int, auth: tuple[str, str] | None = None, pausar: bool = True):
+    """POST na API com retentativa (backoff) em 429, 5xx e erros de rede.
+    Devolve a última resposta ou levanta a última exceção de rede (ou
+    ``DisjuntorAberto``, sem ``pausar``)."""
+    import requests
+
+    # Um disjuntor por conta: uma chave limitada não pausa as outras
+    provedor = disjuntor(f"mailjet:{auth[0]}" if auth else "mailjet")
+    for tentativa in range(1, max(1, tentativas) + 1):
+        provedor.aguardar(pausar)
+        resp = erro = None
+        try:
+            with FASES.medir(fase="mailjet_http"):
+                resp = _sessao(auth).post(API_URL, json=payload, timeout=30)
+        except requests.RequestException as e:
+            erro = e
+        status = resp.status_code if resp is not None else None
+        falha = classificar_http(status, erro) if status is None or status == 429 or status >= 500 else None
+        if falha is None:
+            provedor.registrar_sucesso()
+            return resp
+        if falha.limitacao:
+            provedor.registrar_limitacao()
+        if tentativa >= tentativas:
+            break
+        espera = espera_backoff(tentativa)
+        print(f"[Mailjet API] Falha temporária ({falha.codigo or falha.motivo}); nova tentativa em {espera:.0f}s")
+        ENVIOS.inc(len(payload["Messages"]), resultado="retentado", motivo=str(falha.codigo or falha.motivo))
+        time.sleep(espera)
+    if erro is not None:
+        raise erro
+    return resp
+
+
+def enviar_mensagens(
+    globais: dict,
+    mensagens: list[dict],
+    *,
+    tentativas: int = SEND_RETRIES,
+    auth: tuple[str, str] | None = None,
+    pausar: bool = True,
+) -> list[bool]:
+    """Envia até ``MAX_MENSAGENS`` mensagens numa única chamada.
+
+    Retorna uma lista de sucesso por mensagem, alinhada com ``mensagens``.
+    Chamadas com HTTP 429/5xx ou erro de rede são repetidas até
+    ``tentativas`` vezes (ver ``falhas``). ``auth`` = (chave, segredo) de
+    outra conta (pool de remetentes); padrão: as chaves do .env. Sem
+    ``pausar``, um disjuntor aberto levanta ``DisjuntorAberto`` em vez de esperar.
+    """
+    if not mensagens:
+        return []
+    payload = {"Globals": globais, "Messages": mensagens}
+    try:
+        resp = _post(payload, tentativas, auth, pausar)
+        if DEBUG_SMTP:
+            print(f"[Mailjet API] Status: {resp.status_code} Body: {resp.text[:500]}")
+        # Em lotes, um 400 ainda traz o Status de cada mensagem no corpo
+        try:
+            data = resp.json()
+        except ValueError:
+            resp.raise_for_status()
+            raise
+        resultados = data.get("Messages") if isinstance(data, dict) else None
+        if not resultados:
+            resp.raise_for_status()
+            print("[Mailjet API] Resposta sem 'Messages'.")
+            ENVIOS.inc(len(mensagens), resultado="falhou", motivo="mailjet_resposta")
+            return [False] * len(mensagens)
+        if len(resultados) != len(mensagens):
+            print(f"[Mailjet API] Resposta com {len(resultados)} itens para {len(mensagens)} mensagens: {data}")
+            ENVIOS.inc(len(mensagens), resultado="falhou", motivo="mailjet_resposta")
+            return [False] * len(mensagens)
+    except DisjuntorAberto:
+        raise  # nada foi enviado; quem chamou interrompe o lote
+    except Exception as e:
+        print(f"[Mailjet API] Erro na chamada de envio ({len(mensagens)} mensagens): {e}")
+        ENVIOS.inc(len(mensagens), resultado="falhou", motivo=type(e).__name__)
+        return [False] * len(mensagens)
+
+    sucessos = []
+    for msg, resultado in zip(mensagens, resultados):
+        destino = msg["To"][0]["Email"]
+        status = str(resultado.get("Status") or "").lower()
+        if status == "success":
+            print(f"E-mail enviado para {destino} via Mailjet API")
+            ENVIOS.inc(resultado="enviado", motivo="mailjet")
+            sucessos.append(True)
+        else:
+            print(f"[Mailjet API] Envio não confirmado para {destino}: {resultado.get('Errors') or resultado}")
+            ENVIOS.inc(resultado="falhou", motivo="mailjet_status")
+            sucessos.append(False)
+    return sucessos
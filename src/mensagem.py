@@ -0,0 +1,128 @@
+"""Esqueleto MIME pré-montado para envios em lote.
+
+Numa campanha só o destinatário e o corpo mudam de uma mensagem para outra.
+``EsqueletoMensagem`` serializa uma vez os headers comuns (From, Subject,
+Reply-To, List-Unsubscribe...) e os anexos; por destinatário, apenas o header
+``To`` e a parte ``multipart/alternative`` com o texto/HTML são gerados.
+"""
+import re
+from email import base64mime
+from email.generator import Generator
+from email.policy import SMTP
+from email.utils import formataddr
+
+from .anexos import Anexo
+from .config import LIST_UNSUBSCRIBE, LIST_UNSUBSCRIBE_URL, TEXT_ONLY
+from .supressao import list_unsubscribe
+
+
+def _header(nome: str, valor: str) -> bytes:
+    return SMTP.fold_binary(*SMTP.header_store_parse(nome, valor))
+
+
+_NAO_DIVULGADOS = b"To: undisclosed-recipients:;\r\n"
+_QUEBRAS = re.compile(r"\r\n|\r|\n")
+
+
+def _parte_texto(texto: str, subtipo: str) -> bytes:
+    """Parte ``text/<subtipo>`` com os mesmos bytes de ``MIMEText(texto, subtipo)``
+    (us-ascii 7bit ou utf-8 base64), sem passar pelo ``email.generator``."""
+    try:
+        dados = _QUEBRAS.sub("\r\n", texto).encode("ascii")
+        charset, codificacao = "us-ascii", "7bit"
+    except UnicodeEncodeError:
+        dados = base64mime.body_encode(texto.encode("utf-8"), eol="\r\n").encode("ascii")
+        charset, codificacao = "utf-8", "base64"
+    return (
+        f'Content-Type: text/{subtipo}; charset="{charset}"\r\n'
+        f"MIME-Version: 1.0\r\n"
+        f"Content-Transfer-Encoding: {codificacao}\r\n\r\n"
+    ).encode("ascii") + dados
+
+
+class EsqueletoMensagem:
+    """Partes constantes de uma mensagem (headers comuns + anexos), já em bytes."""
+
+    def __init__(
+        self,
+        assunto: str,
+        anexos: list[Anexo] | None = None,
+        *,
+        from_email: str,
+        from_name: str | None,
+        reply_to: str | None,
+    ):
+        self.from_email = from_email
+        self._boundary = Generator._make_boundary()
+        display_from = formataddr(((from_name or '').strip(), from_email)) if from_name else from_email
+        headers = [
+            ("MIME-Version", "1.0"),
+            ("Content-Type", f'multipart/mixed; boundary="{self._boundary}"'),
+            ("From", display_from),
+            ("Subject", assunto),
+        ]
+        if reply_to:
+            headers.append(("Reply-To", reply_to))
+        if LIST_UNSUBSCRIBE_URL:
+            # o List-Unsubscribe traz o endereço e vai por destinatário (RFC 8058)
+            headers.append(("List-Unsubscribe-Post", "List-Unsubscribe=One-Click"))
+        elif LIST_UNSUBSCRIBE:
+            headers.append(("List-Unsubscribe", LIST_UNSUBSCRIBE))
+        self._cabecalho = b"".join(_header(nome, valor) for nome, valor in headers)
+
+        delimitador = f"--{self._boundary}\r\n".encode("ascii")
+        self._delimitador = delimitador
+        self._anexos = b"".join(
+            delimitador + anexo.parte_mime().as_bytes(policy=SMTP) + b"\r\n"
+            for anexo in (anexos or [])
+        )
+        self._fim = f"--{self._boundary}--\r\n".encode("ascii")
+        # multipart/alternative montado à mão (o email.generator domina o custo por mensagem)
+        self._boundary_alt = Generator._make_boundary()
+        self._cabecalho_alt = (
+            f'Content-Type: multipart/alternative;\r\n boundary="{self._boundary_alt}"\r\n'
+            "MIME-Version: 1.0\r\n\r\n"
+        ).encode("ascii")
+        # Corpo renderizado mais recente (reaproveitado quando o texto não é personalizado)
+        self._ultimo_corpo: tuple | None = None
+
+    def _alternativa(self, corpo: str, html: str | None) -> bytes:
+        chave = (corpo, html)
+        ultimo = self._ultimo_corpo
+        if ultimo is not None and ultimo[0] == chave:
+            return ultimo[1]
+        partes = [_parte_texto(corpo, "plain")]
+        if html and not TEXT_ONLY:
+            partes.append(_parte_texto(html, "html"))
+        delimitador = f"--{self._boundary_alt}".encode("ascii")
+        if any(delimitador in parte for parte in partes):
+            raise ValueError("Boundary MIME colidiu com o conteúdo da mensagem")
+        dados = b"".join(
+            [self._cabecalho_alt]
+            + [delimitador + b"\r\n" + parte + b"\r\n" for parte in partes]
+            + [delimitador + b"--\r\n"]
+        )
+        self._ultimo_corpo = (chave, dados)
+        return dados
+
+    def renderizar(self, destino: str | None, corpo: str, html: str | None = None) -> bytes:
+        """Mensagem completa (RFC 5322, CRLF) pronta para ``sendmail``.
+
+        Sem ``destino`` (envio coletivo, vários RCPT) o header é
+        ``To: undisclosed-recipients:;`` e nenhum destinatário aparece.
+        """
+        alternativa = self._alternativa(corpo, html)
+        if self._boundary.encode("ascii") in alternativa:
+            # Colisão (praticamente impossível) do boundary aleatório com o conteúdo
+            raise ValueError("Boundary MIME colidiu com o conteúdo da mensagem")
+        return b"".join((
+            self._cabecalho,
+            _header("To", destino) if destino else _NAO_DIVULGADOS,
+            _header("List-Unsubscribe", list_unsubscribe(destino)) if LIST_UNSUBSCRIBE_URL and destino else b"",
+            b"\r\n",
+            self._delimitador,
+            alternativa,
+            b"\r\n",
+            self._anexos,
+            self._fim,
+        ))
@@ -0,0 +1,138 @@
+"""Métricas do caminho de envio (contadores e histogramas em memória).
+
+Sem dependências: o formato de texto do Prometheus é gerado aqui mesmo e
+exposto em ``/api/metrics``. Os valores são por processo e recomeçam a cada
+reinício.
+
+Fases cronometradas (``FASES``, rótulo ``fase``):
+
+- ``conexao``, ``starttls``, ``login``: handshake SMTP;
+- ``montagem``: renderização da mensagem MIME;
+- ``transmissao``: MAIL/RCPT/DATA até a resposta do servidor;
+- ``mailjet_http``: ida e volta da chamada à API do Mailjet;
+- ``planilha``: leitura completa do arquivo de contatos.
+
+Envios (``ENVIOS``, rótulos ``resultado`` e ``motivo``): ``enviado``,
+``falhou``, ``pulado`` e ``retentado``.
+
+Eventos do webhook (``EVENTOS``, rótulo ``tipo``): os tipos do Mailjet
+(``sent``, ``bounce``, ``spam``...) e ``invalido`` para os descartados.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites dos baldes (segundos): de 1 ms a 1 min
+BALDES_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registro: list = []
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _rotulos(nomes: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Contador:
+    """Contador monotônico com rótulos."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._valores: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        _registro.append(self)
+
+    def inc(self, valor: float = 1, **rotulos) -> None:
+        chave = tuple(str(rotulos.get(n, "")) for n in self.rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valor(self, **rotulos) -> float:
+        return self._valores.get(tuple(str(rotulos.get(n, "")) for n in self.rotulos), 0)
+
+    def exportar(self) -> list[str]:
+        with self._lock:
+            itens = sorted(self._valores.items())
+        return [f"{self.nome}{_rotulos(self.rotulos, chave)} {valor:g}" for chave, valor in itens]
+
+
+class Histograma:
+    """Histograma cumulativo (baldes fixos, soma e contagem) com rótulos."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = (), baldes: tuple = BALDES_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.baldes = tuple(sorted(baldes))
+        self._series: dict[tuple, list] = {}  # chave -> [contagens por balde..., soma, total]
+        self._lock = threading.Lock()
+        _registro.append(self)
+
+    def observar(self, valor: float, **rotulos) -> None:
+        chave = tuple(str(rotulos.get(n, "")) for n in self.rotulos)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [0] * len(self.baldes) + [0.0, 0]
+            for i, limite in enumerate(self.baldes):
+                if valor <= limite:
+                    serie[i] += 1
+                    break
+            serie[-2] += valor
+            serie[-1] += 1
+
+    @contextmanager
+    def medir(self, **rotulos):
+        """Cronometra o bloco (o tempo conta mesmo se ele levantar exceção)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def contagem(self, **rotulos) -> int:
+        serie = self._series.get(tuple(str(rotulos.get(n, "")) for n in self.rotulos))
+        return serie[-1] if serie else 0
+
+    def exportar(self) -> list[str]:
+        with self._lock:
+            itens = sorted((chave, list(serie)) for chave, serie in self._series.items())
+        linhas = []
+        for chave, serie in itens:
+            acumulado = 0
+            for limite, qtd in zip(self.baldes, serie):
+                acumulado += qtd
+                le = 'le="%g"' % limite
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, chave, le)} {acumulado}")
+            le = 'le="+Inf"'
+            linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, chave, le)} {serie[-1]}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {serie[-2]:.6f}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, chave)} {serie[-1]}")
+        return linhas
+
+
+def exportar() -> str:
+    """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)."""
+    linhas = []
+    for metrica in _registro:
+        linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+        linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+        linhas.extend(metrica.exportar())
+    return "\n".join(linhas) + "\n"
+
+
+FASES = Histograma("email_sender_fase_segundos", "Duração de cada fase do envio, em segundos.", ("fase",))
+ENVIOS = Contador("email_sender_envios_total", "Destinatários processados por resultado e motivo.", ("resultado", "motivo"))
+EVENTOS = Contador("email_sender_eventos_total", "Eventos de entrega recebidos pelo webhook, por tipo.", ("tipo",))
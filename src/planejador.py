@@ -0,0 +1,125 @@
+"""Planejamento da ordem de envio por domínio do destinatário.
+
+Na ordem da planilha, os envios para um mesmo provedor (gmail.com,
+outlook.com...) ficam espalhados ao acaso e os limites por domínio do
+agendador travam o lote em momentos imprevisíveis. ``PlanoDominios`` agrupa
+os contatos por domínio e os intercala de forma proporcional: um domínio com
+30% da lista ocupa ~30% de qualquer trecho do envio, do início ao fim.
+
+Com um ``Agendador``, os domínios limitados (``DOMAIN_RATE_LIMITS`` /
+``DOMAIN_CONCURRENCY``) que ainda não podem receber são adiados e o próximo
+contato de outro domínio assume a vez, de modo que o lote só espera quando
+todos os domínios pendentes estão no limite.
+
+Uma lista em streaming (gerador de páginas dos jobs, leitura do upload) é
+planejada em janelas de ``GROUP_BY_DOMAIN_WINDOW`` contatos: cada janela é
+agrupada e intercalada antes de a próxima ser lida, então a memória fica
+limitada à janela e não à lista.
+
+Os pares ``(index, row)`` são preservados: os resultados continuam apontando
+para a linha original.
+"""
+import heapq
+from collections import deque
+from itertools import islice
+
+from .config import GROUP_BY_DOMAIN_WINDOW
+from .supressao import normalizar_email
+from .templates import dados_contato
+
+
+def dominio_contato(row) -> str:
+    """Domínio do e-mail do contato (minúsculas; vazio se não houver)."""
+    return normalizar_email(dados_contato(row).get("email", "")).rpartition("@")[2]
+
+
+class _FilaTabela:
+    """Fila de um domínio de uma ``TabelaContatos`` (índices num ``array``)."""
+
+    __slots__ = ("tabela", "posicoes", "proxima")
+
+    def __init__(self, tabela, posicoes):
+        self.tabela = tabela
+        self.posicoes = posicoes
+        self.proxima = 0
+
+    def __len__(self) -> int:
+        return len(self.posicoes) - self.proxima
+
+    def popleft(self):
+        pos = self.posicoes[self.proxima]
+        self.proxima += 1
+        return pos, self.tabela.linha(pos)
+
+
+class PlanoDominios:
+    """Iterável de ``(index, row)`` intercalado por domínio (ver o módulo).
+
+    ``pares`` também pode ser uma ``TabelaContatos``: os domínios vêm da
+    própria tabela e cada fila guarda só os índices das linhas. Outros
+    iteráveis são lidos em janelas de até ``janela`` pares (padrão:
+    ``GROUP_BY_DOMAIN_WINDOW``; 0 = tudo de uma vez).
+    """
+
+    def __init__(self, pares, *, agendador=None, dominio_de=dominio_contato, janela: int | None = None):
+        self.agendador = agendador
+        self._dominio_de = dominio_de
+        self._janela = GROUP_BY_DOMAIN_WINDOW if janela is None else janela
+        self._filas: dict[str, deque] = {}
+        self._pares = None
+        if hasattr(pares, "grupos_dominio"):
+            # TabelaContatos: só os índices por domínio; as linhas saem sob demanda
+            for dominio, posicoes in pares.grupos_dominio().items():
+                self._filas[dominio] = _FilaTabela(pares, posicoes)
+        else:
+            self._pares = iter(pares)
+            self._ler_janela()
+        self._limitados = agendador.dominios_limitados if agendador is not None else set()
+
+    def _ler_janela(self) -> bool:
+        """Agrupa por domínio os próximos pares da entrada. False se ela acabou."""
+        self._filas = {}
+        for i, row in islice(self._pares, self._janela or None):
+            self._filas.setdefault(self._dominio_de(row), deque()).append((i, row))
+        return bool(self._filas)
+
+    def dominios(self) -> dict[str, int]:
+        """Contatos pendentes por domínio (na janela atual), do maior para o menor."""
+        return dict(sorted(((d, len(f)) for d, f in self._filas.items()), key=lambda x: -x[1]))
+
+    def __len__(self) -> int:
+        return sum(len(f) for f in self._filas.values())
+
+    def __iter__(self):
+        while True:
+            yield from self._intercalar()
+            if self._pares is None or not self._ler_janela():
+                return
+
+    def _intercalar(self):
+        # Posição "ideal" do k-ésimo contato de um domínio com n contatos: (k + 0.5) / n
+        heap = []
+        for seq, (dominio, fila) in enumerate(self._filas.items()):
+            heapq.heappush(heap, (0.5 / len(fila), seq, dominio, 0, len(fila)))
+
+        while heap:
+            adiados = []
+            escolhido = None
+            while heap:
+                item = heapq.heappop(heap)
+                dominio = item[2]
+                if dominio not in self._limitados or self.agendador.espera_dominio(dominio) <= 0:
+                    escolhido = item
+                    break
+                adiados.append(item)
+            if escolhido is None:
+                # todos os domínios pendentes estão no limite: vai o que libera primeiro
+                adiados.sort(key=lambda it: (self.agendador.espera_dominio(it[2]), it[0]))
+                escolhido = adiados.pop(0)
+            for item in adiados:
+                heapq.heappush(heap, item)
+
+            chave, seq, dominio, k, n = escolhido
+            yield self._filas[dominio].popleft()
+            if k + 1 < n:
+                heapq.heappush(heap, ((k + 1.5) / n, seq, dominio, k + 1, n))
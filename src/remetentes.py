@@ -0,0 +1,261 @@
+"""Pool de contas remetentes: uma campanha dividida entre várias contas.
+
+A cota de uma conta (``DAILY_LIMIT``) limita a campanha inteira. Com
+``SENDER_POOL`` o lote distribui os contatos entre várias credenciais SMTP
+e/ou chaves do Mailjet, cada uma com peso, ritmo e cotas próprios:
+
+    [
+      {"name": "gmail-1", "smtp_user": "a@gmail.com", "smtp_pass": "$SENHA_A",
+       "smtp_server": "smtp.gmail.com", "weight": 1, "daily_limit": 400},
+      {"name": "mailjet", "mailjet_api_key": "$MJ_KEY", "mailjet_api_secret": "$MJ_SECRET",
+       "from_email": "contato@dominio.com", "weight": 3, "rate_per_minute": 60, "daily_limit": 6000}
+    ]
+
+Valores começando com ``$`` são lidos do ambiente (senhas fora do JSON).
+A escolha é round-robin ponderado; uma conta sai da rotação quando a sua
+cota de 24h acaba (``CotaEsgotada``), quando o disjuntor dela está aberto ou
+depois de ``SENDER_MAX_FAILURES`` falhas seguidas (por ``CIRCUIT_PAUSE`` s).
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .agendador import Agendador, CotaEsgotada
+from .config import SENDER_POOL, SENDER_MAX_FAILURES, CIRCUIT_PAUSE, SMTP_PORT
+from .falhas import DisjuntorAberto, disjuntor
+
+
+SMTP = "smtp"
+MAILJET = "mailjet"
+
+
+class PoolInvalido(ValueError):
+    """Configuração do ``SENDER_POOL`` inválida."""
+
+
+def _valor(item: dict, chave: str, padrao=None):
+    valor = item.get(chave, padrao)
+    if isinstance(valor, str) and valor.startswith("$"):
+        return os.getenv(valor[1:], padrao)
+    return valor
+
+
+class Conta:
+    """Uma conta remetente do pool e o seu estado durante o lote."""
+
+    __slots__ = (
+        "nome", "tipo", "server", "port", "user", "senha", "api_key", "api_secret",
+        "from_email", "from_name", "reply_to", "peso", "por_minuto", "por_hora", "por_dia",
+        "agendador", "falhas", "descanso_ate", "esgotada", "_corrente",
+    )
+
+    def __init__(
+        self,
+        nome: str,
+        tipo: str = SMTP,
+        *,
+        server: str | None = None,
+        port: int | None = None,
+        user: str | None = None,
+        senha: str | None = None,
+        api_key: str | None = None,
+        api_secret: str | None = None,
+        from_email: str | None = None,
+        from_name: str | None = None,
+        reply_to: str | None = None,
+        peso: float = 1.0,
+        por_minuto: float | None = None,
+        por_hora: int | None = None,
+        por_dia: int | None = None,
+    ):
+        self.nome = nome
+        self.tipo = tipo
+        self.server = server
+        self.port = int(port or SMTP_PORT)
+        self.user = user
+        self.senha = senha
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.from_email = from_email or (user if tipo == SMTP else None)
+        self.from_name = from_name
+        self.reply_to = reply_to
+        self.peso = peso
+        self.por_minuto = por_minuto
+        self.por_hora = por_hora
+        self.por_dia = por_dia
+        self.agendador: Agendador | None = None
+        self.falhas = 0  # falhas seguidas
+        self.descanso_ate = 0.0
+        self.esgotada = False
+        self._corrente = 0.0
+
+    @classmethod
+    def de_dict(cls, item: dict, posicao: int = 0) -> "Conta":
+        """Conta a partir de um item do JSON do ``SENDER_POOL``."""
+        if not isinstance(item, dict):
+            raise PoolInvalido(f"Conta {posicao} do pool não é um objeto JSON")
+        tipo = MAILJET if item.get("mailjet_api_key") else SMTP
+        conta = cls(
+            str(item.get("name") or f"conta-{posicao}"),
+            tipo,
+            server=_valor(item, "smtp_server"),
+            port=_valor(item, "smtp_port"),
+            user=_valor(item, "smtp_user"),
+            senha=_valor(item, "smtp_pass"),
+            api_key=_valor(item, "mailjet_api_key"),
+            api_secret=_valor(item, "mailjet_api_secret"),
+            from_email=_valor(item, "from_email"),
+            from_name=_valor(item, "from_name"),
+            reply_to=_valor(item, "reply_to"),
+            peso=float(item.get("weight", 1)),
+            por_minuto=_numero(item, "rate_per_minute", float),
+            por_hora=_numero(item, "hourly_limit", int),
+            por_dia=_numero(item, "daily_limit", int),
+        )
+        faltando = (
+            [c for c in ("smtp_server", "smtp_user", "smtp_pass") if not _valor(item, c)]
+            if tipo == SMTP
+            else [c for c in ("mailjet_api_secret", "from_email") if not _valor(item, c)]
+        )
+        if faltando:
+            raise PoolInvalido(f"Conta '{conta.nome}' do pool sem {', '.join(faltando)}")
+        if conta.peso <= 0:
+            raise PoolInvalido(f"Conta '{conta.nome}' do pool com peso inválido")
+        return conta
+
+    @property
+    def chave_cota(self) -> str:
+        """Identificador da conta na cota persistente (mesmo do envio com uma conta só)."""
+        return f"mailjet:{self.api_key}" if self.tipo == MAILJET else self.user
+
+    @property
+    def auth(self) -> tuple[str, str] | None:
+        return (self.api_key, self.api_secret) if self.tipo == MAILJET else None
+
+    @property
+    def provedor(self) -> str:
+        """Nome do disjuntor da conta (uma conta limitada não pausa as outras)."""
+        return f"mailjet:{self.api_key}" if self.tipo == MAILJET else f"{self.server}:{self.user}"
+
+    def disponivel(self, agora: float) -> bool:
+        return not self.esgotada and agora >= self.descanso_ate and not disjuntor(self.provedor).aberto
+
+
+def _numero(item: dict, chave: str, tipo):
+    valor = _valor(item, chave)
+    if valor in (None, ""):
+        return None
+    try:
+        return tipo(valor)
+    except (TypeError, ValueError):
+        raise PoolInvalido(f"Valor inválido para '{chave}': {valor!r}") from None
+
+
+def carregar(texto: str = SENDER_POOL) -> list[Conta]:
+    """Contas do ``SENDER_POOL`` (JSON ou caminho de um arquivo JSON). Vazio = sem pool."""
+    texto = (texto or "").strip()
+    if not texto:
+        return []
+    if not texto.startswith("["):
+        try:
+            texto = Path(texto).read_text(encoding="utf-8")
+        except OSError as e:
+            raise PoolInvalido(f"Não foi possível ler o SENDER_POOL '{texto}': {e}") from None
+    try:
+        itens = json.loads(texto)
+    except json.JSONDecodeError as e:
+        raise PoolInvalido(f"SENDER_POOL não é um JSON válido: {e}") from None
+    if not isinstance(itens, list):
+        raise PoolInvalido("SENDER_POOL deve ser uma lista de contas")
+    contas = [Conta.de_dict(item, i) for i, item in enumerate(itens)]
+    nomes = [c.nome for c in contas]
+    if len(set(nomes)) != len(nomes):
+        raise PoolInvalido("Nomes de conta repetidos no SENDER_POOL")
+    return contas
+
+
+class PoolRemetentes:
+    """Escolhe a conta de cada envio (round-robin ponderado) e tira da
+    rotação as contas esgotadas ou falhando."""
+
+    def __init__(
+        self,
+        contas: list[Conta],
+        *,
+        intervalo: float = 0,
+        pausar: bool = True,
+        max_falhas: int = SENDER_MAX_FAILURES,
+        descanso: float = CIRCUIT_PAUSE,
+    ):
+        if not contas:
+            raise PoolInvalido("Pool de remetentes sem contas")
+        self.contas = contas
+        self.pausar = pausar
+        self.max_falhas = max_falhas
+        self.descanso = descanso
+        self._lock = threading.Lock()
+        for conta in contas:
+            if conta.agendador is None:
+                conta.agendador = Agendador.para_lote(
+                    intervalo,
+                    conta.chave_cota,
+                    pausar=pausar,
+                    por_minuto=conta.por_minuto,
+                    por_hora=conta.por_hora,
+                    por_dia=conta.por_dia,
+                    dominios=False,
+                )
+
+    def escolher(self) -> Conta:
+        """Próxima conta disponível. Espera se todas estão descansando (sem
+        ``pausar``, levanta ``DisjuntorAberto``); levanta ``CotaEsgotada`` se
+        todas esgotaram a cota."""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                ativas = [c for c in self.contas if not c.esgotada]
+                if not ativas:
+                    raise CotaEsgotada("Cota de 24h esgotada em todas as contas do pool")
+                disponiveis = [c for c in ativas if c.disponivel(agora)]
+                if disponiveis:
+                    # round-robin ponderado suave (sem rajadas da conta mais pesada)
+                    total = sum(c.peso for c in disponiveis)
+                    for c in disponiveis:
+                        c._corrente += c.peso
+                    conta = max(disponiveis, key=lambda c: c._corrente)
+                    conta._corrente -= total
+                    return conta
+                espera = min(max(c.descanso_ate - agora, 0.0) for c in ativas)
+            if not self.pausar:
+                raise DisjuntorAberto("Todas as contas do pool estão em descanso ou limitadas pelo provedor")
+            time.sleep(min(max(espera, 0.5), 5.0))
+
+    def esgotar(self, conta: Conta, motivo: Exception | str = "") -> None:
+        with self._lock:
+            conta.esgotada = True
+        print(f"[Remetentes] Conta '{conta.nome}' fora do lote: {motivo or 'cota esgotada'}")
+
+    def registrar(self, conta: Conta, sucesso: bool) -> None:
+        """Conta falhas seguidas; ``max_falhas`` delas põem a conta em descanso."""
+        with self._lock:
+            if sucesso:
+                conta.falhas = 0
+                return
+            conta.falhas += 1
+            if self.max_falhas <= 0 or conta.falhas < self.max_falhas:
+                return
+            conta.falhas = 0
+            conta.descanso_ate = time.monotonic() + self.descanso
+        print(f"[Remetentes] Conta '{conta.nome}' com {self.max_falhas} falhas seguidas; fora da rotação por {self.descanso:.0f}s.")
+
+
+def padrao(intervalo: float = 0, *, pausar: bool = True) -> PoolRemetentes | None:
+    """Pool do ``SENDER_POOL`` para um lote, ou None se não configurado/inválido."""
+    try:
+        contas = carregar()
+    except PoolInvalido as e:
+        print(f"[Remetentes] {e}; usando só a conta padrão.")
+        return None
+    return PoolRemetentes(contas, intervalo=intervalo, pausar=pausar) if contas else None
@@ -0,0 +1,218 @@
+"""Pool de sessões SMTP autenticadas.
+
+Cada sessão faz EHLO/STARTTLS/EHLO/LOGIN uma única vez e é reutilizada para
+várias mensagens (com RSET entre elas). Se o servidor derrubar a conexão
+(timeout de inatividade, reset), a sessão reconecta de forma transparente.
+"""
+import atexit
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+from .config import DEBUG_SMTP, SMTP_POOL_IDLE, SMTP_STARTTLS
+from .metricas import ENVIOS, FASES
+
+
+# Erros que indicam conexão perdida (vale reconectar e tentar de novo)
+_ERROS_CONEXAO = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def _abortar(smtp: smtplib.SMTP, codigo: int) -> None:
+    """Encerra a transação recusada como o ``sendmail`` (421 = servidor fechando)."""
+    if codigo == 421:
+        smtp.close()
+    else:
+        smtp.rset()
+
+
+def _transacao(smtp: smtplib.SMTP, remetente: str, destinatarios: list[str], dados: bytes) -> dict:
+    """MAIL FROM + um RCPT TO por destinatário + DATA, em pipeline se o servidor
+    anunciar ``PIPELINING`` (RFC 2920). Retorna os recusados; se todos forem
+    recusados, o DATA não é enviado."""
+    smtp.ehlo_or_helo_if_needed()
+    if not smtp.has_extn("pipelining"):
+        try:
+            return smtp.sendmail(remetente, destinatarios, dados)
+        except smtplib.SMTPRecipientsRefused as e:
+            return e.recipients
+    opcoes = f" SIZE={len(dados)}" if smtp.has_extn("size") else ""
+    comandos = [f"MAIL FROM:{smtplib.quoteaddr(remetente)}{opcoes}"]
+    comandos += [f"RCPT TO:{smtplib.quoteaddr(d)}" for d in destinatarios]
+    smtp.send("".join(c + "\r\n" for c in comandos))
+    codigo, resposta = smtp.getreply()
+    respostas = [smtp.getreply() for _ in destinatarios]
+    if codigo != 250:
+        _abortar(smtp, codigo)
+        raise smtplib.SMTPSenderRefused(codigo, resposta, remetente)
+    recusados = {d: r for d, r in zip(destinatarios, respostas) if r[0] not in (250, 251)}
+    if len(recusados) == len(destinatarios):
+        smtp.rset()
+        return recusados
+    codigo, resposta = smtp.data(dados)
+    if codigo != 250:
+        _abortar(smtp, codigo)
+        raise smtplib.SMTPDataError(codigo, resposta)
+    return recusados
+
+
+class SessaoSMTP:
+    """Conexão SMTP autenticada e reutilizável para um conjunto de credenciais."""
+
+    def __init__(self, server: str, port: int, user: str, password: str, *, timeout: int = 60):
+        self.server = server
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.ultimo_uso = time.monotonic()
+        self._smtp: smtplib.SMTP | None = None
+        self._usada = False  # já transmitiu ao menos uma mensagem nesta conexão
+
+    @property
+    def chave(self) -> tuple:
+        return (self.server, self.port, self.user, self.password)
+
+    @property
+    def conectada(self) -> bool:
+        return self._smtp is not None
+
+    def conectar(self) -> None:
+        """Abre a conexão e autentica (handshake completo)."""
+        self.fechar()
+        inicio = time.perf_counter()
+        smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            if DEBUG_SMTP:
+                smtp.set_debuglevel(1)
+            smtp.ehlo()
+            FASES.observar(time.perf_counter() - inicio, fase="conexao")
+            if SMTP_STARTTLS:
+                with FASES.medir(fase="starttls"):
+                    smtp.starttls()
+                    smtp.ehlo()
+            with FASES.medir(fase="login"):
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self._usada = False
+
+    def fechar(self) -> None:
+        """Encerra a conexão (QUIT educado, ignorando falhas)."""
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _preparar(self) -> None:
+        """Garante uma conexão pronta para uma nova transação."""
+        if self._smtp is None:
+            self.conectar()
+            return
+        if self._usada:
+            # RSET limpa o estado da transação anterior e serve de teste de vida
+            try:
+                self._smtp.rset()
+            except _ERROS_CONEXAO:
+                print(f"[SMTP] Conexão com {self.server} perdida; reconectando...")
+                self.conectar()
+
+    def _transmitir(self, envio) -> dict:
+        """Executa ``envio(smtp)`` numa conexão pronta; reconecta uma vez se ela cair."""
+        for tentativa in (1, 2):
+            self._preparar()
+            try:
+                with FASES.medir(fase="transmissao"):
+                    refused = envio(self._smtp)
+            except _ERROS_CONEXAO:
+                self.fechar()
+                if tentativa == 2:
+                    raise
+                print(f"[SMTP] Conexão com {self.server} caiu durante o envio; reconectando...")
+                ENVIOS.inc(resultado="retentado", motivo="conexao_perdida")
+                continue
+            self._usada = True
+            self.ultimo_uso = time.monotonic()
+            return refused
+        return {}
+
+    def enviar(self, msg) -> dict:
+        """Envia uma mensagem (email.message) pela sessão.
+
+        Retorna o dict de destinatários recusados (vazio em sucesso), como
+        ``smtplib.SMTP.send_message``. Reconecta uma vez se a conexão cair.
+        """
+        return self._transmitir(lambda smtp: smtp.send_message(msg))
+
+    def enviar_bruto(self, remetente: str, destinatarios: list[str], dados: bytes) -> dict:
+        """Como ``enviar``, mas com a mensagem já serializada (CRLF) e envelope explícito."""
+        return self._transmitir(lambda smtp: smtp.sendmail(remetente, destinatarios, dados))
+
+    def enviar_varios(self, remetente: str, destinatarios: list[str], dados: bytes) -> dict:
+        """Uma transação com vários ``RCPT TO`` para a mesma mensagem.
+
+        Com ``PIPELINING`` o envelope inteiro vai num único round-trip. Retorna
+        ``{destinatario: (codigo, resposta)}`` dos recusados no RCPT (todos
+        recusados também não levanta exceção).
+        """
+        return self._transmitir(lambda smtp: _transacao(smtp, remetente, destinatarios, dados))
+
+
+class PoolSMTP:
+    """Mantém sessões ociosas por credencial para reuso entre lotes/requisições."""
+
+    def __init__(self, idle: int = SMTP_POOL_IDLE):
+        self.idle = idle
+        self._livres: dict[tuple, list[SessaoSMTP]] = {}
+        self._lock = threading.Lock()
+
+    def obter(self, server: str, port: int, user: str, password: str) -> SessaoSMTP:
+        """Retorna uma sessão ociosa para as credenciais ou cria uma nova (conexão lazy)."""
+        chave = (server, int(port), user, password)
+        expiradas = []
+        sessao = None
+        with self._lock:
+            livres = self._livres.get(chave, [])
+            agora = time.monotonic()
+            while livres:
+                candidata = livres.pop()
+                if agora - candidata.ultimo_uso <= self.idle:
+                    sessao = candidata
+                    break
+                expiradas.append(candidata)
+        for s in expiradas:
+            s.fechar()
+        return sessao or SessaoSMTP(server, port, user, password)
+
+    def devolver(self, sessao: SessaoSMTP) -> None:
+        """Devolve a sessão ao pool (ou fecha, se o reuso estiver desativado)."""
+        if self.idle <= 0 or not sessao.conectada:
+            sessao.fechar()
+            return
+        with self._lock:
+            self._livres.setdefault(sessao.chave, []).append(sessao)
+
+    @contextmanager
+    def sessao(self, server: str, port: int, user: str, password: str):
+        s = self.obter(server, port, user, password)
+        try:
+            yield s
+        finally:
+            self.devolver(s)
+
+    def fechar_todas(self) -> None:
+        with self._lock:
+            todas = [s for livres in self._livres.values() for s in livres]
+            self._livres.clear()
+        for s in todas:
+            s.fechar()
+
+
+# Pool compartilhado pelo processo (CLI e API)
+pool = PoolSMTP()
+atexit.register(pool.fechar_todas)
@@ -0,0 +1,293 @@
+"""Índice persistente de supressão e deduplicação de destinatários (SQLite).
+
+Antes de renderizar cada contato, ``enviar_em_lote`` consulta este índice e
+pula quem:
+
+- descadastrou (``/api/unsubscribe``), deu bounce ou foi suprimido à mão;
+- já recebeu esta mesma campanha (mesmo assunto, por padrão) do mesmo
+  remetente em outro envio (``chave_campanha``);
+- aparece repetido no próprio lote.
+
+As chaves são endereços normalizados (``normalizar_email``). A consulta é uma
+busca pela chave primária; com ``SUPPRESSION_BLOOM`` um filtro de Bloom em
+memória (~1,2 byte por endereço para 1% de falsos positivos) responde "não
+está na lista" sem tocar no disco, que é o caso comum em listas grandes.
+"""
+import hashlib
+import hmac
+import math
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from .config import DATA_DIR, LIST_UNSUBSCRIBE, LIST_UNSUBSCRIBE_URL, SUPPRESSION_BLOOM, UNSUBSCRIBE_SECRET
+
+
+# Motivos de supressão
+DESCADASTRO = "descadastro"
+BOUNCE = "bounce"
+RECLAMACAO = "reclamacao"
+MANUAL = "manual"
+
+# AUTOINCREMENT: um id apagado nunca é reutilizado, então ``atualizar`` (que lê
+# ``id > último lido``) não perde uma supressão gravada depois de um ``remover``
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS supressoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL UNIQUE,
+    motivo TEXT NOT NULL,
+    criado_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS enviados (
+    campanha TEXT NOT NULL,
+    email TEXT NOT NULL,
+    enviado_em REAL NOT NULL,
+    PRIMARY KEY (campanha, email)
+) WITHOUT ROWID;
+"""
+
+
+def normalizar_email(email) -> str:
+    """Chave de comparação: sem espaços, minúsculas e sem ``mailto:``."""
+    email = str(email or "").strip().lower()
+    if email.startswith("mailto:"):
+        email = email[7:]
+    return email.strip("<>")
+
+
+def chave_campanha(remetente: str, campanha: str) -> str:
+    """Chave de deduplicação "já recebeu": a campanha de um remetente (contas
+    diferentes com o mesmo assunto não se bloqueiam)."""
+    return f"{normalizar_email(remetente)}|{campanha}"
+
+
+_segredo: bytes | None = None
+_lock_segredo = threading.Lock()
+
+
+def _segredo_descadastro() -> bytes:
+    """``UNSUBSCRIBE_SECRET`` ou uma chave gerada uma vez em ``DATA_DIR``
+    (em serverless, defina a variável: o disco não sobrevive entre instâncias)."""
+    global _segredo
+    with _lock_segredo:
+        if _segredo is None:
+            if UNSUBSCRIBE_SECRET:
+                _segredo = UNSUBSCRIBE_SECRET.encode("utf-8")
+            else:
+                caminho = Path(DATA_DIR) / "unsubscribe.key"
+                try:
+                    _segredo = caminho.read_bytes()
+                except FileNotFoundError:
+                    caminho.parent.mkdir(parents=True, exist_ok=True)
+                    chave = secrets.token_hex(32).encode("ascii")
+                    try:
+                        fd = os.open(caminho, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                    except FileExistsError:  # outro processo criou antes
+                        _segredo = caminho.read_bytes()
+                    else:
+                        with os.fdopen(fd, "wb") as f:
+                            f.write(chave)
+                        _segredo = chave
+        return _segredo
+
+
+def token_descadastro(email: str) -> str:
+    """HMAC do endereço normalizado: só quem recebeu o link consegue descadastrar."""
+    chave = normalizar_email(email).encode("utf-8")
+    return hmac.new(_segredo_descadastro(), chave, hashlib.sha256).hexdigest()[:32]
+
+
+def verificar_descadastro(email: str, token: str | None) -> bool:
+    return bool(token) and hmac.compare_digest(token.encode("utf-8"), token_descadastro(email).encode("ascii"))
+
+
+def list_unsubscribe(email: str) -> str:
+    """Valor do header ``List-Unsubscribe`` para o destinatário: o link de um
+    clique (``LIST_UNSUBSCRIBE_URL?email=...&token=...``, assinado com
+    ``token_descadastro``) e/ou o ``LIST_UNSUBSCRIBE`` fixo."""
+    partes = []
+    if LIST_UNSUBSCRIBE_URL:
+        separador = "&" if "?" in LIST_UNSUBSCRIBE_URL else "?"
+        email = normalizar_email(email)
+        consulta = urlencode({"email": email, "token": token_descadastro(email)})
+        partes.append(f"<{LIST_UNSUBSCRIBE_URL}{separador}{consulta}>")
+    if LIST_UNSUBSCRIBE:
+        partes.append(LIST_UNSUBSCRIBE)
+    return ", ".join(partes)
+
+
+class FiltroBloom:
+    """Filtro de Bloom simples: sem falsos negativos, ``erro`` de falsos positivos."""
+
+    def __init__(self, capacidade: int, erro: float = 0.01):
+        capacidade = max(1, capacidade)
+        self.capacidade = capacidade
+        self.m = max(64, int(-capacidade * math.log(erro) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacidade * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.itens = 0
+
+    def _posicoes(self, chave: str):
+        # double hashing (Kirsch–Mitzenmacher) a partir de um único blake2b
+        digest = hashlib.blake2b(chave.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.k):
+            yield (h1 + i * h2) % self.m
+
+    def adicionar(self, chave: str) -> None:
+        for p in self._posicoes(chave):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.itens += 1
+
+    def __contains__(self, chave: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._posicoes(chave))
+
+
+_MIGRAR_IDS = """
+BEGIN IMMEDIATE;
+ALTER TABLE supressoes RENAME TO _supressoes_antiga;
+CREATE TABLE supressoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT NOT NULL UNIQUE,
+    motivo TEXT NOT NULL,
+    criado_em REAL NOT NULL
+);
+INSERT INTO supressoes (id, email, motivo, criado_em)
+    SELECT id, email, motivo, criado_em FROM _supressoes_antiga ORDER BY id;
+DROP TABLE _supressoes_antiga;
+COMMIT;
+"""
+
+
+def _migrar(con: sqlite3.Connection) -> None:
+    """Bancos criados antes do AUTOINCREMENT: recria a tabela mantendo os ids."""
+    linha = con.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'supressoes'").fetchone()
+    if linha and "AUTOINCREMENT" not in linha[0].upper():
+        con.executescript(_MIGRAR_IDS)
+
+
+class IndiceSupressao:
+    """Lista de supressão e registro de envios por campanha."""
+
+    def __init__(self, caminho: str | Path | None = None, *, bloom: bool = SUPPRESSION_BLOOM):
+        self.caminho = str(caminho or Path(DATA_DIR) / "supressao.sqlite3")
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._con().executescript(_SCHEMA)
+        _migrar(self._con())
+        self._usar_bloom = bloom
+        self._bloom: FiltroBloom | None = None
+        self._ultimo_id = 0
+        self.atualizar()
+
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    def atualizar(self) -> None:
+        """Carrega no filtro de Bloom as supressões gravadas desde a última
+        carga (inclusive por outros processos). Chamado no início de cada lote."""
+        if not self._usar_bloom:
+            return
+        con = self._con()
+        with self._lock:
+            (total,) = con.execute("SELECT COUNT(*) FROM supressoes").fetchone()
+            if self._bloom is None or total > self._bloom.capacidade:
+                # (re)dimensiona com folga para crescer sem perder precisão
+                self._bloom = FiltroBloom(max(1024, total * 2))
+                self._ultimo_id = 0
+            cursor = con.execute(
+                "SELECT id, email FROM supressoes WHERE id > ? ORDER BY id", (self._ultimo_id,)
+            )
+            for id_, email in cursor:
+                self._bloom.adicionar(email)
+                self._ultimo_id = id_
+
+    # --- supressão ------------------------------------------------------------
+
+    def motivo(self, email: str) -> str | None:
+        """Motivo da supressão do endereço, ou None se ele pode receber."""
+        chave = normalizar_email(email)
+        if self._bloom is not None and chave not in self._bloom:
+            return None
+        linha = self._con().execute("SELECT motivo FROM supressoes WHERE email = ?", (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    def suprimido(self, email: str) -> bool:
+        return self.motivo(email) is not None
+
+    def suprimir(self, email: str, motivo: str = MANUAL) -> bool:
+        """Adiciona o endereço à lista. Retorna False se o endereço é vazio."""
+        return self.suprimir_varios([email], motivo) > 0
+
+    def suprimir_varios(self, emails, motivo: str = MANUAL) -> int:
+        """Adiciona vários endereços numa única transação. Retorna quantos foram gravados."""
+        agora = time.time()
+        chaves = [c for c in (normalizar_email(e) for e in emails) if c]
+        if not chaves:
+            return 0
+        con = self._con()
+        with con:
+            con.executemany(
+                "INSERT INTO supressoes (email, motivo, criado_em) VALUES (?, ?, ?) "
+                "ON CONFLICT (email) DO UPDATE SET motivo = excluded.motivo",
+                [(c, motivo, agora) for c in chaves],
+            )
+        if self._bloom is not None:
+            with self._lock:
+                for c in chaves:
+                    self._bloom.adicionar(c)
+        return len(chaves)
+
+    def remover(self, email: str) -> bool:
+        """Tira o endereço da lista (ex.: pediu para voltar a receber)."""
+        con = self._con()
+        with con:
+            cur = con.execute("DELETE FROM supressoes WHERE email = ?", (normalizar_email(email),))
+        # o filtro de Bloom mantém o bit: vira um falso positivo, resolvido pela consulta ao banco
+        return cur.rowcount > 0
+
+    # --- deduplicação entre envios ------------------------------------------
+
+    def ja_enviado(self, campanha: str, email: str) -> bool:
+        linha = self._con().execute(
+            "SELECT 1 FROM enviados WHERE campanha = ? AND email = ?", (campanha, normalizar_email(email))
+        ).fetchone()
+        return linha is not None
+
+    def registrar_envio(self, campanha: str, email: str) -> None:
+        con = self._con()
+        with con:
+            con.execute(
+                "INSERT OR IGNORE INTO enviados (campanha, email, enviado_em) VALUES (?, ?, ?)",
+                (campanha, normalizar_email(email), time.time()),
+            )
+
+
+_indice: IndiceSupressao | None = None
+_indice_falhou = False
+_lock = threading.Lock()
+
+
+def indice() -> IndiceSupressao | None:
+    """Índice compartilhado do processo (criado sob demanda). None se o banco
+    não puder ser aberto — nesse caso os envios seguem sem supressão."""
+    global _indice, _indice_falhou
+    with _lock:
+        if _indice is None and not _indice_falhou:
+            try:
+                _indice = IndiceSupressao()
+            except (OSError, sqlite3.Error) as e:
+                _indice_falhou = True
+                print(f"[Supressão] Índice indisponível, envios seguem sem supressão: {e}")
+        return _indice
@@ -0,0 +1,317 @@
+"""Tabela de contatos compacta, em colunas, para listas de milhões de linhas.
+
+Uma lista de dicts (ou um DataFrame) gasta centenas de bytes por contato
+em objetos ``str``/``dict``. ``TabelaContatos`` guarda as mesmas linhas em
+poucos buffers:
+
+- textos (nome, parte local do e-mail e as demais colunas da planilha) em
+  UTF-8, concatenados num ``bytearray`` por coluna, com um ``array`` de
+  posições finais;
+- domínio do e-mail como código num ``array``: cada domínio distinto
+  (gmail.com, outlook.com...) existe uma vez só;
+- status como código de 1 byte (``AGUARDANDO``, ``CONTATADO``, ``ERRO`` e
+  qualquer outro texto da planilha, também uma vez só).
+
+Um milhão de contatos típicos ocupa algumas dezenas de MB. As linhas são
+decodificadas sob demanda (``LinhaContato``, um ``Mapping`` com as chaves
+``"Nome"``, ``"E-mail"``, ``"Status"`` e as demais colunas), então
+``enviar_em_lote`` e ``dados_contato`` as tratam como os dicts de
+``iterar_contatos``.
+
+Fatias (``tabela[a:b]``, ``fatias(n)``) e filtros (``filtrar``,
+``pendentes``) são visões que compartilham os buffers; o índice de cada
+linha é sempre a posição dela na tabela original, inclusive nos
+resultados de ``enviar_em_lote``::
+
+    tabela = TabelaContatos.de_planilha("data/contatos.xlsx", ignorar_contatados=False)
+    for i, sucesso, destino in enviar_em_lote(tabela.pendentes(), assunto, texto):
+        tabela.marcar(i, "Contatado" if sucesso else "Erro")
+"""
+from array import array
+from collections.abc import Mapping
+
+from .supressao import normalizar_email
+
+
+AGUARDANDO, CONTATADO, ERRO = 0, 1, 2
+_STATUS = ("Aguardando", "Contatado", "Erro")
+_SEM_ARROBA = 0  # código de domínio dos e-mails sem "@"
+
+
+class _ColunaTexto:
+    """Textos de uma coluna, concatenados em UTF-8."""
+
+    __slots__ = ("dados", "fins")
+
+    def __init__(self, linhas: int = 0):
+        self.dados = bytearray()
+        self.fins = array("I", [0]) * linhas  # linhas anteriores à coluna ficam vazias
+
+    def adicionar(self, texto: str) -> None:
+        if texto:
+            self.dados += texto.encode("utf-8")
+        self.fins.append(len(self.dados))
+
+    def obter(self, pos: int) -> str:
+        fim = self.fins[pos]
+        inicio = self.fins[pos - 1] if pos else 0
+        return self.dados[inicio:fim].decode("utf-8") if fim > inicio else ""
+
+    def memoria(self) -> int:
+        return len(self.dados) + self.fins.itemsize * len(self.fins)
+
+
+class _Codigos:
+    """Valores repetidos (domínios, status) guardados uma vez, com um código por linha."""
+
+    __slots__ = ("valores", "_codigo", "codigos")
+
+    def __init__(self, valores=(), tipo: str = "B"):
+        self.valores: list = list(valores)
+        self._codigo = {v: c for c, v in enumerate(self.valores)}
+        self.codigos = array(tipo)
+
+    def codigo(self, valor) -> int:
+        codigo = self._codigo.get(valor)
+        if codigo is None:
+            codigo = self._codigo[valor] = len(self.valores)
+            self.valores.append(valor)
+            if codigo >= 1 << (8 * self.codigos.itemsize):
+                self.codigos = array("I", self.codigos)
+        return codigo
+
+    def adicionar(self, valor) -> None:
+        self.codigos.append(self.codigo(valor))
+
+    def memoria(self) -> int:
+        return self.codigos.itemsize * len(self.codigos) + sum(len(v or "") + 50 for v in self.valores)
+
+
+class _Armazenamento:
+    """Colunas da tabela original (só cresce; as visões apontam para cá)."""
+
+    __slots__ = ("nomes", "locais", "dominios", "normalizados", "status", "extras")
+
+    def __init__(self):
+        self.nomes = _ColunaTexto()
+        self.locais = _ColunaTexto()
+        self.dominios = _Codigos([None], tipo="H")
+        self.normalizados: list[str] = [""]  # domínio em minúsculas, por código
+        self.status = _Codigos(_STATUS)
+        self.extras: dict[str, _ColunaTexto] = {}
+
+    def __len__(self) -> int:
+        return len(self.locais.fins)
+
+    def adicionar(self, contato: Mapping) -> int:
+        pos = len(self)
+        email = _texto(contato.get("E-mail"))
+        local, arroba, dominio = email.rpartition("@")
+        if arroba:
+            codigo = self.dominios.codigo(dominio)
+            if codigo == len(self.normalizados):
+                self.normalizados.append(normalizar_email("x@" + dominio).rpartition("@")[2])
+            self.dominios.codigos.append(codigo)
+        else:
+            local = email
+            self.dominios.codigos.append(_SEM_ARROBA)
+        self.locais.adicionar(local)
+        self.nomes.adicionar(_texto(contato.get("Nome")))
+        self.status.adicionar(_texto(contato.get("Status")) or _STATUS[AGUARDANDO])
+        for chave, valor in contato.items():
+            if chave not in ("Nome", "E-mail", "Status") and chave not in self.extras:
+                self.extras[chave] = _ColunaTexto(pos)
+        for chave, coluna in self.extras.items():
+            coluna.adicionar(_texto(contato.get(chave)))
+        return pos
+
+    def email(self, pos: int) -> str:
+        local = self.locais.obter(pos)
+        codigo = self.dominios.codigos[pos]
+        return local if codigo == _SEM_ARROBA else f"{local}@{self.dominios.valores[codigo]}"
+
+    def valor(self, pos: int, chave: str) -> str:
+        if chave == "E-mail":
+            return self.email(pos)
+        if chave == "Nome":
+            return self.nomes.obter(pos)
+        if chave == "Status":
+            return self.status.valores[self.status.codigos[pos]]
+        return self.extras[chave].obter(pos)
+
+
+def _texto(valor) -> str:
+    return "" if valor is None else str(valor).strip()
+
+
+class LinhaContato(Mapping):
+    """Um contato da tabela, lido sob demanda (``Mapping`` coluna -> texto)."""
+
+    __slots__ = ("_arm", "indice")
+
+    def __init__(self, arm: _Armazenamento, indice: int):
+        self._arm = arm
+        self.indice = indice
+
+    @property
+    def dominio(self) -> str:
+        """Domínio do e-mail em minúsculas (vazio se não houver)."""
+        return self._arm.normalizados[self._arm.dominios.codigos[self.indice]]
+
+    def __getitem__(self, chave: str) -> str:
+        if chave in ("Nome", "E-mail", "Status") or chave in self._arm.extras:
+            return self._arm.valor(self.indice, chave)
+        raise KeyError(chave)
+
+    def __iter__(self):
+        yield "Nome"
+        yield "E-mail"
+        yield "Status"
+        yield from self._arm.extras
+
+    def __len__(self) -> int:
+        return 3 + len(self._arm.extras)
+
+    def items(self) -> list[tuple[str, str]]:
+        # direto das colunas (o ItemsView do Mapping passaria por __getitem__ chave a chave)
+        arm, pos = self._arm, self.indice
+        itens = [
+            ("Nome", arm.nomes.obter(pos)),
+            ("E-mail", arm.email(pos)),
+            ("Status", arm.status.valores[arm.status.codigos[pos]]),
+        ]
+        itens.extend((chave, coluna.obter(pos)) for chave, coluna in arm.extras.items())
+        return itens
+
+    def __repr__(self) -> str:
+        return f"LinhaContato({self.indice}, {dict(self)!r})"
+
+
+class TabelaContatos:
+    """Contatos em colunas compactas (ver o módulo)."""
+
+    __slots__ = ("_arm", "_linhas")
+
+    def __init__(self, contatos=(), *, _arm: _Armazenamento | None = None, _linhas: array | None = None):
+        self._arm = _arm if _arm is not None else _Armazenamento()
+        self._linhas = _linhas  # None = todas as linhas do armazenamento (tabela original)
+        for contato in contatos:
+            self.adicionar(contato)
+
+    @classmethod
+    def de_planilha(cls, origem, **opcoes) -> "TabelaContatos":
+        """Tabela lida de uma planilha (mesmas opções de ``contatos.iterar_contatos``)."""
+        from .contatos import iterar_contatos
+
+        return cls(iterar_contatos(origem, **opcoes))
+
+    def adicionar(self, contato: Mapping) -> int:
+        """Acrescenta um contato (dict com "E-mail" e, opcionais, "Nome",
+        "Status" e outras colunas). Retorna o índice dele."""
+        if self._linhas is not None:
+            raise TypeError("Não é possível adicionar contatos a uma fatia ou filtro da tabela")
+        return self._arm.adicionar(contato)
+
+    def _posicoes(self):
+        return range(len(self._arm)) if self._linhas is None else self._linhas
+
+    def _visao(self, linhas) -> "TabelaContatos":
+        return TabelaContatos(_arm=self._arm, _linhas=array("I", linhas))
+
+    def __len__(self) -> int:
+        return len(self._arm) if self._linhas is None else len(self._linhas)
+
+    def __iter__(self):
+        arm = self._arm
+        for pos in self._posicoes():
+            yield LinhaContato(arm, pos)
+
+    def __getitem__(self, item):
+        posicoes = self._posicoes()
+        if isinstance(item, slice):
+            return self._visao(posicoes[item])
+        return LinhaContato(self._arm, posicoes[item])
+
+    def linha(self, indice: int) -> LinhaContato:
+        """Linha pelo índice da tabela original."""
+        return LinhaContato(self._arm, indice)
+
+    def pares(self):
+        """Pares ``(índice, linha)``, como ``enviar_em_lote(..., indexados=True)`` espera."""
+        arm = self._arm
+        for pos in self._posicoes():
+            yield pos, LinhaContato(arm, pos)
+
+    def fatias(self, n: int) -> list["TabelaContatos"]:
+        """Divide as linhas em ``n`` fatias contíguas de tamanhos quase iguais."""
+        n = max(1, n)
+        posicoes = self._posicoes()
+        tamanho, resto = divmod(len(posicoes), n)
+        fatias, inicio = [], 0
+        for k in range(n):
+            fim = inicio + tamanho + (k < resto)
+            fatias.append(self._visao(posicoes[inicio:fim]))
+            inicio = fim
+        return fatias
+
+    def filtrar(self, *status: str, exceto: bool = False) -> "TabelaContatos":
+        """Linhas cujo status está (ou, com ``exceto``, não está) em ``status``."""
+        arm = self._arm
+        codigos = {arm.status._codigo[s] for s in status if s in arm.status._codigo}
+        linha_status = arm.status.codigos
+        return self._visao(pos for pos in self._posicoes() if (linha_status[pos] in codigos) != exceto)
+
+    def pendentes(self) -> "TabelaContatos":
+        """Linhas ainda não contatadas."""
+        return self.filtrar(_STATUS[CONTATADO], exceto=True)
+
+    def status(self, indice: int) -> str:
+        return self._arm.valor(indice, "Status")
+
+    def marcar(self, indice: int, status: str) -> None:
+        """Troca o status da linha ``indice`` (índice da tabela original)."""
+        self._arm.status.codigos[indice] = self._arm.status.codigo(status)
+
+    def contagem_status(self) -> dict[str, int]:
+        """Linhas por status."""
+        arm = self._arm
+        contagem = [0] * len(arm.status.valores)
+        codigos = arm.status.codigos
+        for pos in self._posicoes():
+            contagem[codigos[pos]] += 1
+        return {arm.status.valores[c]: n for c, n in enumerate(contagem) if n}
+
+    def grupos_dominio(self) -> dict[str, array]:
+        """Índices das linhas por domínio do e-mail (minúsculas), na ordem da tabela."""
+        arm = self._arm
+        codigos = arm.dominios.codigos
+        por_codigo: dict[int, array] = {}
+        for pos in self._posicoes():
+            codigo = codigos[pos]
+            grupo = por_codigo.get(codigo)
+            if grupo is None:
+                grupo = por_codigo[codigo] = array("I")
+            grupo.append(pos)
+        grupos: dict[str, array] = {}
+        for codigo, posicoes in por_codigo.items():
+            dominio = arm.normalizados[codigo]
+            if dominio in grupos:  # mesmo domínio escrito com maiúsculas diferentes
+                grupos[dominio] = array("I", sorted(grupos[dominio] + posicoes))
+            else:
+                grupos[dominio] = posicoes
+        return grupos
+
+    def colunas(self) -> list[str]:
+        return ["Nome", "E-mail", "Status", *self._arm.extras]
+
+    def memoria(self) -> int:
+        """Bytes aproximados dos buffers (compartilhados entre as visões)."""
+        arm = self._arm
+        total = arm.nomes.memoria() + arm.locais.memoria() + arm.dominios.memoria() + arm.status.memoria()
+        total += sum(c.memoria() for c in arm.extras.values())
+        if self._linhas is not None:
+            total += self._linhas.itemsize * len(self._linhas)
+        return total
+
+    def __repr__(self) -> str:
+        return f"<TabelaContatos {len(self)} contatos>"
@@ -0,0 +1,117 @@
+"""Templates de mensagem compilados.
+
+O texto é analisado uma única vez em uma lista de trechos literais e campos;
+renderizar para um contato é só juntar os trechos com os valores da linha.
+
+Sintaxe:
+- ``{coluna}`` é substituído pelo valor da coluna da planilha (``{nome}``,
+  ``{empresa}``, ``{email}`` ou qualquer coluna extra). O nome é comparado sem
+  diferenciar maiúsculas, espaços, ``-`` e ``_`` (``{E-mail}`` == ``{email}``).
+- ``{{`` e ``}}`` viram ``{`` e ``}`` (como em ``str.format``).
+- Chaves que não formam um campo (ex.: CSS ``body { color: red }``) ou campos
+  sem coluna correspondente ficam como estão no texto.
+"""
+import re
+from functools import lru_cache
+
+
+_TOKEN = re.compile(r"\{\{|\}\}|\{\s*([\w][\w\- ]*?)\s*\}")
+
+# Apelidos aceitos para as colunas principais
+_APELIDOS = {"name": "nome", "mail": "email"}
+
+
+@lru_cache(maxsize=1024)
+def normalizar_coluna(nome) -> str:
+    """Normaliza o nome de uma coluna/campo: minúsculas, sem espaços, ``-`` e ``_``."""
+    return (
+        str(nome)
+        .strip()
+        .lower()
+        .replace("-", "")
+        .replace("_", "")
+        .replace(" ", "")
+    )
+
+
+def _texto(valor) -> str:
+    if valor is None or valor != valor:  # None ou NaN (células vazias no pandas)
+        return ""
+    return str(valor).strip()
+
+
+def dados_contato(row) -> dict[str, str]:
+    """Converte uma linha (dict ou linha de DataFrame) em {coluna_normalizada: texto}."""
+    # ``not row`` é ambíguo numa linha do DataFrame (pandas.Series)
+    if row is None or len(row) == 0:
+        return {}
+    dados = {normalizar_coluna(k): _texto(v) for k, v in row.items()}
+    for apelido, chave in _APELIDOS.items():
+        if apelido in dados and chave not in dados:
+            dados[chave] = dados[apelido]
+    return dados
+
+
+class _Campo:
+    __slots__ = ("chave", "original")
+
+    def __init__(self, chave: str, original: str):
+        self.chave = chave
+        self.original = original
+
+
+class TemplateCompilado:
+    """Template pré-processado; ``renderizar`` custa O(tamanho do texto)."""
+
+    __slots__ = ("fonte", "campos", "_partes")
+
+    def __init__(self, fonte: str):
+        self.fonte = fonte
+        partes: list = []
+        literal: list[str] = []
+        pos = 0
+        for m in _TOKEN.finditer(fonte):
+            literal.append(fonte[pos:m.start()])
+            token = m.group(0)
+            if token == "{{":
+                literal.append("{")
+            elif token == "}}":
+                literal.append("}")
+            else:
+                if literal:
+                    partes.append("".join(literal))
+                    literal = []
+                chave = normalizar_coluna(m.group(1))
+                partes.append(_Campo(_APELIDOS.get(chave, chave), token))
+            pos = m.end()
+        literal.append(fonte[pos:])
+        if any(literal):
+            partes.append("".join(literal))
+        self._partes = tuple(partes)
+        self.campos = frozenset(p.chave for p in partes if isinstance(p, _Campo))
+
+    @property
+    def personalizado(self) -> bool:
+        """True se o texto muda de um contato para outro."""
+        return bool(self.campos)
+
+    def renderizar(self, dados: dict[str, str]) -> str:
+        """Renderiza com os dados de ``dados_contato``. Campos sem coluna ficam literais."""
+        if not self.campos:
+            return self._partes[0] if self._partes else ""
+        return "".join(
+            p if isinstance(p, str) else dados.get(p.chave, p.original)
+            for p in self._partes
+        )
+
+
+@lru_cache(maxsize=64)
+def _compilar_texto(fonte: str) -> TemplateCompilado:
+    return TemplateCompilado(fonte)
+
+
+def compilar(template) -> TemplateCompilado | None:
+    """Compila (com cache) um template em texto; aceita um já compilado ou None."""
+    if template is None or isinstance(template, TemplateCompilado):
+        return template
+    return _compilar_texto(template)
@@ -0,0 +1,226 @@
+"""Validação de endereços antes do envio.
+
+Roda sobre a lista antes de cada contato chegar ao SMTP:
+
+1. normalização: espaços, maiúsculas no domínio, ``mailto:`` e domínio
+   internacionalizado convertido para IDNA (``josé.com.br`` -> ``xn--jos-dma.com.br``);
+2. sintaxe (regex pré-compilada) e domínios de exemplo/placeholder;
+3. verificação do domínio (MX, ou A na falta de MX) por um resolvedor
+   injetável, com cache por domínio e TTL: numa lista de 100 mil linhas cada
+   domínio é consultado uma vez só.
+
+O resolvedor padrão usa ``dnspython`` (instalado junto com ``email-validator``)
+e só é usado com ``VALIDATE_MX``. Um resolvedor é qualquer função
+``dominio -> bool | None``: ``False`` rejeita o domínio, ``None`` (timeout,
+erro de rede) não rejeita ninguém.
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from .config import VALIDATE_MX, VALIDATE_MX_TTL
+
+
+_RE_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_RE_LOCAL = re.compile(r"^[A-Za-z0-9!#$%&'*+/=?^_`{|}~.-]+$")
+
+# Endereços/domínios de exemplo que nunca devem receber envios
+_PLACEHOLDERS = {"exemplo@dominio.com"}
+_DOMINIOS_EXEMPLO = {"example.com", "example.org", "example.net", "test.com"}
+
+# Motivos de rejeição (aparecem no relatório)
+VAZIO = "vazio"
+SINTAXE = "sintaxe inválida"
+PLACEHOLDER = "endereço de exemplo"
+DOMINIO = "domínio sem servidor de e-mail"
+
+
+def normalizar(email) -> str:
+    """Forma canônica para envio: sem espaços/``mailto:``, domínio em minúsculas e IDNA.
+    Devolve o texto original (sem espaços) se o domínio não puder ser convertido."""
+    email = str(email or "").strip()
+    if email.lower().startswith("mailto:"):
+        email = email[7:].strip()
+    local, arroba, dominio = email.rpartition("@")
+    if not arroba:
+        return email
+    dominio = dominio.strip().rstrip(".").lower()
+    if not dominio.isascii():
+        try:
+            dominio = dominio.encode("idna").decode("ascii")
+        except UnicodeError:
+            return email
+    return f"{local}@{dominio}"
+
+
+def motivo_sintaxe(email: str) -> str | None:
+    """Motivo da rejeição sem consultar a rede (endereço já normalizado), ou None."""
+    if not email:
+        return VAZIO
+    if _RE_EMAIL.match(email) is None:
+        return SINTAXE
+    local, _, dominio = email.rpartition("@")
+    if len(email) > 254 or len(local) > 64 or _RE_LOCAL.match(local) is None or ".." in email:
+        return SINTAXE
+    if email.lower() in _PLACEHOLDERS or dominio in _DOMINIOS_EXEMPLO:
+        return PLACEHOLDER
+    return None
+
+
+def resolvedor_dns(timeout: float = 3.0):
+    """Resolvedor padrão (MX, com fallback para A). None se o dnspython não está instalado."""
+    try:
+        import dns.exception
+        import dns.resolver
+    except ImportError:
+        return None
+
+    resolver = dns.resolver.Resolver()
+    resolver.lifetime = timeout
+
+    def resolver_dominio(dominio: str) -> bool | None:
+        for tipo in ("MX", "A"):
+            try:
+                resolver.resolve(dominio, tipo)
+                return True
+            except dns.resolver.NXDOMAIN:
+                return False
+            except dns.resolver.NoAnswer:
+                continue
+            except dns.exception.DNSException:
+                return None
+        return False
+
+    return resolver_dominio
+
+
+def dominios(emails) -> set[str]:
+    """Domínios (normalizados) dos endereços com sintaxe válida."""
+    encontrados = set()
+    for email in emails:
+        normalizado = normalizar(email)
+        if motivo_sintaxe(normalizado) is None:
+            encontrados.add(normalizado.rpartition("@")[2])
+    return encontrados
+
+
+class CacheDominios:
+    """Resultado da verificação por domínio, válido por ``ttl`` segundos."""
+
+    def __init__(self, ttl: float = VALIDATE_MX_TTL):
+        self.ttl = ttl
+        self._itens: dict[str, tuple[bool | None, float]] = {}
+        self._lock = threading.Lock()
+
+    def obter(self, dominio: str):
+        """(encontrado, resultado)."""
+        item = self._itens.get(dominio)
+        if item is None or item[1] < time.monotonic():
+            return False, None
+        return True, item[0]
+
+    def guardar(self, dominio: str, resultado: bool | None) -> None:
+        # Falhas de rede (None) ficam pouco tempo no cache para serem refeitas
+        ttl = self.ttl if resultado is not None else min(self.ttl, 60)
+        with self._lock:
+            self._itens[dominio] = (resultado, time.monotonic() + ttl)
+
+
+class Validador:
+    """Valida endereços e filtra listas de contatos, com cache por domínio."""
+
+    def __init__(self, resolvedor=None, *, verificar_dominio: bool | None = None, cache: CacheDominios | None = None):
+        if verificar_dominio is None:
+            verificar_dominio = resolvedor is not None or VALIDATE_MX
+        if verificar_dominio and resolvedor is None:
+            resolvedor = resolvedor_dns()
+            if resolvedor is None:
+                print("[Validação] dnspython não instalado: verificação de MX desativada.")
+        self.resolvedor = resolvedor if verificar_dominio else None
+        self.cache = cache or CacheDominios()
+
+    def dominio_valido(self, dominio: str) -> bool:
+        if self.resolvedor is None:
+            return True
+        encontrado, resultado = self.cache.obter(dominio)
+        if not encontrado:
+            try:
+                resultado = self.resolvedor(dominio)
+            except Exception as e:
+                print(f"[Validação] Falha ao verificar o domínio {dominio}: {e}")
+                resultado = None
+            self.cache.guardar(dominio, resultado)
+        return resultado is not False
+
+    def verificar_dominios(self, dominios, workers: int = 8) -> None:
+        """Consulta em paralelo os domínios ainda fora do cache."""
+        if self.resolvedor is None:
+            return
+        faltando = [d for d in set(dominios) if not self.cache.obter(d)[0]]
+        if len(faltando) <= 1:
+            for d in faltando:
+                self.dominio_valido(d)
+            return
+        with ThreadPoolExecutor(max_workers=min(workers, len(faltando)), thread_name_prefix="mx") as ex:
+            list(ex.map(self.dominio_valido, faltando))
+
+    def preverificar(self, emails) -> None:
+        """Resolve em paralelo os domínios de ``emails`` antes do primeiro
+        envio (depois, ``validar`` só consulta o cache)."""
+        if self.resolvedor is not None:
+            self.verificar_dominios(dominios(emails))
+
+    def validar(self, email) -> tuple[str, str | None]:
+        """(endereço normalizado, motivo da rejeição ou None)."""
+        normalizado = normalizar(email)
+        motivo = motivo_sintaxe(normalizado)
+        if motivo is None and not self.dominio_valido(normalizado.rpartition("@")[2]):
+            motivo = DOMINIO
+        return normalizado, motivo
+
+    def filtrar(self, contatos, rejeitados: list | None = None, *, chave: str = "E-mail", janela: int = 512):
+        """Gera os contatos válidos, com o e-mail normalizado.
+
+        Com verificação de domínio, os contatos são lidos em blocos (16, 32...
+        até ``janela``) e os domínios de cada bloco são resolvidos em paralelo
+        antes de ele ser filtrado. A leitura acompanha o consumo: um
+        ``islice`` sobre o resultado para de ler a origem (e de consultar o
+        DNS) logo depois do limite. Os rejeitados vão para ``rejeitados``
+        como ``{"email", "nome", "reason"}``.
+        """
+        if self.resolvedor is None:
+            yield from self._filtrar(contatos, rejeitados, chave)
+            return
+        contatos = iter(contatos)
+        tamanho = min(16, janela)
+        while bloco := list(islice(contatos, tamanho)):
+            self.preverificar(contato.get(chave) for contato in bloco)
+            yield from self._filtrar(bloco, rejeitados, chave)
+            tamanho = min(tamanho * 2, janela)
+
+    def _filtrar(self, contatos, rejeitados: list | None, chave: str):
+        for contato in contatos:
+            original = contato.get(chave)
+            email, motivo = self.validar(original)
+            if motivo:
+                if rejeitados is not None:
+                    rejeitados.append({"email": str(original or ""), "nome": contato.get("Nome", ""), "reason": motivo})
+                continue
+            if email != original:
+                contato = {**contato, chave: email}
+            yield contato
+
+
+_padrao: Validador | None = None
+_lock = threading.Lock()
+
+
+def padrao() -> Validador:
+    """Validador compartilhado do processo (configurado pelo ``.env``)."""
+    global _padrao
+    with _lock:
+        if _padrao is None:
+            _padrao = Validador()
+        return _padrao
@@ -0,0 +1,39 @@
+"""Cotas persistentes e lotes maiores que a vaga (``python -m pytest tests``)."""
+import time
+
+import pytest
+
+from src.agendador import Agendador, CotaEsgotada, CotaPersistente
+
+
+def test_lote_maior_que_a_cota_horaria_com_janela_vazia(tmp_path):
+    cota = CotaPersistente(tmp_path / "envios.sqlite3", "x", por_hora=10)
+    assert cota.reservar(50) == (10, 0.0)
+    reservados, espera = cota.reservar(50)
+    assert reservados == 0
+    assert 3590 < espera <= 3600
+
+
+def test_lote_maior_que_a_vaga_horaria_restante(tmp_path):
+    cota = CotaPersistente(tmp_path / "envios.sqlite3", "x", por_hora=10)
+    assert cota.reservar(7) == (7, 0.0)
+    assert cota.reservar(50) == (3, 0.0)
+    assert cota.usados() == 10
+
+
+def test_lote_diario_que_cabe_em_parte(tmp_path):
+    cota = CotaPersistente(tmp_path / "envios.sqlite3", "x", por_dia=5)
+    assert cota.reservar(3) == (3, 0.0)
+    assert cota.reservar(4) == (2, 0.0)
+    with pytest.raises(CotaEsgotada):
+        cota.reservar(1)
+
+
+def test_aguardar_libera_o_lote_em_partes(tmp_path):
+    cota = CotaPersistente(tmp_path / "envios.sqlite3", "x", por_hora=4)
+    agendador = Agendador(cota=cota, pausar=False)
+    inicio = time.monotonic()
+    assert agendador.aguardar(quantidade=10) == 4
+    assert time.monotonic() - inicio < 1
+    with pytest.raises(CotaEsgotada):
+        agendador.aguardar(quantidade=10)
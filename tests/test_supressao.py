@@ -0,0 +1,41 @@
+"""Lista de supressão compartilhada entre processos (``python -m pytest tests``)."""
+import sqlite3
+
+from src.supressao import MANUAL, IndiceSupressao
+
+
+def test_supressao_depois_de_remover_chega_a_outra_instancia(tmp_path):
+    caminho = tmp_path / "supressao.sqlite3"
+    leitor = IndiceSupressao(caminho, bloom=True)
+    escritor = IndiceSupressao(caminho, bloom=True)
+
+    escritor.suprimir("a@exemplo.com")
+    leitor.atualizar()
+    assert leitor.motivo("a@exemplo.com") == MANUAL
+
+    # remover o id mais alto não pode liberar o id para a próxima supressão
+    escritor.remover("a@exemplo.com")
+    escritor.suprimir("b@exemplo.com")
+    leitor.atualizar()
+    assert leitor.motivo("a@exemplo.com") is None
+    assert leitor.motivo("b@exemplo.com") == MANUAL
+
+
+def test_banco_antigo_sem_autoincrement_e_migrado(tmp_path):
+    caminho = tmp_path / "supressao.sqlite3"
+    con = sqlite3.connect(caminho)
+    con.execute(
+        "CREATE TABLE supressoes (id INTEGER PRIMARY KEY, email TEXT NOT NULL UNIQUE, "
+        "motivo TEXT NOT NULL, criado_em REAL NOT NULL)"
+    )
+    con.execute("INSERT INTO supressoes (email, motivo, criado_em) VALUES ('a@exemplo.com', 'bounce', 0)")
+    con.commit()
+    con.close()
+
+    leitor = IndiceSupressao(caminho, bloom=True)
+    escritor = IndiceSupressao(caminho, bloom=True)
+    assert leitor.motivo("a@exemplo.com") == "bounce"
+    escritor.remover("a@exemplo.com")
+    escritor.suprimir("b@exemplo.com")
+    leitor.atualizar()
+    assert leitor.motivo("b@exemplo.com") == MANUAL
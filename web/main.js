@@ -27,7 +27,7 @@ fileInput.addEventListener("change", (e) => {
     }, 200)
   } else {
     uploadTitle.textContent = "Clique para selecionar"
-    uploadSubtitle.textContent = 'Planilha Excel (.xlsx) com colunas "Nome" e "E-mail"'
+    uploadSubtitle.textContent = 'Planilha (.xlsx, .csv ou .tsv) com colunas "Nome" e "E-mail"'
     fileLabel.style.borderColor = "rgba(102, 126, 234, 0.4)"
     fileLabel.style.background = "rgba(30, 41, 59, 0.4)"
     fileLabel.style.transform = "scale(1)"
@@ -184,7 +184,7 @@ form.addEventListener("submit", async (e) => {
     updateStatus("Processando arquivo e enviando emails...", "info")
 
     const progressMessages = [
-      { msg: "Lendo arquivo Excel...", type: "progress" },
+      { msg: "Lendo planilha...", type: "progress" },
       { msg: "Validando endereços de email...", type: "check" },
       { msg: "Conectando ao servidor SMTP...", type: "progress" },
       { msg: "Enviando emails...", type: "email" },
@@ -202,6 +202,8 @@ form.addEventListener("submit", async (e) => {
     const res = await fetch(`${API_BASE}/api/send`, {
       method: "POST",
       body: fd,
+      // Pede os resultados em streaming (NDJSON); o servidor responde JSON se não suportar
+      headers: { Accept: "application/x-ndjson, application/json" },
     })
 
     clearInterval(progressInterval)
@@ -209,7 +211,13 @@ form.addEventListener("submit", async (e) => {
     // Robust response parsing
     const ct = res.headers.get("content-type") || ""
     let data = null
-    if (ct.includes("application/json")) {
+    if (res.ok && ct.includes("application/x-ndjson")) {
+      log(`\n📋 Detalhes por destinatário:`, "info")
+      data = await readResultStream(res, (result) => {
+        const email = result.email || `Linha ${result.index + 1}`
+        log(`   ${email}: ${result.status}`, result.success ? "success" : "error")
+      })
+    } else if (ct.includes("application/json")) {
       try {
         data = await res.json()
       } catch (_) {
@@ -256,14 +264,20 @@ form.addEventListener("submit", async (e) => {
     log(`   • Falhas: ${summary.failed}`, summary.failed > 0 ? "warning" : "info")
     log(`   • Taxa de sucesso: ${successRate}%`, "info")
     log(`   • Limite diário: ${summary.limit}`, "info")
+    if (summary.rejected > 0) {
+      log(`   • Endereços rejeitados na validação: ${summary.rejected}`, "warning")
+      ;(summary.rejected_rows || []).forEach((row) => {
+        log(`      ${row.email || "(vazio)"}: ${row.reason}`, "warning")
+      })
+    }
     
     // Exibir mensagem de limitação da Vercel se aplicável
     if (summary.is_vercel && summary.message) {
       log(`\n⚠️ ${summary.message}`, "warning")
     }
 
-    // Log individual results
-    if (data.results && data.results.length > 0) {
+    // Log individual results (no modo streaming já foram exibidos conforme chegaram)
+    if (!data.streamed && data.results && data.results.length > 0) {
       log(`\n📋 Detalhes por destinatário:`, "info")
       data.results.forEach((result, index) => {
         const status = result.success ? "success" : "error"
@@ -291,6 +305,42 @@ form.addEventListener("submit", async (e) => {
   }
 })
 
+// Lê a resposta NDJSON de /api/send linha a linha, chamando onResult para cada envio.
+// Retorna { summary, streamed: true } quando o registro de resumo chega.
+async function readResultStream(res, onResult) {
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+  let summary = null
+
+  const handleLine = (line) => {
+    if (!line.trim()) return
+    const record = JSON.parse(line)
+    if (record.type === "result") {
+      onResult(record)
+    } else if (record.type === "summary") {
+      summary = record.summary
+    } else if (record.type === "error") {
+      throw new Error(record.error || "Erro durante o envio")
+    }
+  }
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    const lines = buffer.split("\n")
+    buffer = lines.pop()
+    lines.forEach(handleLine)
+  }
+  handleLine(buffer + decoder.decode())
+
+  if (!summary) {
+    throw new Error("Conexão encerrada antes do resumo da campanha")
+  }
+  return { summary, streamed: true }
+}
+
 function celebrateSuccess(successRate = 100) {
   // Create multiple waves of confetti
   const colors = ["#667eea", "#764ba2", "#10b981", "#f59e0b", "#ef4444", "#8b5cf6", "#06b6d4"]